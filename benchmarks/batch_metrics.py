@@ -0,0 +1,81 @@
+"""
+일괄 메트릭 API 검사 - calculate_metrics_by(df, 차원) vs 그룹마다 필터 + _calculate_single_period_metrics
+
+그룹별 결과가 단일 기간 함수와 같은지(매출 / 평점 합산은 상대 오차 1e-12, 나머지는 정확히 일치) 확인하고
+두 방식의 소요 시간을 출력합니다.
+
+사용법 (프로젝트 루트에서, create_mart.py 실행 후):
+    python -m benchmarks.batch_metrics
+    python -m benchmarks.batch_metrics --dims customer_state y_mth --dims product_category_name
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+# 부동소수 합산 순서만 다른 지표
+SUM_RTOL = 1e-12
+SUM_KEYS = {'total_amount', 'avg_order_value', 'avg_review_score'}
+
+DEFAULT_DIMS = [['y_mth'], ['customer_state'], ['customer_state', 'y_mth']]
+
+
+def _same(key, a, b):
+    if pd.isna(a) or pd.isna(b):
+        return pd.isna(a) and pd.isna(b)
+    if key in SUM_KEYS:
+        return np.isclose(a, b, rtol=SUM_RTOL, atol=0)
+    return a == b
+
+
+def _check(df, dims):
+    from utils.metrics import _calculate_single_period_metrics, calculate_metrics_by
+
+    start = time.perf_counter()
+    batch = calculate_metrics_by(df, dims)
+    batch_seconds = time.perf_counter() - start
+
+    errors = []
+    start = time.perf_counter()
+    for key, row in batch.iterrows():
+        values = key if isinstance(key, tuple) else (key,)
+        mask = np.ones(len(df), dtype=bool)
+        for dim, value in zip(dims, values):
+            mask &= (df[dim] == value).to_numpy()
+        single = _calculate_single_period_metrics(df[mask])
+        errors += [f"{dims} {values} {k}: batch={row[k]} single={v}" for k, v in single.items() if not _same(k, row[k], v)]
+    loop_seconds = time.perf_counter() - start
+
+    print(f"⏱️ {' × '.join(dims):<32} 그룹 {len(batch):>4}개 - 일괄 {batch_seconds * 1000:.1f}ms / "
+          f"그룹별 반복 {loop_seconds * 1000:.1f}ms")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="일괄 메트릭 API 결과 / 속도 검사")
+    parser.add_argument('--base-dir', default=PROJECT_ROOT, help="마트 파일 위치")
+    parser.add_argument('--dims', nargs='+', action='append', help="그룹 차원 (여러 번 지정 가능)")
+    args = parser.parse_args()
+
+    from utils.db_manager import load_data_local
+
+    df, _ = load_data_local(base_dir=args.base_dir)
+    errors = []
+    for dims in args.dims or DEFAULT_DIMS:
+        errors += _check(df, dims)
+    if errors:
+        for line in errors[:50]:
+            print(f"❌ {line}")
+        print(f"❌ 불일치 {len(errors)}건")
+        sys.exit(1)
+    print("✅ 모든 그룹 결과 일치")
+
+
+if __name__ == "__main__":
+    main()
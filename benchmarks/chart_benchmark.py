@@ -0,0 +1,298 @@
+"""
+차트 / 지표 함수 마이크로 벤치마크 + 예산 검사
+
+components/charts.py의 차트 / 표 함수와 utils/metrics.py의 지표 함수를 실제 마트와 합성 마트(규모별)에서 실행하고
+함수마다 생성 시간(중앙값) / 직렬화 시간 / 전송 크기(Plotly JSON, 표는 JSON) / 최대 메모리(tracemalloc)를 기록합니다.
+예산(기본값 또는 --budget-file)을 넘는 항목이 있으면 목록을 출력하고 종료 코드 1로 끝납니다.
+
+사용법 (프로젝트 루트에서, create_mart.py 실행 후):
+    python -m benchmarks.chart_benchmark                        # 실제 마트 + 합성 0.1×
+    python -m benchmarks.chart_benchmark --scales 1 --no-real
+    python -m benchmarks.chart_benchmark --budget-file budgets.json --baseline benchmarks/results/charts-....json
+
+예산 파일 (JSON, 값이 없는 항목은 기본값 사용):
+    {"default": {"build_ms": 1000, "payload_kb": 500, "peak_mb": 256},
+     "cases": {"customer_density_map_z9": {"payload_kb": 800}}}
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+RESULTS_DIR = os.path.join(PROJECT_ROOT, "benchmarks", "results")
+
+# 기본 예산 (함수 하나 기준) - 전송 크기는 느린 회선의 원격 사용자 기준
+DEFAULT_BUDGETS = {'build_ms': 1000, 'payload_kb': 500, 'peak_mb': 256}
+
+# 이전 결과 대비 이 비율 이상 느려지면 표시
+SLOWDOWN_RATIO = 1.2
+
+
+def _synthetic_mart(scale, seed):
+    """합성 원본 → 마트 (create_mart.py와 같은 병합 / 압축 단계)"""
+    from utils.synthetic_data import write_olist_dataset
+    from utils.ingest import ingest_sources
+    from utils.create_mart import build_mart_frame
+    from utils.compact import compact_mart
+
+    work_dir = tempfile.mkdtemp(prefix="chart_bench_")
+    try:
+        write_olist_dataset(work_dir, scale=scale, seed=seed)
+        src, _ = ingest_sources(work_dir, os.path.join(work_dir, "geo_lookup.npz"))
+        return compact_mart(build_mart_frame(src))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def build_context(df, cube):
+    """대시보드와 같은 입력 준비 (데이터 버전당 한 번 만드는 구조 + 최근 월 필터 결과)"""
+    from utils.cube import build_cube, filter_cube
+    from utils.db_manager import apply_filters
+    from utils.filter_index import FilterIndex
+    from utils.kpi_table import build_kpi_table
+    from utils.customers import CustomerCohorts
+    from utils.spatial_bins import build_spatial_bins
+    from utils.timeseries import build_sales_series
+    from utils.query_backend import summarize_states
+
+    if cube is None:
+        cube = build_cube(df)
+    filter_index = FilterIndex(df)
+    month = sorted(df['y_mth'].dropna().astype(str).unique())[-1]
+    filtered = apply_filters(df, month, [], filter_index)
+    return {
+        'df': df,
+        'cube': cube,
+        'month': month,
+        'filter_index': filter_index,
+        'filtered': filtered,
+        'filtered_cube': filter_cube(cube, month, []),
+        'state_summary_all': summarize_states(df),
+        'state_summary_month': summarize_states(filtered),
+        'monthly': build_kpi_table(df).monthly_sales(),
+        'series': build_sales_series(df),
+        'cohorts': CustomerCohorts(df),
+        'bins': build_spatial_bins(df),
+    }
+
+
+def benchmark_cases():
+    """(종류, 이름, 함수(ctx)) 목록 - 대시보드가 캐시 안에서 하는 집계 / 다운샘플링까지 포함해 측정"""
+    from components import charts
+    from utils import metrics
+
+    def top_states(c, granularity):
+        series = c['series']
+        trend = series.trend(granularity, series.top_states(5))
+        return charts.create_top_states_trend(c['df'], cube=c['cube'], trend=trend, granularity=granularity)
+
+    def density(c, zoom):
+        return charts.create_customer_density_map(c['bins'].frame('All', [], zoom), zoom)
+
+    return [
+        ('chart', 'main_performance_map',
+         lambda c: charts.create_main_performance_map(c['filtered'], state_summary=c['state_summary_month'])),
+        ('chart', 'top_states_trend', lambda c: charts.create_top_states_trend(c['df'], cube=c['cube'])),
+        ('chart', 'top_states_trend_week', lambda c: top_states(c, 'week')),
+        ('chart', 'top_states_trend_day', lambda c: top_states(c, 'day')),
+        ('chart', 'satisfaction_vs_sales',
+         lambda c: charts.create_satisfaction_vs_sales(c['df'], state_summary=c['state_summary_all'])),
+        ('chart', 'monthly_sales_chart', lambda c: charts.create_monthly_sales_chart(c['monthly'], c['month'])),
+        ('chart', 'sales_trend_week',
+         lambda c: charts.create_sales_trend_base(c['series'].trend('week'), 'week')),
+        ('chart', 'sales_trend_day', lambda c: charts.create_sales_trend_base(c['series'].trend('day'), 'day')),
+        ('chart', 'top5_categories',
+         lambda c: charts.create_top5_categories_chart(c['filtered'], c['month'], cube=c['filtered_cube'])),
+        ('chart', 'cohort_retention_heatmap', lambda c: charts.create_cohort_retention_heatmap(c['cohorts'].retention())),
+        ('chart', 'cohort_ltv_chart', lambda c: charts.create_cohort_ltv_chart(c['cohorts'].ltv())),
+        ('chart', 'customer_density_map_z4', lambda c: density(c, 4)),
+        ('chart', 'customer_density_map_z9', lambda c: density(c, 9)),
+        ('table', 'top_bottom_ranking',
+         lambda c: charts.get_top_bottom_ranking(c['filtered'], cube=c['filtered_cube'],
+                                                 state_summary=c['state_summary_month'])),
+        ('table', 'performance_summary',
+         lambda c: charts.get_performance_summary(c['filtered'], cube=c['filtered_cube'])),
+        ('metric', 'metrics_with_comparison_all',
+         lambda c: metrics.calculate_metrics_with_comparison(c['df'], 'All', c['df'])),
+        ('metric', 'metrics_with_comparison_month',
+         lambda c: metrics.calculate_metrics_with_comparison(c['filtered'], c['month'], c['df'], [],
+                                                             c['filter_index'])),
+        ('metric', 'metrics_by_state_month',
+         lambda c: metrics.calculate_metrics_by(c['df'], ['customer_state', 'y_mth'])),
+        ('metric', 'comparison_metrics', lambda c: metrics.get_comparison_metrics(c['df'], c['filtered'])),
+        ('metric', 'key_metrics_summary', lambda c: metrics.get_key_metrics_summary(c['filtered'])),
+    ]
+
+
+def _serialize(value):
+    """전송 형태로 직렬화 (차트: Plotly JSON, 표: DataFrame JSON) → 문자열, 그 외(지표 dict 등)는 None"""
+    if hasattr(value, 'to_json') and hasattr(value, 'layout'):
+        return value.to_json()
+    if isinstance(value, pd.DataFrame):
+        return value.to_json(orient='split')
+    if isinstance(value, tuple) and value and all(isinstance(v, pd.DataFrame) for v in value):
+        return '[' + ','.join(v.to_json(orient='split') for v in value) + ']'
+    return None
+
+
+def measure(func, ctx, repeat):
+    """생성 시간(repeat회 중앙값 / 최소) + 직렬화 시간 / 크기 + tracemalloc 최대 메모리 (별도 1회)"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = func(ctx)
+        timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    payload = _serialize(value)
+    serialize_seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        func(ctx)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'build_ms': round(float(np.median(timings)) * 1000, 3),
+        'build_ms_min': round(min(timings) * 1000, 3),
+        'serialize_ms': round(serialize_seconds * 1000, 3) if payload is not None else None,
+        'payload_kb': round(len(payload.encode('utf-8')) / 1024, 2) if payload is not None else None,
+        'peak_mb': round(peak / 1024 ** 2, 3),
+    }
+
+
+def run_mart(label, df, cube, repeat, only=None):
+    print(f"\n▶ {label} ({len(df):,}행)")
+    start = time.perf_counter()
+    ctx = build_context(df, cube)
+    print(f"  입력 준비 {time.perf_counter() - start:.2f}s")
+
+    results = []
+    for kind, name, func in benchmark_cases():
+        if only and name not in only:
+            continue
+        row = {'mart': label, 'rows': len(df), 'kind': kind, 'name': name, **measure(func, ctx, repeat)}
+        results.append(row)
+        payload = f"{row['payload_kb']:9.1f}KB" if row['payload_kb'] is not None else f"{'-':>11}"
+        print(f"  {kind:<6} {name:<32} {row['build_ms']:9.2f}ms  {payload}  peak {row['peak_mb']:8.2f}MB")
+    return results
+
+
+def load_budgets(path, overrides):
+    """예산 파일(JSON) + 명령행 값 → {'default': {...}, 'cases': {이름: {...}}}"""
+    budgets = {'default': dict(DEFAULT_BUDGETS), 'cases': {}}
+    if path:
+        with open(path, encoding='utf-8') as f:
+            loaded = json.load(f)
+        budgets['default'].update(loaded.get('default', {}))
+        budgets['cases'].update(loaded.get('cases', {}))
+    budgets['default'].update({k: v for k, v in overrides.items() if v is not None})
+    return budgets
+
+
+def check_budgets(results, budgets):
+    """예산 초과 목록 ['마트 / 이름: 지표 값 > 한도', ...] (값이 없는 지표는 건너뜀)"""
+    violations = []
+    for row in results:
+        limits = {**budgets['default'], **budgets['cases'].get(row['name'], {})}
+        for metric, limit in limits.items():
+            value = row.get(metric)
+            if value is not None and limit is not None and value > limit:
+                violations.append(f"{row['mart']} / {row['name']}: {metric} {value} > {limit}")
+    return violations
+
+
+def compare_baseline(results, path):
+    """이전 결과 파일과 비교 - SLOWDOWN_RATIO 이상 느려졌거나 전송 크기가 바뀐 항목 출력"""
+    with open(path, encoding='utf-8') as f:
+        previous = {(r['mart'], r['name']): r for r in json.load(f).get('results', [])}
+    print(f"\n📊 이전 결과 대비 ({os.path.basename(path)})")
+    changed = 0
+    for row in results:
+        old = previous.get((row['mart'], row['name']))
+        if old is None:
+            continue
+        notes = []
+        if old['build_ms'] and row['build_ms'] / old['build_ms'] >= SLOWDOWN_RATIO:
+            notes.append(f"생성 {old['build_ms']:.2f} → {row['build_ms']:.2f}ms")
+        if old.get('payload_kb') != row.get('payload_kb'):
+            notes.append(f"크기 {old.get('payload_kb')} → {row.get('payload_kb')}KB")
+        if notes:
+            changed += 1
+            print(f"  {row['mart']} / {row['name']}: {', '.join(notes)}")
+    if not changed:
+        print("  변화 없음")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="차트 / 지표 함수 벤치마크 + 예산 검사")
+    parser.add_argument('--base-dir', default=PROJECT_ROOT, help="실제 마트 / 큐브 파일 위치")
+    parser.add_argument('--no-real', action='store_true', help="실제 마트는 건너뜀")
+    parser.add_argument('--scales', type=float, nargs='*', default=[0.1], help="합성 마트 규모 (1× = Olist 원본)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=5, help="함수별 반복 횟수 (생성 시간은 중앙값)")
+    parser.add_argument('--only', nargs='+', default=None, help="측정할 함수 이름만")
+    parser.add_argument('--budget-file', default=None, help="예산 JSON 경로")
+    parser.add_argument('--max-build-ms', type=float, default=None)
+    parser.add_argument('--max-payload-kb', type=float, default=None)
+    parser.add_argument('--max-peak-mb', type=float, default=None)
+    parser.add_argument('--baseline', default=None, help="비교할 이전 결과 JSON")
+    parser.add_argument('--output', default=None, help="결과 JSON 경로 (기본값: benchmarks/results/charts-<시각>.json)")
+    args = parser.parse_args()
+
+    from utils.cube import CUBE_FILE_NAME, load_cube_file
+    from utils.db_manager import load_data_local
+
+    budgets = load_budgets(args.budget_file, {'build_ms': args.max_build_ms, 'payload_kb': args.max_payload_kb,
+                                              'peak_mb': args.max_peak_mb})
+    results = []
+    if not args.no_real:
+        df, _ = load_data_local(base_dir=args.base_dir)
+        cube = load_cube_file(os.path.join(args.base_dir, CUBE_FILE_NAME))
+        results += run_mart('real', df, cube, args.repeat, args.only)
+    for scale in args.scales:
+        results += run_mart(f'synthetic_{scale:g}x', _synthetic_mart(scale, args.seed), None, args.repeat, args.only)
+
+    violations = check_budgets(results, budgets)
+    report = {
+        'benchmark': 'charts',
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'cpu_count': os.cpu_count(),
+        'budgets': budgets,
+        'violations': violations,
+        'results': results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"charts-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 결과 저장: {output}")
+
+    if args.baseline:
+        compare_baseline(results, args.baseline)
+    if violations:
+        for line in violations:
+            print(f"❌ {line}")
+        print(f"❌ 예산 초과 {len(violations)}건")
+        sys.exit(1)
+    print(f"✅ {len(results)}개 항목 모두 예산 이내")
+
+
+if __name__ == "__main__":
+    main()
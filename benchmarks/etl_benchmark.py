@@ -0,0 +1,224 @@
+"""
+마트 생성(ETL) 단계별 벤치마크
+
+합성 Olist 데이터(utils/synthetic_data.py)를 규모별로 생성하고,
+마트 생성 각 단계의 소요 시간 / 최대 RSS / 산출물 크기를 기록합니다.
+
+사용법 (프로젝트 루트에서):
+    python -m benchmarks.etl_benchmark --scales 1 10
+    python -m benchmarks.etl_benchmark --scales 0.1 --streaming --memory-budget-mb 512
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import threading
+import subprocess
+from datetime import datetime
+
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+RESULTS_DIR = os.path.join(PROJECT_ROOT, "benchmarks", "results")
+
+
+class RssSampler:
+    """
+    구간 내 최대 RSS 측정
+    - Linux: /proc/self/statm 를 짧은 주기로 샘플링
+    - 그 외: resource.getrusage 의 ru_maxrss (프로세스 전체 최대값)
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def current_rss():
+        try:
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError, AttributeError):
+            import resource
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.current_rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = self.current_rss()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.current_rss())
+
+
+def _path_bytes(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    return total
+
+
+def _frame_bytes(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def run_stage(results, scale, stage, func, output=None):
+    """단계 하나 실행 - 시간/최대 RSS/산출물 크기 기록. output: 파일 경로 또는 결과값 → 크기 함수"""
+    with RssSampler() as sampler:
+        start = time.perf_counter()
+        value = func()
+        elapsed = time.perf_counter() - start
+
+    if isinstance(output, str):
+        output_bytes = _path_bytes(output)
+    elif callable(output):
+        output_bytes = output(value)
+    else:
+        output_bytes = None
+
+    row = {
+        'scale': scale,
+        'stage': stage,
+        'seconds': round(elapsed, 4),
+        'peak_rss_mb': round(sampler.peak / 1024 ** 2, 1),
+        'output_bytes': output_bytes,
+    }
+    results.append(row)
+    size = f"{output_bytes / 1024 ** 2:10.1f}MB" if output_bytes is not None else f"{'-':>12}"
+    print(f"  {stage:<18} {elapsed:8.2f}s  peak {row['peak_rss_mb']:8.1f}MB  out {size}")
+    return value
+
+
+def benchmark_scale(scale, work_dir, seed=42, streaming=False, memory_budget_mb=1024):
+    """한 규모에 대해 전체 단계 실행 (같은 프로세스)"""
+    from utils.synthetic_data import write_olist_dataset
+    from utils.ingest import ingest_sources
+    from utils.create_mart import build_mart_frame, write_parquet_mart, build_mart_streaming
+    from utils.cube import build_cube, save_cube
+    from utils.db_manager import load_data_local
+    from utils.metrics import calculate_metrics_with_comparison, get_key_metrics_summary
+
+    data_dir = os.path.join(work_dir, f"scale_{scale}", "00_cleand_data")
+    out_dir = os.path.join(work_dir, f"scale_{scale}", "mart")
+    csv_only_dir = os.path.join(work_dir, f"scale_{scale}", "mart_csv_only")
+    for d in (out_dir, csv_only_dir):
+        shutil.rmtree(d, ignore_errors=True)
+        os.makedirs(d)
+
+    results = []
+    print(f"\n▶ scale {scale}×")
+
+    if not os.path.exists(os.path.join(data_dir, "orders.csv")):
+        run_stage(results, scale, 'generate', lambda: write_olist_dataset(data_dir, scale=scale, seed=seed), data_dir)
+
+    csv_path = os.path.join(out_dir, "dashboard_mart.csv")
+    parquet_dir = os.path.join(out_dir, "dashboard_mart_parquet")
+    cube_path = os.path.join(out_dir, "dashboard_cube.parquet")
+    geo_lookup_path = os.path.join(out_dir, "geo_lookup.npz")
+
+    src = run_stage(results, scale, 'ingest',
+                    lambda: ingest_sources(data_dir, geo_lookup_path)[0],
+                    lambda s: sum(_frame_bytes(t) for n, t in s.items() if n != 'geo'))
+    mart = run_stage(results, scale, 'join', lambda: build_mart_frame(src), _frame_bytes)
+    del src
+    run_stage(results, scale, 'write_csv',
+              lambda: mart.to_csv(csv_path, index=False, encoding='utf-8-sig'), csv_path)
+    run_stage(results, scale, 'write_parquet', lambda: write_parquet_mart(mart, parquet_dir), parquet_dir)
+    run_stage(results, scale, 'cube', lambda: save_cube(build_cube(mart), cube_path), cube_path)
+    del mart
+
+    if streaming:
+        stream_dir = os.path.join(work_dir, f"scale_{scale}", "mart_streaming")
+        shutil.rmtree(stream_dir, ignore_errors=True)
+        os.makedirs(stream_dir)
+        run_stage(results, scale, 'streaming_build',
+                  lambda: build_mart_streaming(
+                      data_dir, os.path.join(stream_dir, "dashboard_mart_parquet"),
+                      os.path.join(stream_dir, "dashboard_mart.csv"), geo_lookup_path,
+                      os.path.join(stream_dir, "dashboard_cube.parquet"), memory_budget_mb=memory_budget_mb),
+                  stream_dir)
+
+    # 대시보드 로드 (Parquet 우선 경로 / CSV 폴백 경로)
+    df = run_stage(results, scale, 'load_parquet', lambda: load_data_local(base_dir=out_dir)[0], _frame_bytes)
+    os.symlink(csv_path, os.path.join(csv_only_dir, "dashboard_mart.csv"))
+    run_stage(results, scale, 'load_csv', lambda: load_data_local(base_dir=csv_only_dir)[0], _frame_bytes)
+
+    # 지표 계산 (전체 기간 / 최근 월)
+    last_month = sorted(df['y_mth'].unique())[-1]
+    run_stage(results, scale, 'metrics_all', lambda: calculate_metrics_with_comparison(df, 'All', df))
+    month_df = df[df['y_mth'] == last_month]
+    run_stage(results, scale, 'metrics_month', lambda: calculate_metrics_with_comparison(month_df, last_month, df))
+    run_stage(results, scale, 'key_summary', lambda: get_key_metrics_summary(df))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="마트 생성 단계별 벤치마크")
+    parser.add_argument('--scales', type=float, nargs='+', default=[1, 10], help="합성 데이터 규모 (1× = Olist 원본)")
+    parser.add_argument('--work-dir', default=os.path.join(PROJECT_ROOT, ".bench_data"), help="합성 데이터/산출물 폴더")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--streaming', action='store_true', help="스트리밍 빌드 단계도 측정")
+    parser.add_argument('--memory-budget-mb', type=int, default=1024)
+    parser.add_argument('--output', default=None, help="결과 JSON 경로 (기본값: benchmarks/results/etl-<시각>.json)")
+    parser.add_argument('--single-scale', type=float, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # 규모별로 별도 프로세스에서 실행해야 최대 RSS가 이전 규모의 영향을 받지 않음
+    if args.single_scale is not None:
+        results = benchmark_scale(args.single_scale, args.work_dir, args.seed, args.streaming, args.memory_budget_mb)
+        print("__RESULTS__" + json.dumps(results))
+        return
+
+    all_results = []
+    for scale in args.scales:
+        cmd = [sys.executable, '-m', 'benchmarks.etl_benchmark', '--single-scale', str(scale),
+               '--work-dir', args.work_dir, '--seed', str(args.seed),
+               '--memory-budget-mb', str(args.memory_budget_mb)]
+        if args.streaming:
+            cmd.append('--streaming')
+        proc = subprocess.run(cmd, cwd=PROJECT_ROOT, capture_output=True, text=True)
+        for line in proc.stdout.splitlines():
+            if line.startswith("__RESULTS__"):
+                all_results.extend(json.loads(line[len("__RESULTS__"):]))
+            else:
+                print(line)
+        if proc.returncode != 0:
+            print(proc.stderr)
+            sys.exit(proc.returncode)
+
+    report = {
+        'benchmark': 'etl',
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'cpu_count': os.cpu_count(),
+        'results': all_results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"etl-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 결과 저장: {output}")
+
+
+if __name__ == "__main__":
+    main()
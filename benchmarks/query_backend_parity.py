@@ -0,0 +1,156 @@
+"""
+집계 백엔드(pandas / duckdb) 결과 일치 검사 + 필터 조합별 소요 시간
+
+전체 / 월별 / 월 × 주 조합마다 두 백엔드의 메트릭·비교 지표·주별 집계·기간 비교(전년 동월 / 최근 N개월)를 비교합니다.
+고객 코호트 리텐션 / LTV / 고객 요약은 지역 선택별로, 일 / 주 / 월 매출 시계열은 단위별로 비교합니다.
+(review_score 등은 pandas 쪽이 float32이므로 상대 오차 1e-6 까지 허용)
+
+사용법 (프로젝트 루트에서, create_mart.py 실행 후):
+    python -m benchmarks.query_backend_parity
+    python -m benchmarks.query_backend_parity --states 3
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+RTOL = 1e-6
+
+
+def _close(a, b):
+    if a is None or b is None:
+        return a is None and b is None
+    a, b = float(a), float(b)
+    if np.isnan(a) or np.isnan(b):
+        return np.isnan(a) and np.isnan(b)
+    return np.isclose(a, b, rtol=RTOL, atol=1e-9)
+
+
+def _compare_dicts(label, left, right):
+    errors = []
+    for key in sorted(set(left) | set(right)):
+        if not _close(left.get(key), right.get(key)):
+            errors.append(f"{label}.{key}: pandas={left.get(key)} duckdb={right.get(key)}")
+    return errors
+
+
+def _compare_frames(label, left, right):
+    left = left.set_axis(left.index.astype(str)).sort_index()
+    right = right.set_axis(right.index.astype(str)).sort_index()
+    if list(left.index) != list(right.index):
+        return [f"{label}: 주 목록 불일치 {list(left.index)} / {list(right.index)}"]
+    errors = []
+    for col in left.columns:
+        a = left[col].to_numpy(dtype=np.float64)
+        b = right[col].to_numpy(dtype=np.float64)
+        if not np.allclose(a, b, rtol=RTOL, atol=1e-9, equal_nan=True):
+            errors.append(f"{label}.{col}: 값 불일치")
+    return errors
+
+
+def _compare(pandas_backend, duckdb_backend, month, states, timings):
+    label = f"[{month} / {','.join(states) or 'All'}]"
+    results = {}
+    for backend in (pandas_backend, duckdb_backend):
+        start = time.perf_counter()
+        results[backend.name] = (
+            backend.metrics_with_comparison(month, states),
+            backend.comparison_metrics(month, states),
+            backend.key_metrics_summary(month, states),
+            backend.state_summary(month, states),
+            backend.period_comparisons(month, states),
+        )
+        timings[backend.name].append(time.perf_counter() - start)
+
+    (cur_p, prev_p, cmp_p), comp_p, key_p, states_p, periods_p = results['pandas']
+    (cur_d, prev_d, cmp_d), comp_d, key_d, states_d, periods_d = results['duckdb']
+    errors = []
+    if cmp_p != cmp_d:
+        errors.append(f"{label} can_compare: pandas={cmp_p} duckdb={cmp_d}")
+    errors += _compare_dicts(f"{label} current", cur_p, cur_d)
+    errors += _compare_dicts(f"{label} previous", prev_p, prev_d)
+    errors += _compare_dicts(f"{label} comparison", comp_p, comp_d)
+    errors += _compare_dicts(f"{label} key", key_p, key_d)
+    errors += _compare_frames(f"{label} state_summary", states_p, states_d)
+    for name in sorted(set(periods_p) | set(periods_d)):
+        errors += _compare_dicts(f"{label} {name}", periods_p.get(name, {}), periods_d.get(name, {}))
+    return errors
+
+
+def _compare_cohorts(pandas_backend, duckdb_backend, states):
+    label = f"[cohort / {','.join(states) or 'All'}]"
+    left, right = pandas_backend.customer_cohorts(), duckdb_backend.customer_cohorts()
+    errors = _compare_dicts(f"{label} summary", left.summary(states), right.summary(states))
+    errors += _compare_frames(f"{label} retention", left.retention(states), right.retention(states))
+    errors += _compare_frames(f"{label} ltv", left.ltv(states), right.ltv(states))
+    return errors
+
+
+def _compare_sales_series(pandas_backend, duckdb_backend):
+    from utils.timeseries import GRANULARITIES
+
+    left, right = pandas_backend.sales_timeseries(), duckdb_backend.sales_timeseries()
+    errors = []
+    for granularity in GRANULARITIES:
+        errors += _compare_frames(f"[sales_series / {granularity}] totals", left.totals[granularity].to_frame(),
+                                  right.totals[granularity].to_frame())
+        errors += _compare_frames(f"[sales_series / {granularity}] by_state", left.by_state[granularity],
+                                  right.by_state[granularity])
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="집계 백엔드 결과 일치 검사")
+    parser.add_argument('--base-dir', default=PROJECT_ROOT, help="마트 / 큐브 파일 위치")
+    parser.add_argument('--states', type=int, default=2, help="월마다 조합할 주 개수 (매출 상위 순)")
+    args = parser.parse_args()
+
+    from utils.db_manager import load_data_local
+    from utils.cube import CUBE_FILE_NAME, load_cube_file
+    from utils.filter_index import FilterIndex
+    from utils.kpi_table import build_kpi_table
+    from utils.customers import CustomerCohorts
+    from utils.timeseries import build_sales_series
+    from utils.query_backend import PandasQueryBackend, DuckDBQueryBackend
+
+    df, df_geolocation = load_data_local(base_dir=args.base_dir)
+    cube = load_cube_file(os.path.join(args.base_dir, CUBE_FILE_NAME))
+    filter_index = FilterIndex(df)
+    pandas_backend = PandasQueryBackend(df, df_geolocation, cube, filter_index,
+                                        kpi_table=build_kpi_table(df), customers=CustomerCohorts(df),
+                                        sales_series=build_sales_series(df))
+    duckdb_backend = DuckDBQueryBackend(args.base_dir)
+
+    top_states = (df.groupby('customer_state', observed=True)['payment_value'].sum()
+                  .nlargest(args.states).index.astype(str).tolist())
+    cases = [('All', [])] + [('All', [s]) for s in top_states] + [('All', top_states)]
+    for month in pandas_backend.months():
+        cases += [(month, [])] + [(month, [s]) for s in top_states] + [(month, top_states)]
+
+    timings = {'pandas': [], 'duckdb': []}
+    errors = []
+    for month, states in cases:
+        errors += _compare(pandas_backend, duckdb_backend, month, states, timings)
+    for states in [[]] + [[s] for s in top_states] + [top_states]:
+        errors += _compare_cohorts(pandas_backend, duckdb_backend, states)
+    errors += _compare_sales_series(pandas_backend, duckdb_backend)
+
+    for name, values in timings.items():
+        values = pd.Series(values) * 1000
+        print(f"⏱️ {name:<6} 조합 {len(values)}개 - 평균 {values.mean():.1f}ms, p95 {values.quantile(0.95):.1f}ms")
+    if errors:
+        for line in errors[:50]:
+            print(f"❌ {line}")
+        print(f"❌ 불일치 {len(errors)}건")
+        sys.exit(1)
+    print(f"✅ {len(cases)}개 필터 조합 결과 일치")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+고유값 스케치(HyperLogLog) 근사 정확도 / 속도 검사
+
+월 × 여러 주 조합마다 정확 계산(compute_kpis)과 셀 스케치 병합(KpiTable.approximate)의
+주문 / 고객 / 상품 수를 비교하고, 상대 오차를 이론 표준 오차와 함께 출력합니다.
+
+사용법 (프로젝트 루트에서):
+    python -m benchmarks.sketch_accuracy                 # 로컬 마트
+    python -m benchmarks.sketch_accuracy --scale 1       # 합성 Olist 데이터 (utils/synthetic_data.py)
+    python -m benchmarks.sketch_accuracy --states 3 5 10
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+DISTINCT_FIELDS = ['orders', 'customers', 'products']
+
+
+def _synthetic_mart(scale, seed):
+    """합성 원본 → 마트 (create_mart.py와 같은 병합 / 압축 단계)"""
+    from utils.synthetic_data import write_olist_dataset
+    from utils.ingest import ingest_sources
+    from utils.create_mart import build_mart_frame
+    from utils.compact import compact_mart
+
+    work_dir = tempfile.mkdtemp(prefix="sketch_bench_")
+    try:
+        write_olist_dataset(work_dir, scale=scale, seed=seed)
+        src, _ = ingest_sources(work_dir, os.path.join(work_dir, "geo_lookup.npz"))
+        return compact_mart(build_mart_frame(src))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="고유값 스케치 근사 정확도 검사")
+    parser.add_argument('--base-dir', default=PROJECT_ROOT, help="마트 파일 위치 (--scale이 없을 때)")
+    parser.add_argument('--scale', type=float, default=None, help="합성 데이터 규모 (지정 시 합성 마트 사용)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--states', type=int, nargs='+', default=[2, 5, 10], help="조합할 주 개수 (매출 상위 순)")
+    args = parser.parse_args()
+
+    from utils.db_manager import apply_filters, load_data_local
+    from utils.filter_index import FilterIndex
+    from utils.kpi import compute_kpis
+    from utils.kpi_table import ALL, build_kpi_table
+    from utils.sketch import DistinctSketches, standard_error
+
+    if args.scale is not None:
+        df = _synthetic_mart(args.scale, args.seed)
+    else:
+        df, _ = load_data_local(base_dir=args.base_dir)
+    print(f"📦 마트 {len(df):,}행")
+
+    filter_index = FilterIndex(df)
+    start = time.perf_counter()
+    kpi_table = build_kpi_table(df)
+    table_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    sketches = DistinctSketches(df)
+    sketch_seconds = time.perf_counter() - start
+    print(f"⏱️ KPI 표 {table_seconds:.2f}s / 스케치 {sketch_seconds:.2f}s ({sketches.memory_mb:.1f}MB)")
+
+    ranked = (df.groupby('customer_state', observed=True)['payment_value'].sum()
+              .sort_values(ascending=False).index.astype(str).tolist())
+    cases = [(month, ranked[:n]) for month in [ALL] + kpi_table.months for n in args.states if n <= len(ranked)]
+
+    rows = []
+    for month, states in cases:
+        start = time.perf_counter()
+        exact = compute_kpis(apply_filters(df, month, states, filter_index))
+        exact_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        approx = kpi_table.approximate(month, states, sketches)
+        approx_seconds = time.perf_counter() - start
+        if exact.empty:
+            continue
+        row = {'month': month, 'states': len(states), 'exact_ms': exact_seconds * 1000,
+               'approx_ms': approx_seconds * 1000}
+        for field in DISTINCT_FIELDS:
+            truth = getattr(exact, field)
+            row[f'{field}_exact'] = truth
+            row[f'{field}_error'] = abs(getattr(approx, field) - truth) / truth if truth else 0.0
+        rows.append(row)
+
+    result = pd.DataFrame(rows)
+    bound = standard_error()
+    print(f"📐 이론 표준 오차 {bound:.2%} (±2σ {2 * bound:.2%})")
+    for field in DISTINCT_FIELDS:
+        errors = result[f'{field}_error']
+        within = np.mean(errors <= 2 * bound)
+        print(f"   {field:<10} 평균 {errors.mean():.2%} / 최대 {errors.max():.2%} / ±2σ 이내 {within:.0%}")
+    print(f"⏱️ 조합 {len(result)}개 - 정확 계산 평균 {result['exact_ms'].mean():.2f}ms, "
+          f"스케치 병합 평균 {result['approx_ms'].mean():.2f}ms")
+    worst = result.assign(worst=result[[f'{f}_error' for f in DISTINCT_FIELDS]].max(axis=1)).nlargest(5, 'worst')
+    print(worst[['month', 'states'] + [f'{f}_exact' for f in DISTINCT_FIELDS] + ['worst']].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
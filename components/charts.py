@@ -2,21 +2,23 @@ import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 
-def create_main_performance_map(filtered_df):
-    """주별 매출 성과 (크기 + 색상) - Mapbox"""
-    # 주별 성과 데이터 집계
-    state_performance = filtered_df.groupby(['customer_state']).agg({
-        'payment_value': ['sum', 'mean'],
-        'order_id': 'nunique',
-        'customer_unique_id': 'nunique',
-        'review_score': 'mean',
-        'customer_lat': 'mean',  # 대표 위치
-        'customer_lng': 'mean'
-    }).round(2)
-    
-    # 컬럼명 정리
-    state_performance.columns = ['total_sales', 'avg_order_value', 'total_orders', 'total_customers', 'avg_rating', 'lat', 'lng']
-    state_performance = state_performance.reset_index()
+from utils.cube import rollup_cube
+from utils.query_backend import summarize_states
+from utils.timeseries import GRANULARITY_LABELS
+
+def _is_empty(*frames):
+    """주어진 것(None이 아닌 첫 번째) 기준 빈 데이터 여부 - 집계 백엔드 사용 시 행 데이터는 None"""
+    for frame in frames:
+        if frame is not None:
+            return frame.empty
+    return True
+
+def create_main_performance_map(filtered_df, state_summary=None):
+    """주별 매출 성과 (크기 + 색상) - Mapbox (state_summary: 집계 백엔드가 계산한 주별 집계)"""
+    # 주별 성과 데이터 집계 (매출 합계/평균, 주문/고객 수, 평점, 대표 위치)
+    if state_summary is None:
+        state_summary = summarize_states(filtered_df)
+    state_performance = state_summary.round(2).reset_index()
     
     # 성과 점수 계산 (매출 + 평점 + 주문수를 종합)
     if not state_performance.empty:
@@ -64,19 +66,33 @@ def create_main_performance_map(filtered_df):
     
     return fig
 
-def create_top_states_trend(df):
-    """월별 상위 지역 트렌드"""
-    if df.empty:
+def create_top_states_trend(df, cube=None, trend=None, granularity='month'):
+    """
+    상위 지역 매출 트렌드 (cube가 주어지면 집계 큐브에서 계산)
+    - trend: 일 / 주 단위로 그릴 때 미리 묶어 다운샘플링한 (period, customer_state, payment_value) 프레임
+    """
+    if trend is not None:
+        return _create_top_states_period_trend(trend, granularity)
+    if _is_empty(cube, df):
         return px.line(title='데이터 없음')
 
     # 전체 데이터에서 상위 5개 주의 월별 트렌드
-    top_states_series = df.groupby('customer_state')['payment_value'].sum().nlargest(5)
+    if cube is not None:
+        top_states_series = rollup_cube(cube, 'customer_state')['sales_sum'].nlargest(5)
+    else:
+        top_states_series = df.groupby('customer_state', observed=True)['payment_value'].sum().nlargest(5)
     if top_states_series.empty:
         return px.line(title='데이터 부족')
         
     top_states = top_states_series.index
     
-    trend_data = df[df['customer_state'].isin(top_states)].groupby(['y_mth', 'customer_state'])['payment_value'].sum().reset_index()
+    if cube is not None:
+        trend_data = (
+            rollup_cube(cube[cube['customer_state'].isin(top_states)], ['y_mth', 'customer_state'])['sales_sum']
+            .rename('payment_value').reset_index()
+        )
+    else:
+        trend_data = df[df['customer_state'].isin(top_states)].groupby(['y_mth', 'customer_state'], observed=True)['payment_value'].sum().reset_index()
     
     fig = px.line(
         trend_data,
@@ -105,17 +121,47 @@ def create_top_states_trend(df):
     
     return fig
 
-def create_satisfaction_vs_sales(df):
-    """지역별 고객 만족도 vs 매출 산점도"""
-    if df.empty:
+def _create_top_states_period_trend(trend, granularity):
+    """일 / 주 단위 상위 지역 트렌드 (주마다 LTTB로 줄인 점만 그림)"""
+    if trend.empty:
+        return px.line(title='데이터 없음')
+    label = GRANULARITY_LABELS.get(granularity, granularity)
+    fig = px.line(
+        trend,
+        x='period',
+        y='payment_value',
+        color='customer_state',
+        title=f'📈 상위 5개 주 {label}별 매출 트렌드 (전체 기간)',
+        render_mode='webgl' if granularity == 'day' else 'auto'
+    )
+    fig.update_layout(
+        height=300,
+        xaxis_title=label,
+        yaxis_title='매출 (BRL)',
+        legend_title='주',
+        yaxis=dict(tickformat='~s'),
+        legend=dict(orientation="v", yanchor="top", y=1, xanchor="left", x=1.02)
+    )
+    return fig
+
+def create_satisfaction_vs_sales(df, state_summary=None):
+    """지역별 고객 만족도 vs 매출 산점도 (state_summary: 전체 기간 주별 집계)"""
+    if _is_empty(state_summary, df):
         return px.scatter(title='데이터 없음')
 
     # 전체 데이터로 전반적인 패턴 분석
-    state_data = df.groupby('customer_state').agg({
-        'payment_value': 'sum',
-        'review_score': 'mean',
-        'order_id': 'nunique'
-    }).reset_index()
+    if state_summary is not None:
+        state_data = pd.DataFrame({
+            'payment_value': state_summary['total_sales'],
+            'review_score': state_summary['avg_rating'],
+            'order_id': state_summary['total_orders']
+        }).reset_index()
+    else:
+        state_data = df.groupby('customer_state', observed=True).agg({
+            'payment_value': 'sum',
+            'review_score': 'mean',
+            'order_id': 'nunique'
+        }).reset_index()
     
     fig = px.scatter(
         state_data,
@@ -135,8 +181,8 @@ def create_satisfaction_vs_sales(df):
     
     return fig
 
-def create_monthly_sales_chart(monthly_data, selected_month):
-    """월별 매출 라인 차트"""
+def create_monthly_sales_base(monthly_data):
+    """월별 매출 라인 차트 (선택 월 표시 없음 - 데이터 버전당 한 번 만들어 캐시)"""
     fig = px.line(
         monthly_data,
         x='y_mth',
@@ -151,38 +197,82 @@ def create_monthly_sales_chart(monthly_data, selected_month):
         yaxis_title=None,
         yaxis=dict(tickformat='~s')
     )
+    return fig
 
-    # 선택된 월 하이라이트 (add_shape 사용)
-    if selected_month != 'All' and selected_month in monthly_data['y_mth'].values:
-        fig.add_shape(
+def selected_month_overlay(monthly_data, selected_month):
+    """선택 월 하이라이트 (빨간 점선 + 화살표) layout 항목 {'shapes': [...], 'annotations': [...]}, 없으면 빈 dict"""
+    if selected_month == 'All' or selected_month not in monthly_data['y_mth'].values:
+        return {}
+    val = monthly_data.loc[monthly_data['y_mth'] == selected_month, 'payment_value'].iloc[0]
+    return {
+        'shapes': [dict(
             type="line",
             x0=selected_month, x1=selected_month,
             y0=0, y1=1,
             yref="paper",  # y축을 전체 차트 높이 기준으로
             line=dict(color="red", width=2, dash="dash")
-        )
-        
+        )],
         # 텍스트 주석 추가
-        val = monthly_data[monthly_data['y_mth'] == selected_month]['payment_value'].iloc[0] if not monthly_data[monthly_data['y_mth'] == selected_month].empty else 0
-        fig.add_annotation(
+        'annotations': [dict(
             x=selected_month,
             y=val,
             showarrow=True,
             arrowhead=2,
             arrowcolor="red",
-        )
+        )],
+    }
+
+def create_sales_trend_base(trend, granularity):
+    """일 / 주 단위 매출 라인 차트 (미리 묶어 다운샘플링한 (period, payment_value), 데이터 버전당 한 번)"""
+    if trend.empty:
+        return px.line(title='데이터 없음')
+    fig = px.line(
+        trend,
+        x='period',
+        y='payment_value',
+        title=f'{GRANULARITY_LABELS.get(granularity, granularity)}별 결제 금액',
+        markers=granularity != 'day',
+        render_mode='webgl' if granularity == 'day' else 'auto'
+    )
+    fig.update_layout(
+        xaxis_title=None,
+        yaxis_title=None,
+        yaxis=dict(tickformat='~s')
+    )
     return fig
 
-def create_top5_categories_chart(filtered_df, selected_month):
-    """상위 5개 카테고리 바 차트"""
-    if filtered_df.empty:
+def selected_period_overlay(selected_month):
+    """날짜 축 차트의 선택 월 구간 음영 layout 항목 {'shapes': [...]}, 전체 선택이면 빈 dict"""
+    if selected_month == 'All':
+        return {}
+    start = pd.Period(selected_month, freq='M')
+    return {
+        'shapes': [dict(
+            type="rect",
+            x0=start.start_time.strftime('%Y-%m-%d'), x1=(start + 1).start_time.strftime('%Y-%m-%d'),
+            y0=0, y1=1,
+            yref="paper",
+            fillcolor="red", opacity=0.1,
+            line=dict(width=0)
+        )],
+    }
+
+def create_monthly_sales_chart(monthly_data, selected_month):
+    """월별 매출 라인 차트 (선택 월 하이라이트 포함)"""
+    fig = create_monthly_sales_base(monthly_data)
+    fig.update_layout(**selected_month_overlay(monthly_data, selected_month))
+    return fig
+
+def create_top5_categories_chart(filtered_df, selected_month, cube=None):
+    """상위 5개 카테고리 바 차트 (cube: 필터가 적용된 집계 큐브)"""
+    if _is_empty(cube, filtered_df):
         return px.bar(title='데이터 없음')
 
-    top5_categories = (
-        filtered_df.groupby('product_category_name')['payment_value']
-        .sum()
-        .nlargest(5)  # 상위 5개만
-    ).reset_index()
+    if cube is not None:
+        category_sales = rollup_cube(cube, 'product_category_name')['sales_sum']
+    else:
+        category_sales = filtered_df.groupby('product_category_name', observed=True)['payment_value'].sum()
+    top5_categories = category_sales.nlargest(5).reset_index()  # 상위 5개만
 
     # 결과 조정
     top5_categories.columns = ['product_category_name', 'sum_amount']
@@ -203,18 +293,35 @@ def create_top5_categories_chart(filtered_df, selected_month):
     )
     return fig
 
-def get_top_bottom_ranking(filtered_df):
-    """상위/하위 성과 지역 랭킹 데이터 반환"""
-    if filtered_df.empty:
+def get_top_bottom_ranking(filtered_df, cube=None, state_summary=None):
+    """
+    상위/하위 성과 지역 랭킹 데이터 반환
+    - cube: 필터가 적용된 집계 큐브 / state_summary: 집계 백엔드가 계산한 주별 집계 (고객 수)
+    """
+    if _is_empty(cube, filtered_df):
         return pd.DataFrame(), pd.DataFrame()
 
     # 주별 데이터 준비
-    state_data = filtered_df.groupby('customer_state').agg({
-        'payment_value': 'sum',
-        'order_id': 'nunique',
-        'customer_unique_id': 'nunique',
-        'review_score': 'mean'
-    }).reset_index()
+    if cube is not None:
+        # 매출/주문수/평점은 큐브에서, 고객 수(비가산)만 행 데이터에서 계산
+        rolled = rollup_cube(cube, 'customer_state')
+        if state_summary is not None:
+            customers = state_summary['total_customers']
+        else:
+            customers = filtered_df.groupby('customer_state', observed=True)['customer_unique_id'].nunique()
+        state_data = pd.DataFrame({
+            'payment_value': rolled['sales_sum'],
+            'order_id': rolled['order_count'],
+            'customer_unique_id': customers,
+            'review_score': rolled['avg_rating']
+        }).rename_axis('customer_state').reset_index()
+    else:
+        state_data = filtered_df.groupby('customer_state', observed=True).agg({
+            'payment_value': 'sum',
+            'order_id': 'nunique',
+            'customer_unique_id': 'nunique',
+            'review_score': 'mean'
+        }).reset_index()
     
     state_data.columns = ['state', 'total_sales', 'total_orders', 'total_customers', 'avg_rating']
     
@@ -224,20 +331,98 @@ def get_top_bottom_ranking(filtered_df):
     
     return top_states, bottom_states
 
-def get_performance_summary(filtered_df):
-    """지역별 성과 메트릭 테이블 데이터 반환"""
-    if filtered_df.empty:
+def get_performance_summary(filtered_df, cube=None):
+    """지역별 성과 메트릭 테이블 데이터 반환 (cube: 필터가 적용된 집계 큐브)"""
+    if _is_empty(cube, filtered_df):
         return pd.DataFrame()
 
     # 주별 상세 성과 데이터
-    state_details = filtered_df.groupby('customer_state').agg({
-        'payment_value': 'sum',
-        'review_score': 'mean',
-        'order_id': 'nunique'
-    }).round(2)
+    if cube is not None:
+        state_details = rollup_cube(cube, 'customer_state')[['sales_sum', 'avg_rating', 'order_count']].round(2)
+    else:
+        state_details = filtered_df.groupby('customer_state', observed=True).agg({
+            'payment_value': 'sum',
+            'review_score': 'mean',
+            'order_id': 'nunique'
+        }).round(2)
     
     state_details.columns = ['매출', '평점', '주문수']
     state_details = state_details.reset_index()
     state_details = state_details.sort_values('매출', ascending=False)
     
     return state_details
+
+def create_cohort_retention_heatmap(retention):
+    """코호트 리텐션 히트맵 (행: 첫 주문 월, 열: 경과 개월, 값: 재구매 고객 비율 %)"""
+    if retention is None or retention.empty:
+        return px.imshow([[0]], title='데이터 없음')
+
+    # 경과 0개월은 항상 100%이므로 제외하고 색 범위를 재구매 구간에 맞춤
+    values = retention.drop(columns=0, errors='ignore')
+    fig = px.imshow(
+        values,
+        x=[f"+{m}" for m in values.columns],
+        y=values.index.astype(str),
+        color_continuous_scale='Blues',
+        aspect='auto',
+        title='코호트 리텐션 (첫 주문 후 N개월 재구매 비율, %)'
+    )
+    fig.update_traces(hovertemplate='코호트 %{y}<br>경과 %{x}개월<br>%{z:.1f}%<extra></extra>')
+    fig.update_layout(xaxis_title=None, yaxis_title=None, height=420)
+    return fig
+
+def create_cohort_ltv_chart(ltv, max_cohorts=6):
+    """코호트별 누적 LTV 라인 차트 (최근 max_cohorts개 코호트)"""
+    if ltv is None or ltv.empty:
+        return px.line(title='데이터 없음')
+
+    recent = ltv.tail(max_cohorts)
+    long_df = recent.reset_index().melt(id_vars='cohort', var_name='months', value_name='ltv').dropna()
+    fig = px.line(
+        long_df,
+        x='months',
+        y='ltv',
+        color='cohort',
+        markers=True,
+        title='코호트별 누적 LTV (고객당 BRL)'
+    )
+    fig.update_layout(xaxis_title='첫 주문 후 경과 개월', yaxis_title=None, height=420)
+    return fig
+
+def create_customer_density_map(cells, zoom):
+    """
+    고객 밀도 지도 - 서버에서 격자로 묶은 점유 셀만 표시 (cells: backend.density_cells 결과)
+    - 점 크기는 주문 수, 색은 매출 합계, 셀 크기(해상도)는 확대 수준에 따라 결정
+    """
+    if cells is None or cells.empty:
+        return px.scatter_mapbox(pd.DataFrame({'lat': [], 'lng': []}), lat='lat', lon='lng', title='데이터 없음')
+
+    cell_size = cells['cell_size'].iloc[0]
+    fig = px.scatter_mapbox(
+        cells,
+        lat='lat',
+        lon='lng',
+        size='order_count',
+        color='sales_sum',
+        hover_data={
+            'sales_sum': ':,.0f',
+            'order_count': ':,',
+            'avg_rating': ':.2f',
+            'lat': False,
+            'lng': False,
+        },
+        labels={'sales_sum': '매출 (BRL)', 'order_count': '주문수', 'avg_rating': '평균 평점'},
+        color_continuous_scale='Viridis',
+        size_max=25,
+        zoom=zoom,
+        center=dict(lat=-14.2350, lon=-51.9253),
+        title=f'🗺️ 고객 밀도 (격자 {cell_size:g}° · 셀 {len(cells):,}개, 필터 적용)'
+    )
+
+    fig.update_layout(
+        mapbox_style='open-street-map',
+        height=600,
+        coloraxis_colorbar=dict(title="매출", tickformat='~s')
+    )
+
+    return fig
@@ -0,0 +1,21 @@
+import json
+
+
+def cached_figure(backend, name, build, selected_month='All', selected_state=None):
+    """
+    Plotly 차트 사양 캐시 (프로세스 전역 결과 캐시, 키: 데이터 버전 + 차트 이름 + 필터)
+    - 필터와 무관한 차트는 기본값('All', 전체 지역)으로 호출 → 데이터 버전당 한 번만 집계 / 생성
+    - 필터에 따라 바뀌는 차트는 선택한 월 / 지역을 넘겨 필터 조합별로 보관
+    - JSON 문자열로 보관하고 호출마다 새 dict로 풀어 돌려주므로 오버레이를 더해도 캐시는 바뀌지 않음
+      (st.plotly_chart는 dict 사양을 그대로 받음)
+    """
+    spec = backend.cached('figure', selected_month, selected_state, lambda: build().to_json(), name)
+    return json.loads(spec)
+
+
+def with_overlay(spec, overlay):
+    """캐시된 차트 사양에 선택별 layout 항목(shapes / annotations 등 목록)을 덧붙임"""
+    layout = spec.setdefault('layout', {})
+    for key, items in overlay.items():
+        layout[key] = list(layout.get(key, [])) + list(items)
+    return spec
@@ -29,27 +29,8 @@ def register_fonts():
             return False
     return False
 
-def create_pdf_report(df, filtered_df, selected_month, selected_state, current_metrics, prev_metrics, can_compare):
-    """
-    대시보드 데이터를 PDF 리포트로 생성하는 함수
-    """
-    # 폰트 등록 시도
-    font_registered = register_fonts()
-    font_name = 'NanumGothic' if font_registered else 'Helvetica' # Fallback
-
-    # PDF 버퍼 생성
-    buffer = io.BytesIO()
-    
-    # PDF 문서 생성
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=A4,
-        rightMargin=72,
-        leftMargin=72,
-        topMargin=72,
-        bottomMargin=18
-    )
-    
+def _report_styles(font_name):
+    """리포트 문단 스타일 (제목 / 소제목 / 본문)"""
     # 스타일 설정
     styles = getSampleStyleSheet()
     
@@ -73,8 +54,6 @@ def create_pdf_report(df, filtered_df, selected_month, selected_state, current_m
         spaceBefore=20,
         textColor=colors.darkblue
     )
-    
-    title_text = "Brazilian E-Commerce Dashboard Report" if not font_registered else "Brazilian E-Commerce 대시보드 리포트"
 
     normal_style = ParagraphStyle(
         'CustomNormal',
@@ -83,19 +62,23 @@ def create_pdf_report(df, filtered_df, selected_month, selected_state, current_m
         fontSize=10,
         spaceAfter=6
     )
-    
+    return title_style, heading_style, normal_style
+
+def create_report_body(selected_month, selected_state, current_metrics, prev_metrics, can_compare, data_version=None):
+    """
+    리포트 본문 (분석 조건 + 지표 표)
+    """
+    font_name = 'NanumGothic' if register_fonts() else 'Helvetica' # Fallback
+    _, heading_style, normal_style = _report_styles(font_name)
+
     # PDF 내용 구성
     story = []
     
-    # 1. 제목 및 기본 정보
-    story.append(Paragraph(title_text, title_style))
-    story.append(Spacer(1, 12))
-    
-    # 리포트 생성 정보
+    # 1. 분석 조건
     report_info = f"""
-    <b>리포트 생성일:</b> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}<br/>
     <b>분석 기간:</b> {selected_month if selected_month != 'All' else '전체 기간'}<br/>
     <b>분석 지역:</b> {', '.join(selected_state) if selected_state else '전체 지역'}<br/>
+    <b>데이터 버전:</b> {data_version or '-'}<br/>
     """
     story.append(Paragraph(report_info, normal_style))
     story.append(Spacer(1, 20))
@@ -161,9 +144,59 @@ def create_pdf_report(df, filtered_df, selected_month, selected_state, current_m
     
     story.append(operational_table)
     story.append(Spacer(1, 20))
+    return story
+
+# 생성 시각 자리 (캐시된 PDF에 같은 길이의 시각을 바이트 치환으로 찍음 → xref 오프셋이 바뀌지 않음)
+GENERATED_AT_FORMAT = '%Y-%m-%d %H:%M:%S'
+GENERATED_AT_PLACEHOLDER = "YYYY-MM-DD hh:mm:ss"
+
+def _draw_generated_at(font_name):
+    """첫 페이지 머리글 (리포트 생성일) - 시각은 Helvetica로 그려 내용 스트림에 ASCII 그대로 남김"""
+    def draw(canvas, doc):
+        canvas.saveState()
+        y = doc.pagesize[1] - 40
+        label = "리포트 생성일: "
+        canvas.setFont(font_name, 9)
+        x = doc.pagesize[0] - doc.rightMargin - canvas.stringWidth(GENERATED_AT_PLACEHOLDER, 'Helvetica', 9)
+        canvas.drawRightString(x, y, label)
+        canvas.setFont('Helvetica', 9)
+        canvas.drawString(x, y, GENERATED_AT_PLACEHOLDER)
+        canvas.restoreState()
+    return draw
+
+def render_pdf_report(selected_month, selected_state, current_metrics, prev_metrics, can_compare, data_version=None):
+    """
+    리포트 PDF 렌더링 (생성 시각 자리는 비워 둠) - 데이터 버전 + 필터 단위로 캐시 가능
+    - 첫 페이지 내용 스트림은 압축하지 않음 (stamp_generated_at이 시각 자리를 찾을 수 있도록)
+    """
+    # 폰트 등록 시도
+    font_registered = register_fonts()
+    font_name = 'NanumGothic' if font_registered else 'Helvetica' # Fallback
+    title_style, _, _ = _report_styles(font_name)
+
+    # PDF 버퍼 생성
+    buffer = io.BytesIO()
+    
+    # PDF 문서 생성
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        rightMargin=72,
+        leftMargin=72,
+        topMargin=72,
+        bottomMargin=18,
+        pageCompression=0
+    )
+    
+    title_text = "Brazilian E-Commerce Dashboard Report" if not font_registered else "Brazilian E-Commerce 대시보드 리포트"
+
+    # 제목 + 본문 (생성 시각은 첫 페이지 머리글 콜백에서 자리만 그림)
+    story = [Paragraph(title_text, title_style), Spacer(1, 12)]
+    story.extend(create_report_body(selected_month, selected_state, current_metrics, prev_metrics, can_compare,
+                                    data_version=data_version))
 
     # PDF 생성
-    doc.build(story)
+    doc.build(story, onFirstPage=_draw_generated_at(font_name))
     
     # 버퍼에서 PDF 데이터 가져오기
     pdf_data = buffer.getvalue()
@@ -171,19 +204,55 @@ def create_pdf_report(df, filtered_df, selected_month, selected_state, current_m
     
     return pdf_data
 
-def generate_download_button(df, filtered_df, selected_month, selected_state, current_metrics, prev_metrics, can_compare):
+def stamp_generated_at(pdf_data, generated_at):
+    """렌더링된 PDF의 생성 시각 자리에 시각을 찍음 (같은 길이로 치환하므로 다시 렌더링하지 않음)"""
+    stamp = generated_at.strftime(GENERATED_AT_FORMAT).encode('ascii')
+    return pdf_data.replace(GENERATED_AT_PLACEHOLDER.encode('ascii'), stamp, 1)
+
+def create_pdf_report(df, filtered_df, selected_month, selected_state, current_metrics, prev_metrics, can_compare,
+                      data_version=None, generated_at=None):
+    """
+    대시보드 데이터를 PDF 리포트로 생성하는 함수
+    - generated_at: 리포트 생성일로 찍을 시각 (기본값: 지금)
+    """
+    pdf_data = render_pdf_report(selected_month, selected_state, current_metrics, prev_metrics, can_compare,
+                                 data_version=data_version)
+    return stamp_generated_at(pdf_data, generated_at or datetime.now())
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _cached_pdf_report(data_version, selected_month, selected_state, _current_metrics, _prev_metrics, can_compare):
+    """
+    데이터 버전 + 필터 기준 렌더링된 PDF 캐시 (생성 시각 자리는 비어 있음)
+    - 지표(_current_metrics / _prev_metrics)는 일부러 키에서 제외: 같은 버전 + 필터면 지표도 같고,
+      dict 해시 비용 없이 조회하기 위함 (지표 계산 방식이 바뀌면 데이터 버전과 함께 캐시도 교체됨)
+    - 데이터가 교체되어 버전이 바뀌면 새로 생성
+    """
+    return render_pdf_report(selected_month, selected_state, _current_metrics, _prev_metrics, can_compare,
+                             data_version=data_version)
+
+def generate_download_button(df, filtered_df, selected_month, selected_state, current_metrics, prev_metrics, can_compare,
+                             data_version=None):
     """
     Streamlit에서 사용할 PDF 다운로드 버튼 생성
+    - data_version이 있으면 같은 버전 / 필터의 PDF를 다시 렌더링하지 않고, 생성 시각만 새로 찍음
     """
     try:
-        # PDF 생성
-        pdf_data = create_pdf_report(
-            df, filtered_df, selected_month, selected_state, 
-            current_metrics, prev_metrics, can_compare
-        )
+        # PDF 생성 (렌더링 결과는 캐시, 생성 시각은 매번)
+        generated_at = datetime.now()
+        if data_version is not None:
+            pdf_data = stamp_generated_at(_cached_pdf_report(
+                data_version, selected_month, sorted(selected_state),
+                current_metrics, prev_metrics, can_compare
+            ), generated_at)
+        else:
+            pdf_data = create_pdf_report(
+                df, filtered_df, selected_month, selected_state, 
+                current_metrics, prev_metrics, can_compare,
+                generated_at=generated_at
+            )
         
         # 파일명 생성
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M')
+        timestamp = generated_at.strftime('%Y%m%d_%H%M')
         month_str = selected_month if selected_month != 'All' else 'all'
         state_str = '_'.join(selected_state[:2]) if selected_state else 'all'
         filename = f"dashboard_report_{month_str}_{state_str}_{timestamp}.pdf"
@@ -1,14 +1,13 @@
 import streamlit as st
 import pandas as pd
+from datetime import datetime
 
 # 모듈 임포트
-from utils.db_manager import load_data, apply_filters
+from utils.db_manager import load_query_backend, load_data_status
+from utils.cube import filter_cube, rollup_cube
 from utils.metrics import (
-    calculate_metrics_with_comparison, 
     calculate_delta, 
-    format_number,
-    get_comparison_metrics,
-    get_key_metrics_summary # 추가
+    format_number
 )
 from components.charts import (
     create_main_performance_map, 
@@ -16,10 +15,20 @@ from components.charts import (
     get_performance_summary, 
     create_top_states_trend, 
     create_satisfaction_vs_sales,
-    create_monthly_sales_chart,
-    create_top5_categories_chart
+    create_monthly_sales_base,
+    create_sales_trend_base,
+    selected_period_overlay,
+    selected_month_overlay,
+    create_top5_categories_chart,
+    create_cohort_retention_heatmap,
+    create_cohort_ltv_chart,
+    create_customer_density_map
 )
 from components.pdf_report import generate_download_button
+from components.figure_cache import cached_figure, with_overlay
+from utils.sketch import standard_error
+from utils.result_cache import RESULT_CACHE
+from utils.timeseries import GRANULARITY_LABELS
 
 # -----------------------------------------------------------------------------
 # 페이지 설정
@@ -74,10 +83,13 @@ def main():
     st.markdown("---")
 
     # 2. 데이터 로드
-    # 로딩 메시지 없이 조용히 로드 (사용자 경험 개선)
-    df, df_geolocation = load_data()
+    # 로드는 백그라운드 갱신 스레드가 하고, 프로세스의 첫 로드가 끝나기 전에만 로딩 표시
+    # 집계 백엔드: pandas(기본, 공유 데이터셋 + 필터 인덱스) 또는 duckdb(마트 파일 SQL 조회)
+    backend = load_query_backend()
+    df = backend.df
+    cube = backend.cube  # 월 × 주 × 카테고리 집계 큐브 (가산 지표는 여기서 계산)
 
-    if df.empty:
+    if backend.row_count() == 0:
         st.error("데이터를 불러오는데 실패했습니다. DB 연결 설정을 확인해주세요.")
         return
 
@@ -86,27 +98,40 @@ def main():
         st.title("필터 옵션")
         
         # 연월 리스트 생성
-        if 'y_mth' in df.columns:
-            year_mth_list = ['All'] + sorted(df['y_mth'].unique())
-        else:
-            year_mth_list = ['All']
+        year_mth_list = ['All'] + backend.months()
             
         selected_month = st.selectbox("연월 선택", year_mth_list, index=0)
         
         # 지역 리스트
-        state_options = sorted(df_geolocation['geolocation_state'].unique().tolist())
+        state_options = backend.states()
         selected_state = st.multiselect("지역 선택", state_options)
+
+        # 시계열 차트 집계 단위 (일 / 주는 미리 묶은 시계열을 다운샘플링해서 그림)
+        granularity = st.radio("시계열 단위", list(GRANULARITY_LABELS), index=2, horizontal=True,
+                               format_func=GRANULARITY_LABELS.get)
         
         st.markdown("### 📄 리포트 다운로드")
         download_container = st.container()
 
+        # 데이터 버전 (백그라운드 갱신 상태)
+        data_status = load_data_status()
+        if data_status['version']:
+            refreshed_at = datetime.fromtimestamp(data_status['refreshed_at']).strftime('%Y-%m-%d %H:%M')
+            st.caption(f"데이터 버전: {data_status['version']}  \n"
+                       f"마지막 갱신: {refreshed_at} ({data_status['last_refresh_seconds']:.1f}초)")
+        if data_status['last_error']:
+            st.caption(f"⚠️ 최근 갱신 실패 (이전 버전 사용 중): {data_status['last_error']}")
+        # 필터 결과 캐시 (프로세스 전역, 세션 간 공유) - 이번 실행의 조회 전 기준
+        cache_stats = RESULT_CACHE.stats()
+        st.caption(f"결과 캐시: {cache_stats['entries']}건 / {cache_stats['bytes'] / 1024 ** 2:.1f}MB, "
+                   f"적중률 {cache_stats['hit_rate']:.0f}% (제거 {cache_stats['evictions']}건)")
+
     # 4. 필터링 적용
-    filtered_df = apply_filters(df, selected_month, selected_state)
+    filtered_df = backend.filtered(selected_month, selected_state)  # duckdb 백엔드는 None (행 데이터 없음)
+    filtered_cube = filter_cube(cube, selected_month, selected_state)
 
     # 5. 핵심 메트릭 계산
-    current_metrics, prev_metrics, can_compare = calculate_metrics_with_comparison(
-        filtered_df, selected_month, df, selected_state
-    )
+    current_metrics, prev_metrics, can_compare = backend.metrics_with_comparison(selected_month, selected_state)
 
     deltas = {}
     if can_compare:
@@ -139,6 +164,25 @@ def main():
     display_kpi(kpi_cols[4], "상품 수", f"{format_number(current_metrics['total_products'])}", 
                 f"{deltas.get('total_products'):.1f}%" if can_compare and deltas.get('total_products') else None)
 
+    # 전년 동월 / 최근 3·6개월 평균 대비 (월별 KPI 표 조회)
+    comparison_labels = {'yoy': '전년 동월 대비', 'rolling_3': '최근 3개월 평균 대비', 'rolling_6': '최근 6개월 평균 대비'}
+    comparisons = backend.period_comparisons(selected_month, selected_state) if selected_month != 'All' else {}
+    comparison_texts = []
+    for name, label in comparison_labels.items():
+        base = comparisons.get(name)
+        if not base:
+            continue
+        sales_delta = calculate_delta(current_metrics['total_amount'], base['total_amount'])
+        orders_delta = calculate_delta(current_metrics['total_orders'], base['total_orders'])
+        if sales_delta is None or orders_delta is None:
+            continue
+        comparison_texts.append(f"**{label}** 매출 {sales_delta:+.1f}% · 주문 {orders_delta:+.1f}%")
+    if comparison_texts:
+        st.caption("  |  ".join(comparison_texts))
+    # 여러 주 선택을 스케치 병합으로 근사한 경우 (DASHBOARD_DISTINCT_MODE=approx)
+    if backend.kpis(selected_month, selected_state).approximate:
+        st.caption(f"ℹ️ 주문 / 고객 / 상품 수는 근사값입니다 (대부분 ±{2 * standard_error() * 100:.1f}% 이내).")
+
     st.markdown("<br>", unsafe_allow_html=True)
 
     # -------------------------------------------------------------------------
@@ -148,14 +192,25 @@ def main():
 
     with col_trend:
         # st.subheader("월별 결제 금액") -> 차트 타이틀로 이동됨
-        if 'y_mth' in df.columns:
-            monthly_data = df.groupby('y_mth')['payment_value'].sum().reset_index()
-            fig_trend = create_monthly_sales_chart(monthly_data, selected_month)
+        if granularity != 'month':
+            sales_series = backend.sales_timeseries()
+            fig_trend = cached_figure(backend, f'sales_trend_{granularity}', lambda: (
+                create_sales_trend_base(sales_series.trend(granularity), granularity)
+            ))
+            fig_trend = with_overlay(fig_trend, selected_period_overlay(selected_month))
+            st.plotly_chart(fig_trend, use_container_width=True)
+        elif 'y_mth' in cube.columns:
+            monthly_data = backend.monthly_sales()  # 월별 KPI 표 (데이터 버전당 한 번 계산)
+            # 차트는 데이터 버전당 한 번 생성, 선택 월 표시만 매번 덧붙임
+            fig_trend = cached_figure(backend, 'monthly_sales', lambda: create_monthly_sales_base(monthly_data))
+            fig_trend = with_overlay(fig_trend, selected_month_overlay(monthly_data, selected_month))
             st.plotly_chart(fig_trend, use_container_width=True)
 
     with col_cat:
         # 타이틀은 plotly 차트 내부 혹은 바로 위에
-        fig_cat = create_top5_categories_chart(filtered_df, selected_month)
+        fig_cat = cached_figure(backend, 'top5_categories', lambda: (
+            create_top5_categories_chart(filtered_df, selected_month, cube=filtered_cube)
+        ), selected_month, selected_state)
         st.plotly_chart(fig_cat, use_container_width=True)
 
     st.markdown("<br>", unsafe_allow_html=True)
@@ -196,7 +251,7 @@ def main():
     st.subheader("🌎 지역별 성과 분석")
     
     # 4-1. 필터 적용 현황 (Comparison Metrics)
-    comp_metrics = get_comparison_metrics(df, filtered_df)
+    comp_metrics = backend.comparison_metrics(selected_month, selected_state)
     st.markdown("#### 📊 필터 적용 현황")
     
     f_col1, f_col2, f_col3, f_col4 = st.columns(4)
@@ -214,13 +269,24 @@ def main():
     col_map, col_map_sidebar = st.columns([2, 1])
     
     with col_map:
-        fig_map = create_main_performance_map(filtered_df)
+        state_summary = backend.state_summary(selected_month, selected_state)
+        map_mode = st.radio("지도 보기", ["주별 성과", "고객 밀도"], horizontal=True)
+        if map_mode == "고객 밀도":
+            # 확대 수준에 맞는 격자 해상도의 점유 셀만 전송 (행 수와 무관하게 셀 수로 제한)
+            zoom = st.select_slider("확대 수준", options=[3, 4, 5, 6, 7, 8, 9], value=4)
+            fig_map = cached_figure(backend, f'density_map_z{zoom}', lambda: (
+                create_customer_density_map(backend.density_cells(selected_month, selected_state, zoom), zoom)
+            ), selected_month, selected_state)
+        else:
+            fig_map = cached_figure(backend, 'performance_map', lambda: (
+                create_main_performance_map(filtered_df, state_summary=state_summary)
+            ), selected_month, selected_state)
         st.plotly_chart(fig_map, use_container_width=True)
 
     with col_map_sidebar:
         st.markdown("#### 📊 핵심 지표 (필터 적용)")
         # get_key_metrics_summary 사용
-        region_metrics = get_key_metrics_summary(filtered_df)
+        region_metrics = backend.key_metrics_summary(selected_month, selected_state)
         
         rm_col1, rm_col2 = st.columns(2)
         rm_col1.metric("총 매출", f"{region_metrics['total_sales']:,.0f}")
@@ -244,7 +310,9 @@ def main():
         """)
 
     # 4-4. 상위/하위 랭킹 (HTML Card Style)
-    top_states, bottom_states = get_top_bottom_ranking(filtered_df)
+    top_states, bottom_states = backend.cached('ranking', selected_month, selected_state, lambda: (
+        get_top_bottom_ranking(filtered_df, cube=filtered_cube, state_summary=state_summary)
+    ))
     
     rank_col1, rank_col2 = st.columns(2)
     
@@ -277,16 +345,26 @@ def main():
     # 4-5. 하단 차트
     chart_row2_col1, chart_row2_col2 = st.columns(2)
     with chart_row2_col1:
-        fig_trend2 = create_top_states_trend(df)
+        # 전체 기간 차트 (필터 무관) - 데이터 버전당 한 번
+        if granularity != 'month':
+            sales_series = backend.sales_timeseries()
+            fig_trend2 = cached_figure(backend, f'top_states_trend_{granularity}', lambda: create_top_states_trend(
+                df, cube=cube, trend=sales_series.trend(granularity, sales_series.top_states(5)), granularity=granularity
+            ))
+        else:
+            fig_trend2 = cached_figure(backend, 'top_states_trend', lambda: create_top_states_trend(df, cube=cube))
         st.plotly_chart(fig_trend2, use_container_width=True)
     with chart_row2_col2:
-        fig_scatter = create_satisfaction_vs_sales(df)
+        fig_scatter = cached_figure(backend, 'satisfaction_vs_sales', lambda: (
+            create_satisfaction_vs_sales(df, state_summary=backend.state_summary('All', []))
+        ))
         st.plotly_chart(fig_scatter, use_container_width=True)
 
     # 4-6. 상세 데이터 테이블
     st.markdown("#### 📋 전체 지역별 상세 성과 (필터 적용)")
     with st.expander("데이터 보기", expanded=True):
-        perf_summary = get_performance_summary(filtered_df)
+        perf_summary = backend.cached('performance_summary', selected_month, selected_state,
+                                      lambda: get_performance_summary(filtered_df, cube=filtered_cube))
         # 3단 분리 표시
         if not perf_summary.empty:
             t_col1, t_col2, t_col3 = st.columns(3)
@@ -302,8 +380,11 @@ def main():
     st.markdown("#### 💡 핵심 인사이트 & 추천사항")
     
     # 인사이트 계산 로직 간단 구현 (metrics.py로 뺄 수도 있지만, UI 종속적이라 여기에 둠)
-    state_gb = filtered_df.groupby('customer_state').agg({
-        'payment_value': 'sum', 'review_score': 'mean', 'order_id': 'nunique'
+    state_rollup = rollup_cube(filtered_cube, 'customer_state')
+    state_gb = pd.DataFrame({
+        'payment_value': state_rollup['sales_sum'],
+        'review_score': state_rollup['avg_rating'],
+        'order_id': state_rollup['order_count']
     })
     
     if not state_gb.empty:
@@ -350,13 +431,42 @@ def main():
             신규 고객 유치 및 브랜드 인지도 제고
             """)
 
+    st.markdown("---")
+
+    # -------------------------------------------------------------------------
+    # SEC 5: 고객 코호트 & LTV (고객 차원 - 데이터 버전당 한 번 계산)
+    # 지역 필터는 고객 거주 주(첫 주문 기준)로 적용, 코호트는 전체 기간 기준
+    # -------------------------------------------------------------------------
+    st.subheader("👥 고객 코호트 & 생애 가치 (LTV)")
+    cohorts = backend.customer_cohorts()
+    customer_summary = backend.cached('customer_summary', 'All', selected_state,
+                                      lambda: cohorts.summary(selected_state))
+
+    c_col1, c_col2, c_col3, c_col4 = st.columns(4)
+    c_col1.metric("고객 생애 가치 (LTV)", f"{customer_summary['avg_ltv']:,.0f} BRL")
+    c_col2.metric("고객당 평균 주문 수", f"{customer_summary['avg_orders']:.2f}")
+    c_col3.metric("재구매 고객 비율 (전체 기간)", f"{customer_summary['repeat_rate']:.1f}%")
+    c_col4.metric("고객 수 (전체 기간)", f"{format_number(customer_summary['customers'])}")
+
+    cohort_col1, cohort_col2 = st.columns(2)
+    with cohort_col1:
+        fig_retention = cached_figure(backend, 'cohort_retention', lambda: (
+            create_cohort_retention_heatmap(cohorts.retention(selected_state))
+        ), 'All', selected_state)
+        st.plotly_chart(fig_retention, use_container_width=True)
+    with cohort_col2:
+        fig_ltv = cached_figure(backend, 'cohort_ltv', lambda: create_cohort_ltv_chart(cohorts.ltv(selected_state)),
+                                'All', selected_state)
+        st.plotly_chart(fig_ltv, use_container_width=True)
+
     # 8. 리포트 다운로드 사이드바 버튼 활성화
     with download_container:
         if st.button("📊 PDF 리포트 생성", use_container_width=True):
             with st.spinner('리포트 생성 중...'):
                 pdf_data, filename = generate_download_button(
                     df, filtered_df, selected_month, selected_state,
-                    current_metrics, prev_metrics, can_compare
+                    current_metrics, prev_metrics, can_compare,
+                    data_version=backend.version
                 )
                 if pdf_data and filename:
                     st.download_button(
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+# 32자리 hex ID 컬럼 → 정수 코드 (원래 값은 사전에 보관)
+ID_COLUMNS = ['order_id', 'customer_unique_id', 'product_id']
+
+# 카디널리티가 낮은 문자열 컬럼 → category
+CATEGORY_COLUMNS = ['y_mth', 'customer_state', 'product_category_name']
+
+# 숫자 컬럼 축소 (payment_value는 매출 합계 정확도를 위해 float64 유지)
+NARROW_DTYPES = {
+    'review_score': 'float32',
+    'customer_lat': 'float32',
+    'customer_lng': 'float32',
+}
+
+def frame_memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
+
+
+def encode_ids(values):
+    """
+    ID 값 → (정수 코드, 사전)
+    - 코드는 int32 (결측값이 있으면 nullable Int32로 두어 nunique 결과가 바뀌지 않게 함)
+    """
+    codes, uniques = pd.factorize(values)
+    missing = codes < 0
+    if missing.any():
+        return pd.arrays.IntegerArray(np.where(missing, 0, codes).astype(np.int32), missing), uniques
+    return codes.astype(np.int32), uniques
+
+
+def to_category(values):
+    """문자열 컬럼 → 정렬된 범주를 가진 Categorical (사용되지 않는 범주 제거)"""
+    cat = values.astype('category').array.remove_unused_categories()
+    if not cat.categories.is_monotonic_increasing:
+        cat = cat.reorder_categories(cat.categories.sort_values())
+    return cat
+
+
+def compact_mart(df, verbose=True, return_ids=False):
+    """
+    대시보드 마트를 메모리 효율적인 표현으로 변환
+    - ID 컬럼: 정수 코드 / 저카디널리티 문자열: category / 평점·좌표: float32
+    - nunique / groupby가 문자열 대신 정수 코드를 해싱하므로 고유값 계산도 빨라짐
+    - 값이 의미를 갖는 연산(합계, 평균, 비교, 정렬)은 기존 코드 그대로 동작
+    - return_ids=True: (프레임, ID 사전 {컬럼: 원래 값 Index}) 반환 - 사전은 이 프레임의 코드에만 유효
+    """
+    if df.empty:
+        return (df, {}) if return_ids else df
+
+    before_mb = frame_memory_mb(df)
+    compact = pd.DataFrame(index=pd.RangeIndex(len(df)))
+    dictionaries = {}
+    for col in df.columns:
+        values = df[col]
+        if col in ID_COLUMNS:
+            compact[col], dictionaries[col] = encode_ids(values.to_numpy())
+        elif col in CATEGORY_COLUMNS:
+            compact[col] = to_category(values)
+        elif col in NARROW_DTYPES:
+            compact[col] = values.to_numpy().astype(NARROW_DTYPES[col])
+        else:
+            compact[col] = values.to_numpy()
+
+    if verbose:
+        after_mb = frame_memory_mb(compact)
+        print(f"📉 마트 메모리: {before_mb:,.1f}MB → {after_mb:,.1f}MB ({len(compact):,} rows)")
+    return (compact, dictionaries) if return_ids else compact
+
+
+def decode_ids(dictionaries, column, codes):
+    """정수 코드 → 원래 ID 값 (같은 compact_mart 호출이 돌려준 사전 사용)"""
+    codes = pd.array(codes, dtype='Int32')
+    decoded = dictionaries[column].take(codes.fillna(0).to_numpy())
+    return pd.Series(decoded).where(~codes.isna())
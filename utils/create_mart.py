@@ -1,111 +1,674 @@
 import os
+import sys
+import json
+import shutil
+import argparse
+import numpy as np
 import pandas as pd
 
-def create_dashboard_mart():
+# `python utils/create_mart.py` 로 직접 실행해도 utils 패키지를 import 할 수 있도록 프로젝트 루트 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.geo_lookup import GEO_LOOKUP_NAME, ZipGeoLookup, load_or_build_geo_lookup  # noqa: E402
+from utils.ingest import (  # noqa: E402
+    FACT_SOURCES, SOURCE_SCHEMAS, appended_only, ingest_sources, read_source, read_source_since, source_fingerprints,
+    source_paths
+)
+from utils.pipeline import PIPELINE_CACHE_DIRNAME, Stage, StagePipeline  # noqa: E402
+from utils.data_version import write_data_version  # noqa: E402
+from utils.cube import (  # noqa: E402
+    CUBE_FILE_NAME, build_cube, combine_cubes, first_order_rows, load_cube_file, save_cube
+)
+
+MART_CSV_NAME = "dashboard_mart.csv"
+MART_PARQUET_DIRNAME = "dashboard_mart_parquet"  # y_mth 기준 파티션 (Parquet)
+MART_STATE_NAME = "dashboard_mart_state.json"    # 증분 빌드용 워터마크 / 원본 파일 지문
+REVIEW_STATS_DIRNAME = "dashboard_review_stats"  # 주문별 평점 합계/건수 (y_mth 파티션, 늦게 도착한 리뷰 반영용)
+
+# 행 추가는 증분으로 처리하는 차원 테이블 (새 키만 추가됨), 그 외 차원 테이블은 바뀌면 전체 재빌드
+APPEND_ONLY_DIMENSIONS = ('customers', 'products')
+
+# 컬럼별 저장 타입 (Parquet에 네이티브 타입으로 저장)
+DATETIME_COLUMNS = ['order_date', 'order_delivered_customer_date', 'order_estimated_delivery_date']
+CATEGORY_COLUMNS = ['customer_state', 'product_category_name']
+
+# 마트 최종 컬럼 순서
+MART_COLUMNS = [
+    'order_id', 'order_date', 'y_mth', 'order_delivered_customer_date', 'order_estimated_delivery_date',
+    'customer_unique_id', 'customer_state', 'customer_lat', 'customer_lng',
+    'product_id', 'product_category_name', 'payment_value', 'review_score'
+]
+
+# 스트리밍 빌드 시 merge 체인의 중간 복사본을 감안한 행당 메모리 배수
+STREAMING_COPY_FACTOR = 4
+
+# 대시보드 대상 기간 (2017-01 ~ 2018-08)
+PERIOD_START, PERIOD_END = '2017-01', '2018-08'
+
+
+def _to_typed_frame(result_df):
+    """Parquet 저장용 타입 변환 (datetime / category)"""
+    typed_df = result_df.copy()
+    for col in DATETIME_COLUMNS:
+        typed_df[col] = pd.to_datetime(typed_df[col], errors='coerce')
+    for col in CATEGORY_COLUMNS:
+        typed_df[col] = typed_df[col].astype('category')
+    return typed_df
+
+
+def write_parquet_mart(result_df, parquet_dir, months=None):
+    """
+    마트를 y_mth 파티션 Parquet 데이터셋으로 저장
+    - 날짜는 datetime, 주/카테고리는 category 타입 그대로 저장되어 로드 시 파싱이 필요 없음
+    - months가 None이면 전체 재작성, 지정하면 해당 월 파티션만 교체
+    - pyarrow가 없으면 건너뛰고 False 반환 (CSV만 사용)
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("⚠️ pyarrow가 설치되어 있지 않아 Parquet 저장을 건너뜁니다.")
+        return False
+
+    _replace_partitions(_to_typed_frame(result_df), parquet_dir, months)
+    return True
+
+
+def _replace_partitions(df, parquet_dir, months=None):
+    """y_mth 파티션 데이터셋 쓰기 (months가 None이면 전체, 지정하면 해당 월 파티션만 교체)"""
+    if months is None:
+        if os.path.exists(parquet_dir):
+            shutil.rmtree(parquet_dir)
+    else:
+        for month in months:
+            partition_dir = os.path.join(parquet_dir, f"y_mth={month}")
+            if os.path.exists(partition_dir):
+                shutil.rmtree(partition_dir)
+
+    if not df.empty:
+        df.to_parquet(parquet_dir, engine='pyarrow', partition_cols=['y_mth'], index=False)
+
+
+def _read_partitions(parquet_dir, months, columns=None):
+    """y_mth 파티션 데이터셋에서 해당 월만 읽음 (y_mth는 문자열)"""
+    df = pd.read_parquet(parquet_dir, engine='pyarrow', columns=columns, filters=[('y_mth', 'in', list(months))])
+    return df.assign(y_mth=df['y_mth'].astype(str))
+
+
+def _join_order_items(orders, items):
+    """[단계] 주문 + 주문상품"""
+    # Orders 기본 전처리
+    orders = orders.rename(columns={'order_purchase_timestamp': 'order_date'})
+
+    # Order + Items
+    return items.merge(orders[['order_id', 'customer_id', 'order_date',
+                               'order_delivered_customer_date', 'order_estimated_delivery_date']],
+                       on='order_id', how='inner')
+
+
+def _product_categories(products, cat_trans):
+    """[단계] 상품별 영문 카테고리명"""
+    products = products.merge(cat_trans, on='product_category_name', how='left')
+    return products[['product_id', 'product_category_name_english']]
+
+
+def _review_averages(reviews):
+    """[단계] 주문별 평균 평점"""
+    return reviews.groupby('order_id')['review_score'].mean().reset_index()
+
+
+def _join_dimensions(order_items, product_categories, review_avg, customers, geo):
+    """[단계] 주문상품 + 상품/고객/리뷰/지역"""
+    # + Products
+    df = order_items.merge(product_categories, on='product_id', how='left')
+
+    # 영문 카테고리명 보정
+    if 'product_category_name_english' in df.columns:
+         df['product_category_name'] = df['product_category_name_english'].fillna('Others')
+    else:
+         df['product_category_name'] = 'Others'
+
+    # + Customers
+    df = df.merge(customers[['customer_id', 'customer_unique_id', 'customer_zip_code_prefix', 'customer_state']],
+                on='customer_id', how='left')
+
+    # + Reviews (평균 평점만)
+    df = df.merge(review_avg, on='order_id', how='left')
+
+    # + Geolocation (Zipcode 앞자리 룩업, 이진 탐색)
+    df['geolocation_lat'], df['geolocation_lng'] = geo.lookup_coords(df['customer_zip_code_prefix'])
+    return df
+
+
+def _derive_mart_columns(df):
+    """[단계] 파생 변수 생성, 기간 필터링, 최종 컬럼 정리 (입력은 캐시된 상위 단계 출력일 수 있으므로 수정하지 않음)"""
+    # 매출액 (가격 + 배송비), 연월 컬럼 - 새 프레임에 추가
+    order_date = pd.to_datetime(df['order_date'])
+    df = df.assign(payment_value=df['price'] + df['freight_value'], order_date=order_date,
+                   y_mth=order_date.dt.strftime('%Y-%m'))
+
+    # 기간 필터링 (2017-01 ~ 2018-08)
+    df = df[(df['y_mth'] >= PERIOD_START) & (df['y_mth'] <= PERIOD_END)]
+
+    # 최종 저장할 컬럼만 선택
+    final_columns = [
+        'order_id',
+        'order_date',
+        'y_mth',
+        'order_delivered_customer_date',
+        'order_estimated_delivery_date',
+        'customer_unique_id',
+        'customer_state',
+        'geolocation_lat',  # customer_lat
+        'geolocation_lng',  # customer_lng
+        'product_id',
+        'product_category_name',
+        'payment_value',
+        'review_score'
+    ]
+
+    # 컬럼 이름 깔끔하게 변경
+    rename_map = {
+        'geolocation_lat': 'customer_lat',
+        'geolocation_lng': 'customer_lng'
+    }
+
+    return df[final_columns].rename(columns=rename_map)
+
+
+def build_mart_frame(src):
+    """원본 테이블들을 병합해 대시보드 마트(최종 컬럼) 생성 (캐시 없이 전체 단계 실행)"""
+    # 3. 데이터 병합 (Merge)
+    print("🔄 데이터를 하나로 합치는 중...")
+    df = _join_dimensions(
+        _join_order_items(src['orders'], src['items']),
+        _product_categories(src['products'], src['cat_trans']),
+        _review_averages(src['reviews']),
+        src['customers'],
+        src['geo']
+    )
+
+    # 4. 파생 변수 생성 및 컬럼 정리
+    print("✂️ 불필요한 데이터를 잘라내는 중...")
+    return _derive_mart_columns(df)
+
+
+def mart_stages():
+    """
+    전체 빌드 파이프라인 단계 (이름 / 상위 단계 / 원본)
+    - order_items → joined → mart → cube 순으로 이어지고, 증분 빌드용 주문별 평점 합계는 mart + 리뷰 원본에서 계산
+    """
+    return [
+        Stage('order_items', _join_order_items, sources=('orders', 'items')),
+        Stage('product_categories', _product_categories, sources=('products', 'cat_trans')),
+        Stage('review_avg', _review_averages, sources=('reviews',)),
+        Stage('joined', _join_dimensions, inputs=('order_items', 'product_categories', 'review_avg'),
+              sources=('customers', 'geo'), deps=(ZipGeoLookup,)),
+        Stage('mart', _derive_mart_columns, inputs=('joined',), deps=(PERIOD_START, PERIOD_END)),
+        Stage('cube', build_cube, inputs=('mart',), deps=(first_order_rows,)),
+        Stage('review_stats', _review_stats, inputs=('mart',), sources=('reviews',)),
+    ]
+
+
+def _review_stats(mart, reviews):
+    """[단계] 마트 주문별 평점 합계 / 건수 (order_id, y_mth, review_sum, review_count)"""
+    stats = reviews.groupby('order_id')['review_score'].agg(review_sum='sum', review_count='count').reset_index()
+    return mart[['order_id', 'y_mth']].drop_duplicates('order_id').merge(stats, on='order_id', how='inner')
+
+
+def _combine_review_stats(frames):
+    combined = pd.concat([f for f in frames if not f.empty], ignore_index=True)
+    if combined.empty:
+        return pd.DataFrame(columns=['order_id', 'y_mth', 'review_sum', 'review_count'])
+    return combined.groupby(['order_id', 'y_mth'], sort=False)[['review_sum', 'review_count']].sum().reset_index()
+
+
+def _load_state(state_path):
+    if not os.path.exists(state_path):
+        return None
+    with open(state_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _build_state(watermark, fingerprints, mart_key=None):
+    """
+    증분 빌드 상태
+    - watermark: 마트에 반영된 마지막 주문 시각 (표시용)
+    - sources: 빌드에 쓴 원본 파일 지문 (사실 테이블은 크기 = 다음 증분 빌드가 읽기 시작할 위치)
+    - mart_key: 같은 원본으로 전체 빌드할 때의 mart 단계 키 (전체 빌드가 저장을 건너뛸 수 있도록 유지)
+    """
+    return {'watermark': str(watermark), 'sources': fingerprints, 'mart_key': mart_key}
+
+
+def _save_state(state_path, state):
+    with open(state_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+
+
+# 스트리밍 빌드의 주문 룩업 컬럼 (주문상품 조인 + 마트 컬럼에 필요한 것만)
+STREAMING_ORDER_COLUMNS = ['order_id', 'customer_id', 'order_date', 'order_delivered_customer_date',
+                           'order_estimated_delivery_date']
+
+
+def _load_dimension_lookups(data_dir, geo_lookup_path, chunk_rows, budget_bytes=None):
+    """
+    스트리밍 빌드용 차원 룩업 (메모리에 상주하는 테이블들)
+    - 상품(+영문 카테고리), 고객, 주문별 평균 평점, 우편번호 → 위경도, 대상 기간 주문
+    - 리뷰 원본은 청크 단위로 읽어 집계 결과만 유지
+    - 주문은 청크로 읽으면서 필요한 컬럼만 남기고, 누적 메모리가 budget_bytes를 넘으면 MemoryError
+      (주문 룩업은 행 수에 비례해 커지므로 전부 읽은 뒤가 아니라 읽는 중에 확인)
+    """
+    products = read_source(data_dir, 'products')
+    cat_trans = read_source(data_dir, 'cat_trans')
+    products = products.merge(cat_trans, on='product_category_name', how='left')[['product_id', 'product_category_name_english']]
+
+    customers = read_source(data_dir, 'customers')
+
+    # 리뷰: 청크별 합계/건수 → 주문별 평균
+    partials = []
+    for chunk in read_source(data_dir, 'reviews', chunksize=chunk_rows):
+        partials.append(chunk.groupby('order_id')['review_score'].agg(['sum', 'count']))
+    rv = pd.concat(partials).groupby(level=0).sum()
+    rv_agg = (rv['sum'] / rv['count'].where(rv['count'] > 0)).rename('review_score').rename_axis('order_id').reset_index()
+
+    # 지역: zip prefix 룩업 아티팩트
+    geo = load_or_build_geo_lookup(os.path.join(data_dir, "geolocation.csv"), geo_lookup_path)
+
+    # 주문: 대상 기간 주문만 필요한 컬럼으로 유지
+    fixed_bytes = sum(_frame_bytes(t) for t in (products, customers, rv_agg))
+    partials, orders_bytes = [], 0
+    for chunk in read_source(data_dir, 'orders', chunksize=chunk_rows):
+        chunk = chunk.rename(columns={'order_purchase_timestamp': 'order_date'})
+        chunk['order_date'] = pd.to_datetime(chunk['order_date'])
+        y_mth = chunk['order_date'].dt.strftime('%Y-%m')
+        chunk = chunk.loc[(y_mth >= PERIOD_START) & (y_mth <= PERIOD_END), STREAMING_ORDER_COLUMNS]
+        partials.append(chunk)
+        orders_bytes += _frame_bytes(chunk)
+        if budget_bytes is not None and fixed_bytes + orders_bytes > budget_bytes:
+            raise MemoryError(
+                f"메모리 예산이 부족합니다: 주문 룩업만 {orders_bytes / 1024 ** 2:.0f}MB 이상 "
+                f"(차원 룩업 {fixed_bytes / 1024 ** 2:.0f}MB, 예산 {budget_bytes / 1024 ** 2:.0f}MB)"
+            )
+    orders = pd.concat(partials, ignore_index=True)
+    del partials
+    # 마트 행 → 주문 룩업 위치 (주문 수 집계 시 이미 센 주문 표시에 사용)
+    orders['order_pos'] = np.arange(len(orders), dtype=np.int64)
+
+    return {'orders': orders, 'products': products, 'customers': customers, 'reviews': rv_agg, 'geo': geo}
+
+
+def _join_items_chunk(items, lookups):
+    """order_items 청크 하나를 차원 룩업과 해시 조인 → (마트 행, 행별 주문 룩업 위치)"""
+    df = items.merge(lookups['orders'], on='order_id', how='inner')
+    df = df.merge(lookups['products'], on='product_id', how='left')
+    df['product_category_name'] = df['product_category_name_english'].fillna('Others')
+    df = df.merge(lookups['customers'], on='customer_id', how='left')
+    df = df.merge(lookups['reviews'], on='order_id', how='left')
+    df['geolocation_lat'], df['geolocation_lng'] = lookups['geo'].lookup_coords(df['customer_zip_code_prefix'])
+
+    df['payment_value'] = df['price'] + df['freight_value']
+    df['y_mth'] = df['order_date'].dt.strftime('%Y-%m')
+
+    result_df = df.rename(columns={'geolocation_lat': 'customer_lat', 'geolocation_lng': 'customer_lng'})
+    return result_df[MART_COLUMNS], df['order_pos'].to_numpy()
+
+
+def _frame_bytes(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def build_mart_streaming(data_dir, parquet_dir, output_path, geo_lookup_path, cube_path,
+                         memory_budget_mb=1024, export_csv=True):
+    """
+    메모리 상한 내 스트리밍 빌드
+    - order_items를 청크로 읽어 차원 룩업과 조인 후 CSV/Parquet에 바로 이어쓰기
+    - 청크 크기는 (예산 - 룩업 메모리) / (샘플로 측정한 행당 메모리 × 중간 복사 배수) 로 결정
+    - 룩업 메모리에는 주문 룩업과 이미 센 주문 표시(주문당 1바이트)까지 포함
+    """
+    budget_bytes = memory_budget_mb * 1024 * 1024
+
+    # 차원 룩업은 작은 청크로 읽어 원본 전체를 한번에 올리지 않음
+    lookups = _load_dimension_lookups(data_dir, geo_lookup_path, chunk_rows=200_000, budget_bytes=budget_bytes)
+    # 청크 경계에 걸친 주문을 한 번만 세기 위한 표시 (주문 룩업 위치별, 크기 고정)
+    counted = np.zeros(len(lookups['orders']), dtype=bool)
+    lookup_bytes = sum(_frame_bytes(t) for name, t in lookups.items() if name != 'geo') + counted.nbytes
+
+    # 샘플 청크로 행당 메모리 추정 (merge 체인의 중간 복사본 감안)
+    sample, _ = _join_items_chunk(read_source(data_dir, 'items', nrows=2000), lookups)
+    row_bytes = max(_frame_bytes(sample) / max(len(sample), 1), 1) * STREAMING_COPY_FACTOR
+    available = budget_bytes - lookup_bytes
+    if available <= row_bytes * 1000:
+        raise MemoryError(
+            f"메모리 예산이 부족합니다: 룩업 {lookup_bytes / 1024 ** 2:.0f}MB / 예산 {memory_budget_mb}MB"
+        )
+    chunk_rows = int(available // row_bytes)
+    print(f"📦 스트리밍 빌드: 룩업 {lookup_bytes / 1024 ** 2:.0f}MB, 청크 {chunk_rows:,} rows (예산 {memory_budget_mb}MB)")
+
+    if os.path.exists(parquet_dir):
+        shutil.rmtree(parquet_dir)
+    if export_csv and os.path.exists(output_path):
+        os.remove(output_path)
+
+    total_rows, parquet_ok = 0, True
+    cube = None
+    for i, items in enumerate(read_source(data_dir, 'items', chunksize=chunk_rows)):
+        result_df, order_pos = _join_items_chunk(items, lookups)
+        if result_df.empty:
+            continue
+
+        # 큐브는 청크별로 만들어 누적 (청크 경계에 걸친 주문은 한 번만 셈, 청크 크기에 비례하는 비용)
+        is_first = ~pd.Series(order_pos).duplicated().to_numpy() & ~counted[order_pos]
+        counted[order_pos[is_first]] = True
+        cube = combine_cubes([cube, build_cube(result_df, is_first)])
+        if export_csv:
+            result_df.to_csv(output_path, index=False, mode='a', header=(total_rows == 0), encoding='utf-8-sig' if total_rows == 0 else 'utf-8')
+        if parquet_ok:
+            parquet_ok = _append_parquet_chunk(result_df, parquet_dir)
+        total_rows += len(result_df)
+        print(f"   ... 청크 {i + 1} 처리 완료 (누적 {total_rows:,} rows)")
+
+    if cube is not None and save_cube(cube, cube_path):
+        print(f"✅ 집계 큐브 생성 완료: {cube_path}")
+
+    print(f"✅ 스트리밍 빌드 완료: {total_rows:,} rows")
+    return total_rows
+
+
+def _append_parquet_chunk(result_df, parquet_dir):
+    """청크를 기존 파티션에 새 파일로 추가 (write_parquet_mart와 동일한 타입 변환)"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("⚠️ pyarrow가 설치되어 있지 않아 Parquet 저장을 건너뜁니다.")
+        return False
+
+    typed_df = _to_typed_frame(result_df)
+    typed_df.to_parquet(parquet_dir, engine='pyarrow', partition_cols=['y_mth'], index=False)
+    return True
+
+
+def _export_csv_from_parquet(parquet_dir, output_path):
+    """Parquet 파티션으로부터 구글 시트 업로드용 CSV 재생성"""
+    df = pd.read_parquet(parquet_dir, engine='pyarrow')
+    df['y_mth'] = df['y_mth'].astype(str)
+    df = df[MART_COLUMNS].sort_values('order_date', kind='stable')
+    df.to_csv(output_path, index=False, encoding='utf-8-sig')
+
+
+def create_dashboard_mart(data_dir=None, output_dir=None, incremental=False, export_csv=None,
+                          streaming=False, memory_budget_mb=1024, ingest_workers=None, ingest_processes=False,
+                          use_cache=True):
+    """
+    대시보드 마트 생성
+    - incremental=False: 전체 재빌드 (CSV + Parquet)
+    - streaming=True: order_items를 청크 단위로 조인하는 메모리 상한(memory_budget_mb) 빌드
+      (증분 빌드 상태는 초기화되어 다음 증분 실행은 전체 재빌드가 됨)
+    - ingest_workers / ingest_processes: 원본 파일 병렬 로드 워커 수 / 프로세스 풀 사용 여부
+    - incremental=True: 이전 빌드 이후 사실 테이블(주문 / 주문상품 / 리뷰) 끝에 추가된 행만 읽어
+      영향받은 y_mth 파티션만 교체 (비용은 추가분 + 영향받은 월 크기에 비례)
+      · 이전 빌드 상태가 없거나, 사실 테이블의 기존 행이 바뀌었거나, 카테고리 번역 / 지역 원본이 바뀌었거나,
+        상품 / 고객의 기존 행이 바뀐 경우에는 사유를 출력하고 전체 재빌드
+    - export_csv: CSV 재생성 여부 (기본값: 전체 빌드 True, 증분 빌드 False)
+    - use_cache: 전체 빌드 시 단계별 결과를 output_dir/.mart_cache/ 에 캐시 (원본 내용 + 단계 코드 해시 기준)
+    - 원본 파일 지문은 빌드 시작 시점에 기록하므로 빌드 중에는 원본에 행을 추가하지 않아야 함
+    """
     print("🚀 데이터 최적화 작업을 시작합니다...")
-    
+
     # 1. 파일 경로 설정
     # 06_dashboard/utils/create_mart.py 위치 기준
     base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    data_dir = os.path.join(base_dir, "00_cleand_data")
-    output_path = os.path.join(base_dir, "06_dashboard", "dashboard_mart.csv")
+    data_dir = data_dir or os.path.join(base_dir, "00_cleand_data")
+    output_dir = output_dir or os.path.join(base_dir, "06_dashboard")
+    paths = {
+        'csv': os.path.join(output_dir, MART_CSV_NAME),
+        'parquet': os.path.join(output_dir, MART_PARQUET_DIRNAME),
+        'review_stats': os.path.join(output_dir, REVIEW_STATS_DIRNAME),
+        'cube': os.path.join(output_dir, CUBE_FILE_NAME),
+        'geo_lookup': os.path.join(output_dir, GEO_LOOKUP_NAME),
+    }
+    state_path = os.path.join(output_dir, MART_STATE_NAME)
 
     if not os.path.exists(data_dir):
         print(f"❌ 데이터 폴더를 찾을 수 없습니다: {data_dir}")
         return
 
+    if streaming:
+        try:
+            if os.path.exists(state_path):
+                os.remove(state_path)
+            build_mart_streaming(data_dir, paths['parquet'], paths['csv'], paths['geo_lookup'], paths['cube'],
+                                 memory_budget_mb=memory_budget_mb,
+                                 export_csv=export_csv is not False)
+            _publish_data_version(output_dir)
+        except Exception as e:
+            print(f"❌ 오류 발생: {e}")
+        return
+
     # 2. 데이터 로드 (필요한 컬럼만 로드하여 메모리 절약)
     try:
-        print("📥 원본 데이터를 읽는 중...")
-        orders = pd.read_csv(os.path.join(data_dir, "orders.csv"))
-        items = pd.read_csv(os.path.join(data_dir, "order_items.csv"))
-        products = pd.read_csv(os.path.join(data_dir, "products.csv"))
-        reviews = pd.read_csv(os.path.join(data_dir, "order_reviews.csv"))
-        customers = pd.read_csv(os.path.join(data_dir, "customers.csv"))
-        # sellers - 대시보드 KPI에 직접 안쓰이므로 제외 가능
-        geo = pd.read_csv(os.path.join(data_dir, "geolocation.csv"))
-        cat_trans = pd.read_csv(os.path.join(data_dir, "product_category_name_translation.csv"))
-
-        # 3. 데이터 병합 (Merge)
-        print("🔄 데이터를 하나로 합치는 중...")
-        
-        # Orders 기본 전처리
-        orders = orders.rename(columns={'order_purchase_timestamp': 'order_date'})
-        
-        # Order + Items
-        df = items.merge(orders[['order_id', 'customer_id', 'order_date', 'order_approved_at', 
-                               'order_delivered_customer_date', 'order_estimated_delivery_date']], 
-                       on='order_id', how='inner')
+        # 원본 지문은 읽기 전에 기록 (증분 빌드는 이 크기까지만 읽음)
+        fingerprints = source_fingerprints(data_dir)
 
-        # + Products
-        products = products.merge(cat_trans, on='product_category_name', how='left')
-        df = df.merge(products[['product_id', 'product_category_name_english']], on='product_id', how='left')
-        
-        # 영문 카테고리명 보정
-        if 'product_category_name_english' in df.columns:
-             df['product_category_name'] = df['product_category_name_english'].fillna('Others')
-        else:
-             df['product_category_name'] = 'Others'
-
-        # + Customers
-        df = df.merge(customers[['customer_id', 'customer_unique_id', 'customer_zip_code_prefix', 'customer_city', 'customer_state']], 
-                    on='customer_id', how='left')
-
-        # + Reviews (평균 평점만)
-        rv_agg = reviews.groupby('order_id')['review_score'].mean().reset_index()
-        df = df.merge(rv_agg, on='order_id', how='left')
-
-        # + Geolocation (Zipcode 기준 중복 제거 후 병합)
-        geo_agg = geo.groupby('geolocation_zip_code_prefix')[['geolocation_lat', 'geolocation_lng']].first().reset_index()
-        df = df.merge(geo_agg, left_on='customer_zip_code_prefix', right_on='geolocation_zip_code_prefix', how='left')
-
-        # 4. 파생 변수 생성 및 컬럼 정리
-        print("✂️ 불필요한 데이터를 잘라내는 중...")
-        
-        # 매출액 (가격 + 배송비)
-        df['payment_value'] = df['price'] + df['freight_value']
-        
-        # 연월 컬럼
-        df['order_date'] = pd.to_datetime(df['order_date'])
-        df['y_mth'] = df['order_date'].dt.strftime('%Y-%m')
-        
-        # 기간 필터링 (2017-01 ~ 2018-08)
-        df = df[(df['y_mth'] >= '2017-01') & (df['y_mth'] <= '2018-08')]
-
-        # 최종 저장할 컬럼만 선택
-        final_columns = [
-            'order_id', 
-            'order_date', 
-            'y_mth',
-            'order_delivered_customer_date',
-            'order_estimated_delivery_date',
-            'customer_unique_id',
-            'customer_state',
-            'geolocation_lat',  # customer_lat
-            'geolocation_lng',  # customer_lng
-            'product_id',
-            'product_category_name',
-            'payment_value',
-            'review_score'
-        ]
-        
-        # 컬럼 이름 깔끔하게 변경
-        rename_map = {
-            'geolocation_lat': 'customer_lat',
-            'geolocation_lng': 'customer_lng'
-        }
-        
-        result_df = df[final_columns].rename(columns=rename_map)
-        
-        # 5. CSV 저장
+        def load_sources(names):
+            print("📥 원본 데이터를 읽는 중...")
+            return ingest_sources(data_dir, paths['geo_lookup'], max_workers=ingest_workers,
+                                  use_processes=ingest_processes, names=names)[0]
+
+        pipeline = StagePipeline(
+            mart_stages(), source_paths(data_dir), load_sources,
+            cache_dir=os.path.join(output_dir, PIPELINE_CACHE_DIRNAME),
+            salt=_pipeline_salt(), enabled=use_cache
+        )
+
+        new_state = None
+        if incremental:
+            try:
+                new_state = _build_incremental(data_dir, _load_state(state_path), fingerprints, pipeline,
+                                               load_sources, paths, export_csv=bool(export_csv))
+            except _FullRebuild as e:
+                print(f"ℹ️ {e} → 전체 재빌드를 수행합니다.")
+                incremental = False
+        if not incremental:
+            new_state = _build_full(pipeline, state_path, paths, fingerprints, export_csv=export_csv is not False)
+
+        if new_state is not None:
+            _save_state(state_path, new_state)
+        _publish_data_version(output_dir)
+
+    except Exception as e:
+        print(f"❌ 오류 발생: {e}")
+
+
+def _publish_data_version(output_dir):
+    """
+    산출물을 모두 쓴 뒤 데이터 버전 파일 갱신 (대시보드 갱신 스레드가 이 해시를 재사용)
+    - 내용이 같으면 버전도 같으므로 대시보드는 다시 로드하지 않음
+    """
+    version = write_data_version(output_dir)
+    if version:
+        print(f"🏷️ 데이터 버전: {version}")
+
+
+def _pipeline_salt():
+    """단계 함수 밖에서 결과에 영향을 주는 설정 (읽기 스키마, 대상 기간)"""
+    return repr((sorted((name, sorted(map(str, schema['dtype'].items()))) for name, schema in SOURCE_SCHEMAS.items()),
+                 PERIOD_START, PERIOD_END))
+
+
+def _outputs_exist(paths, export_csv):
+    return (os.path.isdir(paths['parquet']) and os.path.isdir(paths['review_stats']) and os.path.exists(paths['cube'])
+            and (not export_csv or os.path.exists(paths['csv'])))
+
+
+def _build_full(pipeline, state_path, paths, fingerprints, export_csv=True):
+    """
+    단계 파이프라인으로 전체 빌드 (.mart_cache/ 에 단계별 결과 캐시)
+    - 원본/코드가 그대로면 마트 키가 이전 빌드와 같으므로 저장까지 건너뜀
+    - 반환값: 저장할 빌드 상태 (건너뛴 경우 None)
+    """
+    if pipeline.enabled:
+        mart_key = pipeline.compute_keys()['mart']
+        prev_state = _load_state(state_path) or {}
+        if prev_state.get('mart_key') == mart_key and _outputs_exist(paths, export_csv):
+            print(f"✅ 원본과 코드가 이전 빌드와 같아 건너뜁니다. (mart {mart_key})")
+            return None
+
+    outputs = pipeline.run(['mart', 'cube', 'review_stats'])
+    result_df = outputs['mart']
+    output_path, parquet_dir = paths['csv'], paths['parquet']
+
+    # 5. CSV 저장
+    if export_csv:
         print(f"💾 파일 저장 중... ({len(result_df)} rows)")
         result_df.to_csv(output_path, index=False, encoding='utf-8-sig') # 한글/특수문자 대비 utf-8-sig
-        
+
         print(f"✅ 성공! 통합 데이터 파일이 생성되었습니다: {output_path}")
         print(f"   --> 이 파일만 구글 시트에 올리시면 됩니다.")
 
-    except Exception as e:
-        print(f"❌ 오류 발생: {e}")
+    # 6. Parquet 저장 (대시보드 로컬 로드용, 월별 파티션)
+    if write_parquet_mart(result_df, parquet_dir):
+        print(f"✅ Parquet 데이터셋 생성 완료: {parquet_dir}")
+        _replace_partitions(outputs['review_stats'], paths['review_stats'])
+
+    # 7. 집계 큐브 저장 (월 × 주 × 카테고리)
+    if save_cube(outputs['cube'], paths['cube']):
+        print(f"✅ 집계 큐브 생성 완료: {paths['cube']}")
+
+    return _build_state(pd.to_datetime(result_df['order_date']).max(), fingerprints, pipeline.keys['mart'])
+
+
+class _FullRebuild(Exception):
+    """증분 빌드로 반영할 수 없는 원본 변경 (메시지: 사유)"""
+
+
+def _check_incremental(data_dir, state, paths):
+    """이전 빌드 이후의 원본 변경이 '끝에 행 추가'뿐인지 확인 (아니면 _FullRebuild)"""
+    if state is None or not os.path.isdir(paths['parquet']) or not os.path.isdir(paths['review_stats']):
+        raise _FullRebuild("이전 빌드 상태가 없습니다")
+    previous = state.get('sources')
+    if not previous:
+        raise _FullRebuild("이전 빌드 상태에 원본 지문이 없습니다")
+    for name, path in source_paths(data_dir).items():
+        file_name = os.path.basename(path)
+        fingerprint = previous.get(name)
+        if fingerprint is None or not appended_only(path, fingerprint):
+            raise _FullRebuild(f"{file_name}의 기존 내용이 바뀌었습니다")
+        if name not in FACT_SOURCES and name not in APPEND_ONLY_DIMENSIONS \
+                and os.path.getsize(path) != fingerprint['size']:
+            raise _FullRebuild(f"{file_name}이(가) 바뀌었습니다")
+
+
+def _find_orders(parquet_dir, order_ids):
+    """마트에 이미 있는 주문의 (order_id, y_mth) - order_id 컬럼만 필터 조건으로 읽음"""
+    if len(order_ids) == 0:
+        return pd.DataFrame({'order_id': pd.Series(dtype=str), 'y_mth': pd.Series(dtype=str)})
+    found = pd.read_parquet(parquet_dir, engine='pyarrow', columns=['order_id', 'y_mth'],
+                            filters=[('order_id', 'in', list(order_ids))])
+    return found.drop_duplicates('order_id').assign(y_mth=lambda f: f['y_mth'].astype(str))
+
+
+def _late_item_rows(month_df, items, products, cat_trans):
+    """마트에 이미 있는 주문에 추가된 주문상품 → 마트 행 (주문 단위 컬럼은 기존 행에서 복사)"""
+    order_columns = [c for c in MART_COLUMNS if c not in ('product_id', 'product_category_name', 'payment_value')]
+    orders = month_df[order_columns].drop_duplicates('order_id')
+    df = items.merge(orders, on='order_id', how='inner')
+    df = df.merge(_product_categories(products, cat_trans), on='product_id', how='left')
+    df['product_category_name'] = df['product_category_name_english'].fillna('Others')
+    df['payment_value'] = df['price'] + df['freight_value']
+    return df[MART_COLUMNS]
+
+
+def _build_incremental(data_dir, state, fingerprints, pipeline, load_sources, paths, export_csv=False):
+    """
+    증분 빌드 - 이전 빌드 이후 사실 테이블 끝에 추가된 행만 읽어 영향받은 월 파티션 교체
+    - 신규 주문: 추가된 주문 / 주문상품 / 리뷰 + 차원 테이블로 조인
+    - 기존 주문에 늦게 추가된 주문상품 / 리뷰: 해당 주문의 월 파티션과 주문별 평점 합계(REVIEW_STATS_DIRNAME)로 갱신
+    - 반환값: 저장할 빌드 상태, 증분으로 반영할 수 없으면 _FullRebuild
+    """
+    _check_incremental(data_dir, state, paths)
+    previous = state['sources']
+    watermark = pd.Timestamp(state['watermark'])
+    if all(fingerprints[name]['size'] == previous[name]['size'] for name in FACT_SOURCES):
+        print(f"✅ 변경된 데이터가 없습니다. (워터마크: {state['watermark']})")
+        return dict(state, sources=fingerprints)
+
+    print("📥 추가된 행만 읽는 중...")
+    delta = {name: read_source_since(data_dir, name, previous[name]['size'], fingerprints[name]['size'])
+             for name in FACT_SOURCES}
+    print("   " + " / ".join(f"{SOURCE_SCHEMAS[name]['file']} +{len(df):,}" for name, df in delta.items()))
+    orders, items, reviews = delta['orders'], delta['items'], delta['reviews']
+    if not orders.empty:
+        watermark = max(watermark, pd.to_datetime(orders['order_purchase_timestamp']).max())
+
+    new_ids = pd.Index(orders['order_id'].unique())
+    late_ids = pd.Index(items['order_id']).union(pd.Index(reviews['order_id'])).unique().difference(new_ids)
+    known = _find_orders(paths['parquet'], late_ids)
+    unknown_items = pd.Index(items['order_id']).difference(new_ids).difference(known['order_id'])
+    if len(unknown_items):
+        raise _FullRebuild(f"마트에 없는 기존 주문의 주문상품이 추가되었습니다 ({len(unknown_items)}건)")
+
+    dims = load_sources(['products', 'cat_trans', 'customers', 'geo'])
+    new_rows = build_mart_frame(dict(dims, orders=orders, items=items[items['order_id'].isin(new_ids)],
+                                     reviews=reviews[reviews['order_id'].isin(new_ids)]))
+    affected = sorted(set(new_rows['y_mth']) | set(known['y_mth']))
+    if not affected:
+        print("✅ 대상 기간 마트에 반영할 변경이 없습니다.")
+    else:
+        print(f"🔁 증분 빌드 대상 월: {', '.join(affected)} (신규 주문 {len(new_ids):,} / 기존 주문 갱신 {len(known):,})")
+        month_df = _read_partitions(paths['parquet'], affected)
+        late_items = _late_item_rows(month_df, items[items['order_id'].isin(known['order_id'])],
+                                     dims['products'], dims['cat_trans'])
+        month_df = pd.concat([month_df, late_items, new_rows], ignore_index=True)
+
+        # 주문별 평점 합계에 추가된 리뷰를 더하고, 리뷰가 늦게 추가된 기존 주문의 평균 평점을 다시 계산
+        order_months = pd.concat([known, new_rows[['order_id', 'y_mth']].drop_duplicates('order_id')])
+        stats = _combine_review_stats([_read_partitions(paths['review_stats'], affected),
+                                       _review_stats(order_months, reviews)])
+        reviewed = known['order_id'][known['order_id'].isin(reviews['order_id'])]
+        if len(reviewed):
+            stats_by_order = stats.set_index('order_id')
+            mean = stats_by_order['review_sum'] / stats_by_order['review_count'].where(stats_by_order['review_count'] > 0)
+            rows = month_df['order_id'].isin(reviewed)
+            month_df.loc[rows, 'review_score'] = month_df.loc[rows, 'order_id'].map(mean).to_numpy()
+
+        print(f"💾 파티션 교체 중... ({len(month_df)} rows)")
+        if not write_parquet_mart(month_df, paths['parquet'], months=affected):
+            raise RuntimeError("증분 빌드에는 pyarrow가 필요합니다.")
+        _replace_partitions(stats, paths['review_stats'], months=affected)
+        print(f"✅ Parquet 파티션 갱신 완료: {paths['parquet']}")
+
+        # 큐브: 영향받은 월의 셀만 교체 (주문은 한 달에만 속하므로 월 단위 교체로 충분)
+        cube = load_cube_file(paths['cube'])
+        if cube is not None:
+            cube = combine_cubes([cube[~cube['y_mth'].isin(affected)], build_cube(month_df)])
+            save_cube(cube, paths['cube'])
+        else:
+            save_cube(build_cube(pd.read_parquet(paths['parquet'], engine='pyarrow')), paths['cube'])
+        print(f"✅ 집계 큐브 갱신 완료: {paths['cube']}")
+
+        if export_csv:
+            _export_csv_from_parquet(paths['parquet'], paths['csv'])
+            print(f"✅ CSV 재생성 완료: {paths['csv']}")
+
+    # 같은 원본의 전체 빌드가 저장을 건너뛸 수 있도록 mart 키 갱신 (원본 해시는 크기/수정 시각 메모 사용)
+    mart_key = pipeline.compute_keys()['mart'] if pipeline.enabled else state.get('mart_key')
+    return _build_state(watermark, fingerprints, mart_key)
+
 
 if __name__ == "__main__":
-    create_dashboard_mart()
+    parser = argparse.ArgumentParser(description="대시보드 마트 생성")
+    parser.add_argument('--incremental', action='store_true', help="변경된 월 파티션만 다시 빌드")
+    parser.add_argument('--export-csv', action='store_true', help="증분 빌드 후에도 CSV 재생성")
+    parser.add_argument('--streaming', action='store_true', help="청크 단위 스트리밍 빌드 (메모리 상한)")
+    parser.add_argument('--memory-budget-mb', type=int, default=1024, help="스트리밍 빌드 메모리 예산 (MB)")
+    parser.add_argument('--ingest-workers', type=int, default=None, help="원본 파일 병렬 로드 워커 수")
+    parser.add_argument('--ingest-processes', action='store_true', help="스레드 대신 프로세스 풀로 원본 로드")
+    parser.add_argument('--no-cache', action='store_true', help="단계별 캐시(.mart_cache/)를 사용하지 않고 전체 실행")
+    args = parser.parse_args()
+    create_dashboard_mart(
+        incremental=args.incremental,
+        export_csv=True if args.export_csv else None,
+        streaming=args.streaming,
+        memory_budget_mb=args.memory_budget_mb,
+        ingest_workers=args.ingest_workers,
+        ingest_processes=args.ingest_processes,
+        use_cache=not args.no_cache
+    )
@@ -0,0 +1,98 @@
+import os
+import numpy as np
+import pandas as pd
+
+CUBE_FILE_NAME = "dashboard_cube.parquet"
+
+# 큐브 키 (월 × 주 × 카테고리) 와 가산(additive) 측정값
+CUBE_KEYS = ['y_mth', 'customer_state', 'product_category_name']
+CUBE_MEASURES = ['sales_sum', 'item_count', 'review_sum', 'review_count', 'order_count']
+
+
+def first_order_rows(order_ids, seen_hashes=None):
+    """
+    주문별 첫 번째 행 여부 (order_count 집계용)
+    - 주문을 첫 행의 카테고리 셀에만 귀속시켜 order_count를 모든 차원에서 가산 가능하게 만듦
+      (주문은 하나의 월/주에만 속하므로 월·주 기준 롤업 시 nunique와 동일)
+    - seen_hashes: 이전 청크에서 이미 센 주문 해시 (스트리밍 빌드용)
+    """
+    hashes = pd.util.hash_array(np.asarray(order_ids, dtype=object))
+    is_first = ~pd.Series(hashes).duplicated().to_numpy()
+    if seen_hashes is not None and len(seen_hashes):
+        is_first &= ~np.isin(hashes, seen_hashes)
+    return is_first, hashes
+
+
+def build_cube(df, is_first_order=None):
+    """행 단위 마트 → 월 × 주 × 카테고리 가산 큐브 (매출 합계, 행 수, 평점 합계/건수, 주문 수)"""
+    if is_first_order is None:
+        is_first_order, _ = first_order_rows(df['order_id'])
+
+    measures = pd.DataFrame({
+        'y_mth': df['y_mth'].astype(str).to_numpy(),
+        'customer_state': df['customer_state'].to_numpy(),
+        'product_category_name': df['product_category_name'].to_numpy(),
+        'sales_sum': df['payment_value'].to_numpy(),
+        'item_count': 1,
+        'review_sum': df['review_score'].fillna(0).to_numpy(dtype=np.float64),
+        'review_count': df['review_score'].notna().to_numpy().astype(np.int64),
+        'order_count': np.asarray(is_first_order, dtype=np.int64)
+    })
+    return measures.groupby(CUBE_KEYS, dropna=False, sort=True).sum().reset_index()
+
+
+def combine_cubes(cubes):
+    """여러 큐브(청크/월 단위)를 하나로 합침 - 측정값이 모두 가산이므로 합계만 다시 계산"""
+    cubes = [c for c in cubes if c is not None and not c.empty]
+    if not cubes:
+        return pd.DataFrame(columns=CUBE_KEYS + CUBE_MEASURES)
+    combined = pd.concat(cubes, ignore_index=True)
+    for col in ['customer_state', 'product_category_name']:
+        combined[col] = combined[col].astype(object)
+    return combined.groupby(CUBE_KEYS, dropna=False, sort=True)[CUBE_MEASURES].sum().reset_index()
+
+
+def filter_cube(cube, selected_month, selected_state):
+    """apply_filters와 동일한 조건으로 큐브 셀 필터링"""
+    if cube is None or cube.empty:
+        return cube
+    mask = np.ones(len(cube), dtype=bool)
+    if selected_month != 'All':
+        mask &= (cube['y_mth'] == selected_month).to_numpy()
+    if selected_state:
+        mask &= cube['customer_state'].isin(selected_state).to_numpy()
+    return cube[mask]
+
+
+def rollup_cube(cube, by):
+    """
+    큐브를 by 차원으로 롤업
+    - avg_rating = review_sum / review_count (행 단위 review_score 평균과 동일)
+    - order_count는 월/주 기준 롤업에서만 주문 nunique와 같음 (카테고리 기준은 주문의 첫 행 카테고리 귀속)
+    """
+    rolled = cube.groupby(by, observed=True)[CUBE_MEASURES].sum()
+    rolled['avg_rating'] = rolled['review_sum'] / rolled['review_count'].where(rolled['review_count'] > 0)
+    return rolled
+
+
+def save_cube(cube, path):
+    """큐브 Parquet 저장 (pyarrow가 없으면 False)"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    cube.to_parquet(path, engine='pyarrow', index=False)
+    return True
+
+
+def load_cube_file(path):
+    """저장된 큐브 로드 (없거나 읽기 실패 시 None)"""
+    if not os.path.exists(path):
+        return None
+    try:
+        cube = pd.read_parquet(path, engine='pyarrow')
+    except Exception as e:
+        print(f"큐브 로드 실패: {e}")
+        return None
+    cube['y_mth'] = cube['y_mth'].astype(str)
+    return cube
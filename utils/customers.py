@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+
+# 코호트 차트에 표시할 최대 경과 개월 수
+MAX_COHORT_MONTHS = 12
+
+# 고객 차원 / 코호트 계산에 필요한 마트 컬럼
+CUSTOMER_COLUMNS = ['customer_unique_id', 'order_id', 'y_mth', 'customer_state', 'payment_value']
+
+
+def _month_ordinals(y_mth):
+    """'YYYY-MM' 값 → (연 × 12 + 월) 정수 배열 (결측은 -1), 고유값만 파싱"""
+    codes, uniques = pd.factorize(y_mth)
+    uniques = pd.Index(uniques).astype(str)
+    ordinals = uniques.str[:4].astype(int) * 12 + uniques.str[5:7].astype(int) - 1
+    return np.where(codes >= 0, np.asarray(ordinals, dtype=np.int64)[codes], -1)
+
+
+def _month_label(ordinal):
+    return f"{ordinal // 12:04d}-{ordinal % 12 + 1:02d}"
+
+
+class CustomerCohorts:
+    """
+    데이터 버전당 한 번 만드는 고객 차원 + 코호트 엔진 (공유 데이터셋 / duckdb 백엔드와 함께 교체)
+    - customers: 고객별 첫 주문 월 / 주문 수 / 누적 결제액 / 거주 주(첫 주문의 주)
+    - 고객 × 활동 월 쌍을 정수 배열로 보관하고 리텐션 / LTV는 bincount로 계산 (고객 단위 루프 없음)
+    - 입력은 CUSTOMER_COLUMNS 컬럼 프레임 (행 단위 마트 또는 주문 단위 집계 모두 가능)
+    """
+
+    def __init__(self, frame):
+        self.customers = pd.DataFrame(
+            columns=['customer_unique_id', 'first_month', 'orders', 'lifetime_spend', 'home_state'])
+        self._pairs = None
+        if frame is None or frame.empty or not all(c in frame.columns for c in CUSTOMER_COLUMNS):
+            return
+
+        month = _month_ordinals(frame['y_mth'])
+        valid = (month >= 0) & frame['customer_unique_id'].notna().to_numpy()
+        if not valid.any():
+            return
+        cust, cust_uniques = pd.factorize(frame['customer_unique_id'][valid])
+        state, state_uniques = pd.factorize(frame['customer_state'][valid], sort=True)
+        order, _ = pd.factorize(frame['order_id'][valid])
+        month = month[valid]
+        spend = frame['payment_value'].to_numpy(dtype=np.float64, na_value=0)[valid]
+        n_customers = len(cust_uniques)
+
+        # 고객 → 첫 주문 월 / 거주 주: (고객, 월, 주) 순 정렬 후 고객별 첫 행
+        # (첫 달에 주가 여럿이면 이름순 첫 주 → 입력 행 순서와 무관하게 백엔드끼리 같은 결과)
+        ordered = np.lexsort((np.where(state >= 0, state, len(state_uniques)), month, cust))
+        starts = np.flatnonzero(np.r_[True, np.diff(cust[ordered]) != 0])
+        first_month = month[ordered][starts]
+        home_state = state[ordered][starts]
+
+        # 주문 수: 결측을 뺀 (고객, 주문) 쌍의 고유값
+        has_order = order >= 0
+        stride = max(int(order.max()) + 1, 1)
+        order_pairs = pd.unique(cust[has_order].astype(np.int64) * stride + order[has_order])
+        orders = np.bincount(order_pairs // stride, minlength=n_customers)
+        lifetime_spend = np.bincount(cust, weights=spend, minlength=n_customers)
+
+        self.first_month = int(first_month.min())
+        self.last_month = int(month.max())
+        span = self.last_month - self.first_month + 1
+        self.month_labels = [_month_label(m) for m in range(self.first_month, self.last_month + 1)]
+        home_labels = np.asarray(state_uniques, dtype=object)
+        self.customers = pd.DataFrame({
+            'customer_unique_id': cust_uniques,
+            'first_month': pd.Categorical.from_codes(first_month - self.first_month, categories=self.month_labels),
+            'orders': orders,
+            'lifetime_spend': lifetime_spend,
+            'home_state': np.where(home_state >= 0, home_labels[np.maximum(home_state, 0)], None),
+        })
+
+        # 고객 × 활동 월 쌍 (코호트 = 첫 주문 월, 경과 개월 = 활동 월 - 첫 주문 월)
+        active, inverse = np.unique(cust.astype(np.int64) * span + (month - self.first_month), return_inverse=True)
+        pair_cust = (active // span).astype(np.int64)
+        self._pairs = {
+            'customer': pair_cust,
+            'cohort': first_month[pair_cust] - self.first_month,
+            'offset': (active % span) - (first_month[pair_cust] - self.first_month),
+            'spend': np.bincount(inverse, weights=spend, minlength=len(active)),
+        }
+        self._cohort = first_month - self.first_month
+        self._span = span
+
+    @property
+    def empty(self):
+        return self._pairs is None
+
+    def _customer_mask(self, selected_state):
+        if not selected_state:
+            return None
+        return self.customers['home_state'].isin(list(selected_state)).to_numpy()
+
+    def _matrix(self, selected_state, weights=None):
+        """(코호트, 경과 개월) 행렬 (weights가 없으면 활동 고객 수, 있으면 그 값의 합) + 코호트별 고객 수"""
+        pairs = self._pairs
+        mask = self._customer_mask(selected_state)
+        keep = slice(None) if mask is None else mask[pairs['customer']]
+        cell = pairs['cohort'][keep] * self._span + pairs['offset'][keep]
+        w = None if weights is None else pairs[weights][keep]
+        matrix = np.bincount(cell, weights=w, minlength=self._span * self._span).reshape(self._span, self._span)
+        cohorts = self._cohort if mask is None else self._cohort[mask]
+        return matrix.astype(np.float64), np.bincount(cohorts, minlength=self._span)
+
+    def _frame(self, matrix, cohort_sizes, max_months):
+        """행렬 → DataFrame (고객이 있는 코호트만, 아직 관측할 수 없는 칸은 NaN)"""
+        max_months = min(max_months, self._span - 1)
+        cohorts = np.arange(self._span)
+        observable = np.arange(max_months + 1)[None, :] <= (self._span - 1 - cohorts)[:, None]
+        values = np.where(observable, matrix[:, :max_months + 1], np.nan)
+        keep = cohort_sizes > 0
+        return pd.DataFrame(
+            values[keep],
+            index=pd.Index(np.asarray(self.month_labels)[keep], name='cohort'),
+            columns=pd.RangeIndex(max_months + 1, name='months_since_first'),
+        )
+
+    def retention(self, selected_state=None, max_months=MAX_COHORT_MONTHS):
+        """코호트 리텐션 (%) - 첫 주문 월 × 경과 개월, 해당 월에 다시 주문한 고객 비율"""
+        if self.empty:
+            return pd.DataFrame()
+        counts, sizes = self._matrix(selected_state)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rate = counts / sizes[:, None] * 100
+        return self._frame(rate, sizes, max_months)
+
+    def ltv(self, selected_state=None, max_months=MAX_COHORT_MONTHS):
+        """코호트 LTV (BRL) - 첫 주문 후 N개월까지의 누적 결제액 / 코호트 고객 수"""
+        if self.empty:
+            return pd.DataFrame()
+        spend, sizes = self._matrix(selected_state, weights='spend')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ltv = np.cumsum(spend, axis=1) / sizes[:, None]
+        return self._frame(ltv, sizes, max_months)
+
+    def cohort_sizes(self, selected_state=None):
+        if self.empty:
+            return pd.Series(dtype=np.int64)
+        _, sizes = self._matrix(selected_state)
+        keep = sizes > 0
+        return pd.Series(sizes[keep], index=pd.Index(np.asarray(self.month_labels)[keep], name='cohort'),
+                         name='customers')
+
+    def summary(self, selected_state=None):
+        """고객 차원 요약 (전체 기간): 고객 수 / 평균 LTV / 평균 주문 수 / 재구매 고객 비율"""
+        customers = self.customers
+        mask = None if self.empty else self._customer_mask(selected_state)
+        if mask is not None:
+            customers = customers[mask]
+        if customers.empty:
+            return {'customers': 0, 'avg_ltv': 0, 'avg_orders': 0, 'repeat_rate': 0}
+        return {
+            'customers': len(customers),
+            'avg_ltv': customers['lifetime_spend'].mean(),
+            'avg_orders': customers['orders'].mean(),
+            'repeat_rate': (customers['orders'] >= 2).mean() * 100,
+        }
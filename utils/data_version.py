@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import hashlib
+
+from utils.pipeline import file_content_hash
+from utils.cube import CUBE_FILE_NAME
+from utils.geo_lookup import GEO_LOOKUP_NAME
+
+# create_mart.py가 빌드를 마칠 때 쓰는 버전 파일 (산출물별 크기 / 수정 시각 / 내용 해시)
+DATA_VERSION_NAME = "dashboard_mart.version"
+
+# 대시보드가 읽는 마트 산출물 (행 데이터 파일 + 파생 아티팩트)
+MART_FILE_NAMES = ["dashboard_mart_parquet", "dashboard_mart.csv"]
+DATA_FILE_NAMES = MART_FILE_NAMES + [CUBE_FILE_NAME, GEO_LOOKUP_NAME]
+
+# 마지막 수정 후 이 시간이 지나기 전에는 쓰는 중으로 보고 버전을 올리지 않음
+SETTLE_SECONDS = 2.0
+
+
+def data_files(base_dir, names=DATA_FILE_NAMES):
+    """마트 산출물 파일 목록 (Parquet 폴더는 하위 파일 전체, 정렬된 절대 경로)"""
+    files = []
+    for name in names:
+        path = os.path.join(base_dir, name)
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, n) for n in names)
+        elif os.path.exists(path):
+            files.append(path)
+    return sorted(files)
+
+
+def _combine(base_dir, memo, files):
+    digest = hashlib.sha256()
+    for path in files:
+        digest.update(f"{os.path.relpath(path, base_dir)}|{memo[path][2]}\n".encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+
+def _load_marker(base_dir):
+    """버전 파일 내용 (없거나 깨졌으면 None)"""
+    try:
+        with open(os.path.join(base_dir, DATA_VERSION_NAME), encoding='utf-8') as f:
+            marker = json.load(f)
+        return marker if isinstance(marker.get('files'), dict) else None
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _read_marker(base_dir):
+    """버전 파일 → {절대 경로: [size, mtime_ns, hash]} (없거나 깨졌으면 빈 dict)"""
+    marker = _load_marker(base_dir)
+    if marker is None:
+        return {}
+    return {os.path.join(base_dir, rel): entry for rel, entry in marker['files'].items()}
+
+
+def write_data_version(base_dir):
+    """
+    마트 산출물의 내용 해시로 데이터 버전을 계산해 버전 파일로 저장 (create_mart.py 빌드 종료 시 호출)
+    - 이전 버전 파일과 크기 / 수정 시각이 같은 파일은 다시 읽지 않음
+    - 임시 파일에 쓴 뒤 교체하므로 대시보드가 쓰는 중인 버전 파일을 읽지 않음
+    """
+    files = data_files(base_dir)
+    if not files:
+        return None
+    memo = _read_marker(base_dir)
+    for path in files:
+        file_content_hash(path, memo)
+    version = _combine(base_dir, memo, files)
+    mart_files = data_files(base_dir, MART_FILE_NAMES)
+
+    marker = {
+        'version': version,
+        # 같은 빌드에서 쓴 행 데이터 파일의 버전 (큐브가 이 마트로 만들어졌는지 확인용)
+        'mart_version': _combine(base_dir, memo, mart_files) if mart_files else None,
+        'files': {os.path.relpath(path, base_dir): memo[path] for path in files},
+    }
+    path = os.path.join(base_dir, DATA_VERSION_NAME)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(marker, f, ensure_ascii=False, indent=2)
+    os.replace(path + ".tmp", path)
+    return version
+
+
+def mart_version(base_dir):
+    """
+    현재 마트 행 데이터 파일(Parquet / CSV)의 내용 버전 (파일이 없으면 None)
+    - 버전 파일의 해시를 재사용하므로 빌드 후 바뀌지 않은 파일은 다시 읽지 않음
+    """
+    files = data_files(base_dir, MART_FILE_NAMES)
+    if not files:
+        return None
+    memo = _read_marker(base_dir)
+    for path in files:
+        file_content_hash(path, memo)
+    return _combine(base_dir, memo, files)
+
+
+def cube_mart_version(base_dir):
+    """
+    집계 큐브 파일이 만들어진 마트 버전 (버전 파일 기준)
+    - 큐브 파일 내용이 버전 파일에 기록된 것과 다르거나(빌드 후 교체됨) 기록이 없으면 None
+    """
+    marker = _load_marker(base_dir)
+    path = os.path.join(base_dir, CUBE_FILE_NAME)
+    entry = (marker or {}).get('files', {}).get(CUBE_FILE_NAME)
+    if entry is None or not os.path.exists(path):
+        return None
+    if file_content_hash(path, {path: entry}) != entry[2]:
+        return None
+    return marker.get('mart_version')
+
+
+class DataVersionWatcher:
+    """
+    로컬 마트 데이터 버전 (갱신 스레드가 주기적으로 호출)
+    - 매번 stat만 하고, 크기 / 수정 시각이 바뀐 파일만 내용을 해시 → 같은 내용으로 다시 써도 버전 유지
+    - create_mart.py가 남긴 버전 파일의 해시를 재사용하므로 빌드 직후에도 마트를 다시 읽지 않음
+    - 마지막 수정 후 settle_seconds 이내(빌드가 아직 쓰는 중)면 이전 버전을 그대로 반환
+    """
+
+    def __init__(self, base_dir, settle_seconds=SETTLE_SECONDS):
+        self.base_dir = base_dir
+        self.settle_seconds = settle_seconds
+        self.version = None
+        self._memo = {}
+
+    def __call__(self):
+        files = data_files(self.base_dir)
+        if not files:
+            return None
+        stats = [os.stat(path) for path in files]
+        if self.version is not None and time.time() - max(s.st_mtime for s in stats) < self.settle_seconds:
+            return self.version
+
+        memo = dict(self._memo)
+        memo.update(_read_marker(self.base_dir))
+        for path in files:
+            file_content_hash(path, memo)
+        self._memo = {path: memo[path] for path in files}
+        self.version = _combine(self.base_dir, self._memo, files)
+        return self.version
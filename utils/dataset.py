@@ -0,0 +1,90 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.compact import decode_ids
+from utils.filter_index import FilterIndex
+from utils.kpi_table import build_kpi_table
+from utils.sketch import DistinctSketches
+from utils.customers import CustomerCohorts
+from utils.spatial_bins import build_spatial_bins
+from utils.timeseries import build_sales_series
+
+
+def _read_only_array(values):
+    """컬럼 값 → 쓰기 금지 배열 (numpy / Categorical / nullable 정수는 버퍼를 잠그고 그 외는 그대로)"""
+    if isinstance(values, pd.Categorical):
+        codes = np.array(values.codes)
+        codes.flags.writeable = False
+        return pd.Categorical.from_codes(codes, dtype=values.dtype)
+    if isinstance(values, pd.arrays.IntegerArray):
+        data, mask = np.array(values._data), np.array(values._mask)
+        data.flags.writeable = mask.flags.writeable = False
+        return pd.arrays.IntegerArray(data, mask)
+    if isinstance(values.dtype, np.dtype):
+        arr = np.array(values)
+        arr.flags.writeable = False
+        return arr
+    return values
+
+
+def read_only_frame(df):
+    """
+    컬럼 버퍼를 쓰기 금지로 잠근 DataFrame
+    - Copy-on-Write가 없는 pandas(2.x 기본 설정)에서 view를 통한 제자리 수정(loc/iloc 대입 등)은
+      ValueError로 실패하여 세션 간 오염을 막음 (pandas 3은 CoW로 수정하는 쪽만 복사됨)
+    - 컬럼 단위로 한 번만 복사하므로 변환 중 추가 메모리는 컬럼 하나 크기
+    """
+    if df is None or df.empty:
+        return df
+    frozen = {}
+    for col in list(df.columns):
+        frozen[col] = pd.Series(_read_only_array(df[col].array), name=col, copy=False)
+    return pd.DataFrame(frozen, copy=False)
+
+
+class SharedDataset:
+    """
+    프로세스 전역 공유 데이터셋 (st.cache_resource 로 프로세스당 하나만 유지)
+    - st.cache_data는 호출마다 pickle 복사본을 돌려주므로 세션 수만큼 마트가 복제됨
+    - 여기서는 읽기 전용 프레임 하나를 두고 세션에는 얕은 복사(view)만 건넴
+      → 세션이 컬럼을 추가하거나 값을 바꿔도 공유 프레임은 바뀌지 않음
+    - filter_index: 로드 시 한 번 만드는 월/주 필터 인덱스 (view는 행 순서가 같으므로 그대로 사용)
+    - cube: 같은 마트로 만든 월 × 주 × 카테고리 집계 큐브 (데이터와 함께 교체되도록 한 객체에 묶음)
+    - kpi_table: 월 / 월 × 주 KPI 표 (전월 / 전년 동월 / 최근 N개월 비교를 조회로 처리)
+    - customers: 고객 차원 + 코호트 리텐션 / LTV 엔진 (필터와 무관, 버전당 한 번)
+    - spatial_bins: 고객 좌표 격자 집계 (해상도별, 고객 밀도 지도용)
+    - sales_series: 일 / 주 / 월 매출 시계열 (전체 + 주별, 시계열 차트 집계 단위 선택용)
+    - sketches: 셀별 고유값 스케치 (approx_distinct일 때만, 여러 주 선택 KPI를 셀 병합으로 근사)
+    - version: 소스 데이터 버전 (필터 결과 / 지표 / 리포트 등 하위 캐시 키에 포함)
+    - id_dictionaries: df를 압축할 때 만든 ID 사전 (정수 코드 → 원래 ID, 이 프레임과 함께 교체)
+    """
+
+    def __init__(self, df, df_geolocation, load_seconds=None, cube=None, version=None, approx_distinct=False,
+                 id_dictionaries=None):
+        self.df = read_only_frame(df)
+        self.id_dictionaries = id_dictionaries or {}
+        self.df_geolocation = read_only_frame(df_geolocation)
+        self.filter_index = FilterIndex(self.df)
+        self.cube = read_only_frame(cube)
+        self.kpi_table = build_kpi_table(self.df)
+        self.sketches = DistinctSketches(self.df) if approx_distinct else None
+        self.customers = CustomerCohorts(self.df)
+        self.spatial_bins = build_spatial_bins(self.df)
+        self.sales_series = build_sales_series(self.df)
+        self.loaded_at = time.time()
+        self.load_seconds = load_seconds
+        self.version = version
+
+    def views(self):
+        """세션용 (df, df_geolocation) 무복사 view"""
+        return self.df.copy(deep=False), self.df_geolocation.copy(deep=False)
+
+    def decode_ids(self, column, codes):
+        """정수 코드 → 원래 ID 값 (이 데이터셋의 ID 사전 사용)"""
+        return decode_ids(self.id_dictionaries, column, codes)
+
+    @property
+    def memory_mb(self):
+        return self.df.memory_usage(deep=True).sum() / 1024 ** 2
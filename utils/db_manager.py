@@ -1,82 +1,339 @@
 import os
+import time
+import hashlib
+import numpy as np
 import pandas as pd
 import streamlit as st
 from streamlit_gsheets import GSheetsConnection
+from utils.cube import CUBE_FILE_NAME, build_cube, load_cube_file
+from utils.compact import compact_mart
+from utils.dataset import SharedDataset
+from utils.query_backend import PandasQueryBackend, DuckDBQueryBackend, selected_backend_name
+from utils.sheets_loader import (
+    DEFAULT_CHUNK_ROWS, DEFAULT_REVISION_SECONDS, SNAPSHOT_DIRNAME, RevisionPoller, backend_from_connection,
+    load_sheet_snapshot
+)
+from utils.refresher import DEFAULT_POLL_SECONDS, DEFAULT_REFRESH_SECONDS, DatasetRefresher
+from utils.data_version import DataVersionWatcher, cube_mart_version, mart_version
+from utils.sketch import distinct_mode
+
+# 백그라운드 갱신 주기 / 소스 변경 확인 주기 (초)
+REFRESH_SECONDS_ENV = "DASHBOARD_REFRESH_SECONDS"
+POLL_SECONDS_ENV = "DASHBOARD_POLL_SECONDS"
+# 첫 로드를 기다리는 동안 로딩 표시를 다시 확인하는 간격 (초)
+LOADING_CHECK_SECONDS = 1.0
+
+def _refresh_settings():
+    return {
+        'refresh_seconds': float(os.environ.get(REFRESH_SECONDS_ENV, DEFAULT_REFRESH_SECONDS)),
+        'poll_seconds': float(os.environ.get(POLL_SECONDS_ENV, DEFAULT_POLL_SECONDS)),
+    }
+
+@st.cache_resource
+def _dataset_refresher():
+    """
+    공유 데이터셋 갱신기 (프로세스당 하나, 첫 스크립트 실행에서 생성)
+    - 첫 로드와 이후 갱신 모두 백그라운드 스레드에서 만들어 교체 → 요청 경로에서는 로드하지 않음
+    - ttl 만료 후 첫 요청이 로드를 기다리는 일이 없음
+    - 소스 데이터 버전(시트 리비전 / 마트 파일 내용 해시)이 바뀔 때만 다시 로드
+    - 시트 연결은 여기(스크립트 스레드)서 한 번만 만들고, 스레드는 그 연결로 만든 백엔드만 사용
+    """
+    watcher = DataVersionWatcher(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    sheet = _sheet_source()
+    poller = None
+    if sheet is not None:
+        settings, conn = sheet
+        poller = RevisionPoller(lambda: backend_from_connection(conn, settings),
+                                float(settings.get('revision_seconds', DEFAULT_REVISION_SECONDS)))
+    return DatasetRefresher(
+        lambda version: _build_shared_dataset(version, sheet), lambda: _source_signature(watcher, poller),
+        name="dataset", **_refresh_settings()
+    ).start()
+
+def _wait_for_first_load(refresher, label):
+    """
+    첫 로드가 끝날 때까지 로딩 표시 (로드는 갱신 스레드가 하고, 여기서는 교체 신호만 기다림)
+    - 첫 로드가 실패하면 None (호출한 쪽에서 오류 표시 / 대체)
+    """
+    if not refresher.loading:
+        return refresher.current
+    with st.spinner(f"{label}를 불러오는 중입니다..."):
+        while refresher.wait(LOADING_CHECK_SECONDS) is None and refresher.loading:
+            pass
+    return refresher.current
+
+def load_shared_dataset():
+    """
+    마트를 프로세스당 한 번만 로드하여 모든 세션이 공유 (읽기 전용)
+    - cache_data와 달리 호출마다 역직렬화 복사본을 만들지 않음
+    - 갱신 중에도 교체 전까지는 이전 버전을 그대로 반환
+    - 첫 로드 중에는 로딩 표시, 첫 로드가 실패했으면 오류를 표시하고 페이지 실행을 멈춤
+    """
+    refresher = _dataset_refresher()
+    shared = _wait_for_first_load(refresher, "데이터")
+    if shared is None:
+        st.error(f"데이터를 불러오는데 실패했습니다: {refresher.last_error}  \n"
+                 f"{refresher.retry_delay():.0f}초 간격으로 다시 시도합니다. 잠시 후 새로고침해 주세요.")
+        st.stop()
+    return shared
+
+def load_data_status():
+    """현재 집계 백엔드의 데이터 버전 / 마지막 갱신 시각·소요 시간 / 갱신 오류"""
+    if selected_backend_name() == 'duckdb':
+        refresher = _duckdb_refresher()
+        if refresher.current is not None:
+            return refresher.status()
+    return _dataset_refresher().status()
+
+def _build_shared_dataset(version, sheet=None):
+    """새 공유 데이터셋 (마트 + 필터 인덱스 + 큐브) - 갱신 스레드에서 실행"""
+    start = time.perf_counter()
+    df, df_geolocation, id_dictionaries, mart_data_version = _load_data_uncached(sheet)
+    cube = _load_or_build_cube(df, mart_data_version)
+    return SharedDataset(df, df_geolocation, load_seconds=time.perf_counter() - start, cube=cube, version=version,
+                         approx_distinct=distinct_mode() == 'approx', id_dictionaries=id_dictionaries)
+
+def _source_signature(watcher, poller=None):
+    """
+    데이터 소스 버전 (갱신 스레드가 주기적으로 확인)
+    - Google Sheets 연결이 있으면 시트 리비전 (revision_seconds 간격으로만 API 호출, 알 수 없으면 None → 갱신 주기로만 갱신)
+    - 없으면 로컬 마트 / 큐브 / 지오 룩업 파일의 내용 해시 (크기·수정 시각이 바뀐 파일만 다시 해시)
+    """
+    if poller is not None:
+        revision = poller()
+        if revision is None:
+            return None
+        return "sheet-" + hashlib.sha256(str(revision).encode('utf-8')).hexdigest()[:12]
+    return watcher()
 
-@st.cache_data(ttl=3600)
 def load_data():
     """
     통합된 단일 데이터 소스(Google Sheets 또는 로컬 CSV)를 로드합니다.
+    - 공유 데이터셋의 무복사 view 반환 (제자리 수정 금지, 필요한 경우 새 프레임을 만들어 사용)
     """
-    df = pd.DataFrame()
-    
-    # 1. Google Sheets 연결 시도
+    return load_shared_dataset().views()
+
+def load_query_backend():
+    """
+    대시보드 집계 백엔드 (환경변수 DASHBOARD_QUERY_BACKEND=pandas|duckdb, 기본값 pandas)
+    - pandas: 공유 데이터셋 view + 필터 인덱스 + 큐브
+    - duckdb: 마트 파일을 SQL로 조회 (행 데이터를 메모리에 올리지 않음), 실패 시 사유를 남기고 pandas로 대체
+    """
+    if selected_backend_name() == 'duckdb':
+        backend = _wait_for_first_load(_duckdb_refresher(), "duckdb 백엔드")
+        if backend is not None:
+            return backend
+        print("⚠️ duckdb 백엔드를 사용할 수 없어 pandas로 대체합니다.")
+    shared = load_shared_dataset()
+    df, df_geolocation = shared.views()
+    return PandasQueryBackend(
+        df, df_geolocation, shared.cube, shared.filter_index, version=shared.version, kpi_table=shared.kpi_table,
+        sketches=shared.sketches, customers=shared.customers, spatial_bins=shared.spatial_bins,
+        sales_series=shared.sales_series
+    )
+
+@st.cache_resource
+def _duckdb_refresher():
+    """duckdb 백엔드 갱신기 - 마트 파일이 바뀌면 큐브 / 지오 룩업을 다시 읽은 백엔드로 교체"""
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return DatasetRefresher(
+        lambda version: DuckDBQueryBackend(base_dir, version=version), DataVersionWatcher(base_dir),
+        name="duckdb", **_refresh_settings()
+    ).start()
+
+def load_filter_index():
+    """load_data()가 돌려주는 프레임의 필터 인덱스 (월/주 → 행 위치)"""
+    return load_shared_dataset().filter_index
+
+def _load_data_uncached(sheet=None):
+    """
+    (마트, df_geolocation, ID 사전, 마트 파일 버전)
+    - ID 사전은 이 마트의 정수 코드에만 유효
+    - 마트 파일 버전은 로컬 파일을 읽었을 때만 (Google Sheets 데이터는 None)
+    """
+    # 1. Google Sheets (리비전 기준 로컬 스냅샷 + 청크 병렬 읽기)
+    df = _load_sheet_data(sheet)
+    if df is not None:
+        # ID 정수 코드 / category / 숫자 타입 축소
+        df, id_dictionaries = compact_mart(df, return_ids=True)
+        
+        # Geolocation 데이터 분리 (dashboard.py에서 df_geolocation을 따로 요구함)
+        df_geolocation = _build_geolocation_frame(df)
+        
+        return df, df_geolocation, id_dictionaries, None
+        
+    # 2. 로컬 파일 폴백 (dashboard_mart.csv 사용) - 읽기 전에 파일 버전 기록
+    data_version = mart_version(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return load_data_local(return_ids=True) + (data_version,)
+
+def _load_sheet_data(sheet):
+    """
+    _sheet_source()의 (설정, 연결)로 시트 로드 (연결이 없거나 실패하면 None, 사유는 로그로 남김)
+    - 시트 리비전이 바뀌지 않았으면 .sheet_snapshot/ 의 Parquet 스냅샷을 그대로 사용
+    """
+    if sheet is None:
+        return None
+
+    settings, conn = sheet
     try:
-        # secrets에 설정이 있는지 확인
-        if "connections" in st.secrets and "gsheets" in st.secrets["connections"]:
-            conn = st.connection("gsheets", type=GSheetsConnection)
-            
-            # 단일 시트 'data' (또는 첫 번째 시트) 읽기
-            # 사용자가 파일 하나만 올렸으므로 복잡한 로직 불필요
-            df = conn.read()  # 기본적으로 첫 번째 시트를 읽음
-            
-            # 날짜 컬럼 형변환 (CSV/Sheet 로드 시 문자열로 될 수 있음)
-            time_cols = ['order_date', 'order_delivered_customer_date', 'order_estimated_delivery_date']
-            for col in time_cols:
-                if col in df.columns:
-                    df[col] = pd.to_datetime(df[col], errors='coerce')
-            
-            # Geolocation 데이터 분리 (dashboard.py에서 df_geolocation을 따로 요구함)
-            # 여기서는 이미 join된 상태이므로, df에서 중복을 제거하여 geo정보만 추출
-            df_geolocation = df[['customer_state', 'customer_lat', 'customer_lng']].drop_duplicates().rename(columns={
-                'customer_state': 'geolocation_state',
-                'customer_lat': 'geolocation_lat', # 차트 호환성 유지
-                'customer_lng': 'geolocation_lng'
-            })
-            
-            return df, df_geolocation
-            
+        backend = backend_from_connection(conn, settings)
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        df, source = load_sheet_snapshot(
+            backend, os.path.join(base_dir, SNAPSHOT_DIRNAME),
+            chunk_rows=int(settings.get('chunk_rows', DEFAULT_CHUNK_ROWS)),
+            max_workers=int(settings.get('max_workers', 4))
+        )
     except Exception as e:
-        # 에러 발생 시 로깅만 하고 로컬 파일로 넘어감
-        pass
-        
-    # 2. 로컬 파일 폴백 (dashboard_mart.csv 사용)
-    return load_data_local()
+        print(f"⚠️ Google Sheets 로드 실패, 로컬 파일로 대체합니다: {type(e).__name__}: {e}")
+        return None
+
+    if df.empty:
+        print("⚠️ Google Sheets가 비어 있어 로컬 파일로 대체합니다.")
+        return None
+    print(f"✅ Google Sheets 데이터 사용 ({source}, {len(df):,} rows)")
+    return df
+
+def _sheet_settings():
+    """secrets의 connections.gsheets 설정 (없으면 None)"""
+    try:
+        return dict(st.secrets["connections"]["gsheets"])
+    except Exception:
+        return None
+
+def _sheet_source():
+    """
+    (시트 설정, 연결) - 스크립트 스레드에서 만듦 (설정이 없거나 연결에 실패하면 None → 로컬 파일 사용)
+    - backend = "local"이면 연결 없이 로컬 CSV를 시트처럼 사용
+    - 서비스 계정 설정이면 gspread로 직접 열므로 연결을 만들지 않음 (공개 URL만 st.connection 사용)
+    """
+    settings = _sheet_settings()
+    if settings is None:
+        print("ℹ️ Google Sheets 설정이 없어 로컬 파일을 사용합니다.")
+        return None
+    try:
+        direct = settings.get('backend') == 'local' or settings.get('type') == 'service_account'
+        conn = None if direct else st.connection("gsheets", type=GSheetsConnection)
+    except Exception as e:
+        print(f"⚠️ Google Sheets 연결 실패, 로컬 파일로 대체합니다: {type(e).__name__}: {e}")
+        return None
+    return settings, conn
 
-def load_data_local():
-    """로컬 dashboard_mart.csv 파일에서 데이터 로드"""
+def load_data_local(columns=None, months=None, base_dir=None, compact=True, return_ids=False):
+    """
+    로컬 마트 데이터 로드
+    - dashboard_mart_parquet (y_mth 파티션) 이 있으면 우선 사용: 필요한 컬럼/월만 읽고 날짜 파싱 불필요
+    - 없거나 읽기 실패 시 dashboard_mart.csv 로 폴백
+    - base_dir: 마트 파일 폴더 (기본값: 대시보드 루트, 벤치마크 등에서 지정)
+    - compact: ID 정수 코드 / category / 숫자 타입 축소 적용 (utils/compact.py)
+    - return_ids: (df, df_geolocation, ID 사전) 반환 (압축하지 않았으면 빈 사전)
+    - 마트 파일이 없으면 FileNotFoundError (갱신 스레드에서 실행되므로 화면 오류 표시는 load_shared_dataset이 담당)
+    """
     # 현재 파일 위치: 06_dashboard/utils/db_manager.py
     # 목표 파일 위치: 06_dashboard/dashboard_mart.csv
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    base_dir = base_dir or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     file_path = os.path.join(base_dir, "dashboard_mart.csv")
-    
-    if not os.path.exists(file_path):
-        st.error(f"데이터 파일을 찾을 수 없습니다: {file_path}")
-        return pd.DataFrame(), pd.DataFrame()
-        
-    df = pd.read_csv(file_path)
-    
-    # 날짜 형변환
-    time_cols = ['order_date', 'order_delivered_customer_date', 'order_estimated_delivery_date']
-    for col in time_cols:
-        if col in df.columns:
-            df[col] = pd.to_datetime(df[col], errors='coerce')
+    parquet_dir = os.path.join(base_dir, "dashboard_mart_parquet")
+
+    df = None
+    if os.path.isdir(parquet_dir):
+        df = _read_parquet_mart(parquet_dir, columns, months)
+
+    if df is None:
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"데이터 파일을 찾을 수 없습니다: {file_path}")
+
+        df = pd.read_csv(file_path, usecols=_with_geo_columns(columns))
+        if months:
+            df = df[df['y_mth'].isin(months)]
+
+        # 날짜 형변환
+        time_cols = ['order_date', 'order_delivered_customer_date', 'order_estimated_delivery_date']
+        for col in time_cols:
+            if col in df.columns:
+                df[col] = pd.to_datetime(df[col], errors='coerce')
+
+    id_dictionaries = {}
+    if compact:
+        df, id_dictionaries = compact_mart(df, return_ids=True)
             
     # Geo 정보 추출 (unique State list 생성을 위해 필요)
-    df_geolocation = df[['customer_state', 'customer_lat', 'customer_lng']].drop_duplicates().rename(columns={
-        'customer_state': 'geolocation_state'
-    })
+    df_geolocation = _build_geolocation_frame(df)
     
+    if return_ids:
+        return df, df_geolocation, id_dictionaries
     return df, df_geolocation
 
-def apply_filters(df, selected_month, selected_state):
+def _build_geolocation_frame(df):
+    """
+    df_geolocation 생성 - 마트에서 중복을 제거한 고객 위치 (주, 위도, 경도)
+    - 마트 좌표는 create_mart.py가 zip prefix 룩업으로 채운 값이므로 룩업 아티팩트를 따로 읽지 않음
+    """
+    return df[['customer_state', 'customer_lat', 'customer_lng']].drop_duplicates().rename(columns={
+        'customer_state': 'geolocation_state',
+        'customer_lat': 'geolocation_lat', # 차트 호환성 유지
+        'customer_lng': 'geolocation_lng'
+    })
+
+def _with_geo_columns(columns):
+    """요청 컬럼에 월 필터/df_geolocation 생성에 필요한 컬럼을 추가 (None이면 전체 컬럼)"""
+    if columns is None:
+        return None
+    required_cols = ['y_mth', 'customer_state', 'customer_lat', 'customer_lng']
+    return list(columns) + [c for c in required_cols if c not in columns]
+
+def _read_parquet_mart(parquet_dir, columns=None, months=None):
+    """Parquet 마트 읽기 (컬럼/파티션 프루닝). 실패 시 None 반환 → CSV 폴백"""
+    try:
+        filters = [('y_mth', 'in', list(months))] if months else None
+        df = pd.read_parquet(parquet_dir, engine='pyarrow', columns=_with_geo_columns(columns), filters=filters)
+    except Exception as e:
+        print(f"Parquet 마트 로드 실패, CSV로 대체합니다: {e}")
+        return None
+
+    # 파티션 컬럼은 category로 복원되므로 기존 코드와 동일하게 문자열로 맞춤
+    if 'y_mth' in df.columns:
+        df['y_mth'] = df['y_mth'].astype(str)
+    return df
+
+def load_cube():
+    """월 × 주 × 카테고리 집계 큐브 (공유 데이터셋과 함께 갱신)"""
+    return load_shared_dataset().cube
+
+def _load_or_build_cube(df, mart_data_version=None):
+    """
+    월 × 주 × 카테고리 집계 큐브 로드
+    - create_mart.py가 만든 dashboard_cube.parquet은 로드한 마트 파일과 같은 빌드일 때만 사용
+      (버전 파일에 기록된 큐브의 마트 버전 == mart_data_version)
+    - Google Sheets 데이터, 큐브 / 버전 파일이 없거나 버전이 다르면 마트로부터 생성
+    """
+    if df.empty:
+        return pd.DataFrame()
+
+    if mart_data_version is not None:
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        if cube_mart_version(base_dir) == mart_data_version:
+            cube = load_cube_file(os.path.join(base_dir, CUBE_FILE_NAME))
+            if cube is not None:
+                return cube
+        print("ℹ️ 집계 큐브가 로드한 마트와 같은 빌드인지 확인할 수 없어 마트로부터 다시 만듭니다.")
+    return build_cube(df)
+
+def apply_filters(df, selected_month, selected_state, filter_index=None):
+    """
+    월/지역 필터 적용 (공유 프레임을 복사하거나 수정하지 않음)
+    - filter_index가 있으면 행 위치 배열의 교집합으로 take (컬럼 전체 비교 없음)
+    - 없으면 조건을 하나의 마스크로 합쳐 한 번만 인덱싱, 필터가 없으면 입력 view를 그대로 반환
+    """
     if df.empty: return df
-    filtered_df = df.copy()
+    if filter_index is not None:
+        return filter_index.take(df, {'y_mth': selected_month, 'customer_state': selected_state})
+
+    mask = np.ones(len(df), dtype=bool)
     
     if selected_month != 'All':
-        filtered_df = filtered_df[filtered_df['y_mth'] == selected_month]
+        mask &= (df['y_mth'] == selected_month).to_numpy()
         
     if selected_state:
-        filtered_df = filtered_df[filtered_df['customer_state'].isin(selected_state)]
+        mask &= df['customer_state'].isin(selected_state).to_numpy()
         
-    return filtered_df
+    return df if mask.all() else df[mask]
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+# 기본 인덱스 차원 (사이드바 필터)
+DEFAULT_DIMENSIONS = ['y_mth', 'customer_state']
+
+
+def _postings(values):
+    """컬럼 값별 행 위치 배열 {값: 정렬된 int32 위치} (정렬 한 번으로 전체 값 처리)"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, labels = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, labels = pd.factorize(values, use_na_sentinel=True)
+    order = np.argsort(codes, kind='stable').astype(np.int32)
+    counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+    # 결측값(-1)은 정렬 후 맨 앞에 모이므로 건너뜀
+    offsets = np.concatenate([[0], np.cumsum(counts)]) + int((codes < 0).sum())
+    return {
+        labels[i]: order[offsets[i]:offsets[i + 1]]
+        for i in range(len(labels)) if counts[i]
+    }
+
+
+class FilterIndex:
+    """
+    데이터 로드 시 한 번 만드는 필터 인덱스 (차원별 값 → 행 위치 배열)
+    - 필터는 값 목록의 위치 배열을 합치고(union) 차원 간에는 교집합을 구해 take 인덱스로 해석
+    - 재실행마다 전체 컬럼을 비교(==, isin)하지 않음
+    - add_dimension으로 카테고리/도시 등 차원을 추가해도 해당 컬럼만 한 번 훑음
+    """
+
+    def __init__(self, df, dimensions=DEFAULT_DIMENSIONS):
+        self.n_rows = len(df)
+        self.postings = {}
+        for dim in dimensions:
+            if dim in df.columns:
+                self.add_dimension(df, dim)
+
+    def add_dimension(self, df, dim):
+        self.postings[dim] = _postings(df[dim])
+
+    def dimension_values(self, dim):
+        return sorted(self.postings[dim])
+
+    def _positions_for(self, dim, values):
+        postings = self.postings[dim]
+        arrays = [postings[v] for v in values if v in postings]
+        if not arrays:
+            return np.empty(0, dtype=np.int32)
+        if len(arrays) == 1:
+            return arrays[0]
+        return np.sort(np.concatenate(arrays))
+
+    def resolve(self, filters):
+        """
+        {차원: 값 또는 값 목록} → 행 위치 배열 (오름차순). 조건이 없으면 None (전체 행)
+        - 'All' / None / 빈 목록은 조건 없음으로 취급
+        """
+        selected = []
+        for dim, values in filters.items():
+            if values is None or values == 'All':
+                continue
+            if isinstance(values, str) or not hasattr(values, '__iter__'):
+                values = [values]
+            values = list(values)
+            if not values:
+                continue
+            if dim not in self.postings:
+                raise KeyError(f"인덱스에 없는 필터 차원입니다: {dim}")
+            selected.append(self._positions_for(dim, values))
+
+        if not selected:
+            return None
+        selected.sort(key=len)
+        positions = selected[0]
+        for other in selected[1:]:
+            positions = np.intersect1d(positions, other, assume_unique=True)
+        return positions
+
+    def take(self, df, filters):
+        """필터 결과 행만 담은 프레임 (조건이 없으면 입력 그대로)"""
+        if len(df) != self.n_rows:
+            raise ValueError("필터 인덱스와 데이터 행 수가 다릅니다.")
+        positions = self.resolve(filters)
+        if positions is None:
+            return df
+        return df.take(positions)
@@ -0,0 +1,146 @@
+import os
+import numpy as np
+import pandas as pd
+
+GEO_LOOKUP_NAME = "geo_lookup.npz"
+GEO_LOOKUP_VERSION = 1  # 저장 포맷/생성 로직이 바뀌면 올려서 기존 아티팩트를 무효화
+
+
+class ZipGeoLookup:
+    """
+    우편번호 앞자리(zip prefix) → (위도, 경도, 주) 룩업 테이블
+    - zip prefix 기준 정렬된 배열로 저장하고 np.searchsorted(이진 탐색)로 조회
+    - 주(state)는 코드 배열 + 주 목록으로 압축 저장
+    """
+
+    def __init__(self, zip_prefix, lat, lng, state_codes, states):
+        self.zip_prefix = np.asarray(zip_prefix, dtype=np.int64)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lng = np.asarray(lng, dtype=np.float64)
+        self.state_codes = np.asarray(state_codes, dtype=np.int16)
+        self.states = np.asarray(states, dtype=str)
+
+    def __len__(self):
+        return len(self.zip_prefix)
+
+    def _positions(self, zips):
+        """조회 대상 zip의 배열 위치 (없는 zip / 결측값은 -1)"""
+        values = pd.to_numeric(pd.Series(zips), errors='coerce').to_numpy(dtype=np.float64)
+        positions = np.full(len(values), -1, dtype=np.int64)
+        valid = ~np.isnan(values)
+        keys = values[valid].astype(np.int64)
+
+        if len(self.zip_prefix) == 0:
+            return positions
+
+        pos = np.minimum(np.searchsorted(self.zip_prefix, keys), len(self.zip_prefix) - 1)
+        found = self.zip_prefix[pos] == keys
+        positions[np.flatnonzero(valid)[found]] = pos[found]
+        return positions
+
+    def lookup_coords(self, zips):
+        """zip 배열 → (lat, lng) 배열 (없는 zip은 NaN)"""
+        positions = self._positions(zips)
+        hit = positions >= 0
+        lat = np.full(len(positions), np.nan)
+        lng = np.full(len(positions), np.nan)
+        lat[hit] = self.lat[positions[hit]]
+        lng[hit] = self.lng[positions[hit]]
+        return lat, lng
+
+    def lookup_states(self, zips):
+        """zip 배열 → 주(state) 배열 (없는 zip은 None)"""
+        positions = self._positions(zips)
+        result = np.full(len(positions), None, dtype=object)
+        hit = positions >= 0
+        codes = self.state_codes[positions[hit]]
+        result[hit] = np.where(codes >= 0, self.states[np.maximum(codes, 0)], None)
+        return result
+
+    def to_frame(self):
+        """df_geolocation 형태의 DataFrame (geolocation_state / lat / lng)"""
+        state = pd.Categorical.from_codes(self.state_codes, categories=self.states)
+        return pd.DataFrame({
+            'geolocation_zip_code_prefix': self.zip_prefix,
+            'geolocation_state': state,
+            'geolocation_lat': self.lat,
+            'geolocation_lng': self.lng
+        })
+
+    def save(self, path, source_fingerprint):
+        np.savez(
+            path,
+            version=np.int64(GEO_LOOKUP_VERSION),
+            source_size=np.int64(source_fingerprint[0]),
+            source_mtime_ns=np.int64(source_fingerprint[1]),
+            zip_prefix=self.zip_prefix,
+            lat=self.lat,
+            lng=self.lng,
+            state_codes=self.state_codes,
+            states=self.states
+        )
+
+    @classmethod
+    def load(cls, path):
+        """아티팩트 로드 → (lookup, source_fingerprint). 버전이 다르면 (None, None)"""
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['version']) != GEO_LOOKUP_VERSION:
+                return None, None
+            lookup = cls(data['zip_prefix'], data['lat'], data['lng'], data['state_codes'], data['states'])
+            return lookup, (int(data['source_size']), int(data['source_mtime_ns']))
+
+
+def source_fingerprint(source_path):
+    """원본 geolocation.csv 변경 감지용 (파일 크기, 수정 시각)"""
+    stat = os.stat(source_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def build_geo_lookup(source_path):
+    """geolocation.csv → ZipGeoLookup (zip prefix별 첫 번째 좌표/주, 기존 groupby.first와 동일)"""
+    geo = pd.read_csv(
+        source_path,
+        usecols=['geolocation_zip_code_prefix', 'geolocation_lat', 'geolocation_lng', 'geolocation_state']
+    )
+    geo_agg = geo.groupby('geolocation_zip_code_prefix')[['geolocation_lat', 'geolocation_lng', 'geolocation_state']].first()
+    state = pd.Categorical(geo_agg['geolocation_state'])
+
+    # groupby 결과는 zip prefix 오름차순 → 이진 탐색용으로 그대로 사용
+    return ZipGeoLookup(
+        zip_prefix=geo_agg.index.to_numpy(),
+        lat=geo_agg['geolocation_lat'].to_numpy(),
+        lng=geo_agg['geolocation_lng'].to_numpy(),
+        state_codes=state.codes,
+        states=state.categories.astype(str)
+    )
+
+
+def load_geo_lookup(artifact_path):
+    """저장된 아티팩트만 로드 (원본 없이 대시보드에서 사용). 없거나 버전이 다르면 None"""
+    if not os.path.exists(artifact_path):
+        return None
+    try:
+        lookup, _ = ZipGeoLookup.load(artifact_path)
+    except Exception as e:
+        print(f"지역 룩업 로드 실패: {e}")
+        return None
+    return lookup
+
+
+def load_or_build_geo_lookup(source_path, artifact_path):
+    """
+    아티팩트가 최신이면 로드, 원본 파일이 바뀌었거나 버전이 다르면 재생성 후 저장
+    """
+    fingerprint = source_fingerprint(source_path)
+    if os.path.exists(artifact_path):
+        try:
+            lookup, saved_fingerprint = ZipGeoLookup.load(artifact_path)
+            if lookup is not None and saved_fingerprint == fingerprint:
+                return lookup
+        except Exception as e:
+            print(f"지역 룩업 아티팩트 손상, 재생성합니다: {e}")
+
+    print("🗺️ 지역 룩업 아티팩트 생성 중...")
+    lookup = build_geo_lookup(source_path)
+    lookup.save(artifact_path, fingerprint)
+    return lookup
@@ -0,0 +1,189 @@
+import io
+import os
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import pandas as pd
+
+from utils.geo_lookup import load_or_build_geo_lookup
+
+# 원본 파일별 읽기 스키마 (마트 생성에 실제로 쓰이는 컬럼만)
+SOURCE_SCHEMAS = {
+    'orders': {
+        'file': "orders.csv",
+        'dtype': {
+            'order_id': str,
+            'customer_id': str,
+            'order_purchase_timestamp': str,
+            'order_delivered_customer_date': str,
+            'order_estimated_delivery_date': str,
+        },
+    },
+    'items': {
+        'file': "order_items.csv",
+        'dtype': {
+            'order_id': str,
+            'product_id': str,
+            'price': 'float64',
+            'freight_value': 'float64',
+        },
+    },
+    'products': {
+        'file': "products.csv",
+        'dtype': {
+            'product_id': str,
+            'product_category_name': str,
+        },
+    },
+    'reviews': {
+        'file': "order_reviews.csv",
+        'dtype': {
+            'order_id': str,
+            'review_score': 'float64',
+        },
+    },
+    'customers': {
+        'file': "customers.csv",
+        'dtype': {
+            'customer_id': str,
+            'customer_unique_id': str,
+            'customer_zip_code_prefix': 'Int64',
+            'customer_state': str,
+        },
+    },
+    'cat_trans': {
+        'file': "product_category_name_translation.csv",
+        'dtype': {
+            'product_category_name': str,
+            'product_category_name_english': str,
+        },
+    },
+}
+
+GEO_SOURCE_FILE = "geolocation.csv"
+
+# 뒤에 행이 추가되기만 하는 사실 테이블 (증분 빌드는 이전 크기 이후의 바이트만 읽음)
+FACT_SOURCES = ('orders', 'items', 'reviews')
+
+# 사실 테이블 지문에 쓰는 파일 끝부분 크기
+TAIL_BYTES = 64 * 1024
+
+
+def read_source(data_dir, name, **kwargs):
+    """스키마(usecols/dtype)를 적용하여 원본 CSV 하나를 읽음 (chunksize 등 추가 인자 전달 가능)"""
+    schema = SOURCE_SCHEMAS[name]
+    return pd.read_csv(
+        os.path.join(data_dir, schema['file']),
+        usecols=list(schema['dtype']),
+        dtype=schema['dtype'],
+        **kwargs
+    )
+
+
+def read_source_since(data_dir, name, offset, end=None):
+    """원본 CSV에서 [offset, end) 바이트(줄 경계)에 추가된 행만 읽음 (헤더는 파일 첫 줄 사용)"""
+    schema = SOURCE_SCHEMAS[name]
+    with open(os.path.join(data_dir, schema['file']), 'rb') as f:
+        header = f.readline()
+        start = max(offset, len(header))
+        f.seek(start)
+        body = f.read() if end is None else f.read(max(end - start, 0))
+    return pd.read_csv(io.BytesIO(header + body), usecols=list(schema['dtype']), dtype=schema['dtype'])
+
+
+def _hash_range(path, start, end):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = f.read(min(remaining, 1024 * 1024))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path, full=True):
+    """
+    증분 빌드용 파일 지문 {'size', 'hash'}
+    - full=True: 파일 전체 해시 (차원 테이블), False: 끝부분 TAIL_BYTES만 해시 (사실 테이블, 크기와 무관하게 저렴)
+    """
+    size = os.path.getsize(path)
+    start = 0 if full else max(0, size - TAIL_BYTES)
+    return {'size': size, 'hash': _hash_range(path, start, size), 'full': full}
+
+
+def appended_only(path, fingerprint):
+    """
+    지문을 만든 뒤 파일 끝에 행만 추가되었는지 (이전 크기까지의 바이트가 그대로이고 추가분이 줄 경계에서 시작)
+    - 끝부분 지문은 중간 행 수정을 잡지 못하므로 사실 테이블은 추가 전용으로 쓴다는 전제
+    """
+    size, old_size = os.path.getsize(path), fingerprint['size']
+    if size < old_size:
+        return False
+    start = 0 if fingerprint.get('full', True) else max(0, old_size - TAIL_BYTES)
+    if _hash_range(path, start, old_size) != fingerprint['hash']:
+        return False
+    if size > old_size and old_size > 0:
+        with open(path, 'rb') as f:
+            f.seek(old_size - 1)
+            return f.read(1) == b'\n'
+    return True
+
+
+def source_fingerprints(data_dir):
+    """원본 이름 → 파일 지문 (사실 테이블은 끝부분, 차원 테이블은 전체 해시)"""
+    return {name: file_fingerprint(path, full=name not in FACT_SOURCES)
+            for name, path in source_paths(data_dir).items()}
+
+
+def _timed_read(data_dir, name):
+    start = time.perf_counter()
+    df = read_source(data_dir, name)
+    return name, df, time.perf_counter() - start
+
+
+def _timed_geo_lookup(data_dir, geo_lookup_path):
+    start = time.perf_counter()
+    lookup = load_or_build_geo_lookup(os.path.join(data_dir, GEO_SOURCE_FILE), geo_lookup_path)
+    return 'geo', lookup, time.perf_counter() - start
+
+
+def source_paths(data_dir):
+    """원본 이름 → 파일 경로 (geolocation은 'geo')"""
+    paths = {name: os.path.join(data_dir, schema['file']) for name, schema in SOURCE_SCHEMAS.items()}
+    paths['geo'] = os.path.join(data_dir, GEO_SOURCE_FILE)
+    return paths
+
+
+def ingest_sources(data_dir, geo_lookup_path, max_workers=None, use_processes=False, names=None):
+    """
+    원본 파일 병렬 로드
+    - 파일별로 스레드(기본) 또는 프로세스 풀에서 동시에 읽음
+    - geolocation은 zip prefix 룩업 아티팩트 로드/재생성 작업으로 함께 실행
+    - names: 읽을 원본 이름 목록 (기본값: 전체, geolocation은 'geo')
+    - 파일별 소요 시간을 출력하고 {name: DataFrame/lookup} 과 {name: seconds} 반환
+    """
+    names = list(SOURCE_SCHEMAS) + ['geo'] if names is None else list(names)
+    executor_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    max_workers = max_workers or min(len(names), os.cpu_count() or 1)
+
+    start = time.perf_counter()
+    src, timings = {}, {}
+    with executor_cls(max_workers=max_workers) as executor:
+        futures = [executor.submit(_timed_read, data_dir, name) for name in names if name != 'geo']
+        if 'geo' in names:
+            futures.append(executor.submit(_timed_geo_lookup, data_dir, geo_lookup_path))
+        for future in futures:
+            name, data, elapsed = future.result()
+            src[name], timings[name] = data, elapsed
+
+    for name, elapsed in sorted(timings.items(), key=lambda x: -x[1]):
+        file_name = SOURCE_SCHEMAS[name]['file'] if name in SOURCE_SCHEMAS else GEO_SOURCE_FILE
+        print(f"   ⏱️ {file_name:<42} {elapsed:6.2f}s ({len(src[name]):,} rows)")
+    print(f"   ⏱️ 전체 로드 {time.perf_counter() - start:.2f}s ({executor_cls.__name__}, workers={max_workers})")
+
+    return src, timings
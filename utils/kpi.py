@@ -0,0 +1,325 @@
+import numpy as np
+import pandas as pd
+
+NS_PER_DAY = 86_400 * 10 ** 9
+
+
+def value_codes(values):
+    """
+    컬럼 → (0 이상 정수 코드, 결측 마스크, 코드 상한)
+    - category / 압축 ID(int32, nullable Int32)는 코드를 그대로 사용 (해싱 없음, 값 범위가 크면 factorize)
+    - 그 외(문자열 등)는 factorize 한 번
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()
+        missing = codes < 0
+        return np.where(missing, 0, codes), missing, len(values.cat.categories)
+    array = values.array
+    if isinstance(array, pd.arrays.IntegerArray):
+        data, missing = array._data, array._mask
+    elif values.dtype.kind in 'iu':
+        data, missing = values.to_numpy(), np.zeros(len(values), dtype=bool)
+    else:
+        data = None
+    if data is not None and len(data) and data.min() >= 0 and data.max() < max(4 * len(data), 1 << 20):
+        return data, missing, int(data.max()) + 1
+    codes, uniques = pd.factorize(values)
+    missing = codes < 0
+    return np.where(missing, 0, codes), missing, len(uniques)
+
+
+def _distinct(codes, missing, upper):
+    """결측을 뺀 고유값 수"""
+    if not len(codes):
+        return 0
+    return int(np.count_nonzero(np.bincount(codes[~missing], minlength=upper)))
+
+
+def _datetime_values(df, col):
+    return df[col].to_numpy(dtype='datetime64[ns]')
+
+
+class KpiResult:
+    """
+    한 기간(필터 결과)의 KPI - compute_kpis 한 번으로 계산하고 지표 함수 / 대시보드가 나눠 씀
+    - orders / customers / products: 결측을 뺀 고유값 수 (nunique), *_missing: 결측 존재 여부
+      (기존 기간 메트릭의 len(unique())는 결측도 한 값으로 세므로 period_metrics에서 더함)
+    - repeat_customers / customer_groups: 2회 이상 주문 고객 수 / 결측을 뺀 고객 수
+    - shipping_count / review_count: 배송 일수 / 평점 평균에 들어간 행 수 (셀 병합 시 가중치)
+    - approximate: 고유값 수가 스케치 병합으로 얻은 근사값인지 (utils/sketch.py)
+    """
+
+    def __init__(self, n_rows=0, total_sales=0, orders=0, orders_missing=False, customers=0,
+                 customers_missing=False, products=0, products_missing=False, on_time_rate=0,
+                 avg_shipping_days=0, repeat_customers=0, customer_groups=0, avg_review_score=0, states=0,
+                 shipping_count=0, review_count=0, approximate=False):
+        self.n_rows = n_rows
+        self.total_sales = total_sales
+        self.orders = orders
+        self.orders_missing = orders_missing
+        self.customers = customers
+        self.customers_missing = customers_missing
+        self.products = products
+        self.products_missing = products_missing
+        self.on_time_rate = on_time_rate
+        self.avg_shipping_days = avg_shipping_days
+        self.repeat_customers = repeat_customers
+        self.customer_groups = customer_groups
+        self.avg_review_score = avg_review_score
+        self.states = states
+        self.shipping_count = shipping_count
+        self.review_count = review_count
+        self.approximate = approximate
+
+    @property
+    def empty(self):
+        return self.n_rows == 0
+
+    @property
+    def repeat_rate(self):
+        return (self.repeat_customers / self.customer_groups) * 100 if self.customer_groups > 0 else 0
+
+    def period_metrics(self):
+        """_calculate_single_period_metrics 형식"""
+        total_orders = self.orders + int(self.orders_missing)
+        return {
+            'total_amount': self.total_sales,
+            'total_orders': total_orders,
+            'total_customers': self.customers + int(self.customers_missing),
+            'avg_order_value': self.total_sales / total_orders if total_orders > 0 else 0,
+            'total_products': self.products + int(self.products_missing),
+            'on_time_delivery_rate': self.on_time_rate,
+            'avg_shipping_time': self.avg_shipping_days,
+            'repeat_purchase_rate': self.repeat_rate,
+            'avg_review_score': self.avg_review_score
+        }
+
+    def key_summary(self):
+        """get_key_metrics_summary 형식"""
+        return {
+            'total_sales': self.total_sales,
+            'total_orders': self.orders,
+            'total_customers': self.customers,
+            'avg_rating': self.avg_review_score,
+            'total_states': self.states,
+            'repeat_rate': self.repeat_rate
+        }
+
+
+def compute_kpis(df):
+    """
+    필터 결과 프레임의 KPI를 한 번에 계산 (입력 프레임 복사 / 컬럼 추가 없음)
+    - 고유값 수는 정수 코드의 bincount, 재구매는 (고객, 주문) 코드 쌍의 고유값으로 계산
+    - 날짜 비교 / 배송 일수는 datetime64 배열 연산 (NaT는 정시 배송 아님, 배송 일수 평균에서 제외)
+    """
+    if df is None or df.empty:
+        return KpiResult(avg_review_score=np.nan)
+
+    n_rows = len(df)
+    total_sales = df['payment_value'].sum()
+
+    order_codes, order_missing, order_upper = value_codes(df['order_id'])
+    cust_codes, cust_missing, cust_upper = value_codes(df['customer_unique_id'])
+    product_codes, product_missing, product_upper = value_codes(df['product_id'])
+
+    # 재구매: 결측이 아닌 (고객, 주문) 쌍의 고유값 → 고객별 주문 수
+    valid = ~(cust_missing | order_missing)
+    stride = max(order_upper, 1)
+    pairs = pd.unique(cust_codes[valid].astype(np.int64) * stride + order_codes[valid])
+    orders_per_customer = np.bincount(pairs // stride, minlength=cust_upper)
+    repeat_customers = int(np.count_nonzero(orders_per_customer >= 2))
+    customers = _distinct(cust_codes, cust_missing, cust_upper)
+
+    on_time_rate = 0
+    if 'order_delivered_customer_date' in df.columns and 'order_estimated_delivery_date' in df.columns:
+        delivered = _datetime_values(df, 'order_delivered_customer_date')
+        on_time = delivered <= _datetime_values(df, 'order_estimated_delivery_date')
+        on_time_rate = np.count_nonzero(on_time) / n_rows * 100
+
+    avg_shipping_days, shipping_count = 0, 0
+    if 'order_delivered_customer_date' in df.columns and 'order_date' in df.columns:
+        elapsed = _datetime_values(df, 'order_delivered_customer_date') - _datetime_values(df, 'order_date')
+        elapsed = elapsed[~np.isnat(elapsed)].view(np.int64)
+        avg_shipping_days = (elapsed // NS_PER_DAY).mean() if len(elapsed) else np.nan
+        shipping_count = len(elapsed)
+
+    avg_review_score, review_count = 0, 0
+    if 'review_score' in df.columns:
+        # 압축 마트의 float32 평점도 float64로 합산 (그룹별 계산 / duckdb와 같은 정밀도)
+        scores = df['review_score'].to_numpy(dtype=np.float64, na_value=np.nan)
+        scores = scores[~np.isnan(scores)]
+        avg_review_score = scores.mean() if len(scores) else np.nan
+        review_count = len(scores)
+    states = df['customer_state'].nunique() if 'customer_state' in df.columns else 0
+
+    return KpiResult(
+        n_rows=n_rows,
+        total_sales=total_sales,
+        orders=_distinct(order_codes, order_missing, order_upper),
+        orders_missing=bool(order_missing.any()),
+        customers=customers,
+        customers_missing=bool(cust_missing.any()),
+        products=_distinct(product_codes, product_missing, product_upper),
+        products_missing=bool(product_missing.any()),
+        on_time_rate=on_time_rate,
+        avg_shipping_days=avg_shipping_days,
+        repeat_customers=repeat_customers,
+        customer_groups=customers,
+        avg_review_score=avg_review_score,
+        states=states,
+        shipping_count=shipping_count,
+        review_count=review_count
+    )
+
+
+# KpiResult 생성자 필드 (compute_kpis_by 결과 컬럼)
+KPI_FIELDS = ['n_rows', 'total_sales', 'orders', 'orders_missing', 'customers', 'customers_missing', 'products',
+              'products_missing', 'on_time_rate', 'avg_shipping_days', 'repeat_customers', 'customer_groups',
+              'avg_review_score', 'states', 'shipping_count', 'review_count']
+
+
+def _dimension_codes(values):
+    """차원 컬럼 → (코드, 라벨) - 결측은 -1, 라벨은 정렬된 값 (category는 카테고리 순서)"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy().astype(np.int64), values.cat.categories
+    codes, labels = pd.factorize(values, sort=True)
+    return codes.astype(np.int64), pd.Index(labels)
+
+
+def _group_distinct(group, codes, missing, n_groups):
+    """그룹별 (결측을 뺀 고유값 수, 결측 존재 여부)"""
+    keep = ~missing
+    upper = int(codes.max()) + 1 if len(codes) else 1
+    pairs = np.unique(group[keep] * upper + codes[keep])
+    distinct = np.bincount(pairs // upper, minlength=n_groups)
+    return distinct, np.bincount(group[missing], minlength=n_groups) > 0
+
+
+def compute_kpis_by(df, dims):
+    """
+    그룹(차원 목록)별 KPI를 한 번에 계산 → DataFrame (index: 차원 값, columns: KPI_FIELDS)
+    - compute_kpis와 같은 정의 (그룹 하나 = 같은 값으로 필터한 결과), 차원 값이 결측인 행은 제외
+    - 그룹 × 값 정수 키의 np.unique / bincount로 계산 (그룹별 Python 루프 없음)
+    - 행이 있는 그룹만 포함, 순서는 차원 값 정렬 순
+    """
+    dims = list(dims)
+    if df is None or df.empty:
+        return pd.DataFrame(columns=KPI_FIELDS)
+
+    # 차원 코드 → 혼합 진법 그룹 키 → 0..G-1 그룹 번호
+    key = np.zeros(len(df), dtype=np.int64)
+    valid = np.ones(len(df), dtype=bool)
+    labels = []
+    for dim in dims:
+        codes, dim_labels = _dimension_codes(df[dim])
+        valid &= codes >= 0
+        key = key * max(len(dim_labels), 1) + codes
+        labels.append(dim_labels)
+    rows = np.flatnonzero(valid)
+    group_keys, group = np.unique(key[rows], return_inverse=True)
+    group = group.astype(np.int64)
+    n_groups = len(group_keys)
+
+    def column(col):
+        return df[col].iloc[rows] if len(rows) < len(df) else df[col]
+
+    n_rows = np.bincount(group, minlength=n_groups)
+    total_sales = np.bincount(group, weights=column('payment_value').to_numpy(dtype=np.float64, na_value=0),
+                              minlength=n_groups)
+
+    order_codes, order_missing, _ = value_codes(column('order_id'))
+    cust_codes, cust_missing, _ = value_codes(column('customer_unique_id'))
+    product_codes, product_missing, _ = value_codes(column('product_id'))
+    orders, orders_any_missing = _group_distinct(group, order_codes.astype(np.int64), order_missing, n_groups)
+    customers, customers_any_missing = _group_distinct(group, cust_codes.astype(np.int64), cust_missing, n_groups)
+    products, products_any_missing = _group_distinct(group, product_codes.astype(np.int64), product_missing, n_groups)
+
+    # 재구매: (그룹, 고객, 주문) 고유값 → (그룹, 고객)별 주문 수 2 이상
+    both = ~(cust_missing | order_missing)
+    cust_upper = int(cust_codes.max()) + 1 if len(cust_codes) else 1
+    order_upper = int(order_codes.max()) + 1 if len(order_codes) else 1
+    group_customer = group[both] * cust_upper + cust_codes[both]
+    triples = np.unique(group_customer * order_upper + order_codes[both])
+    customer_keys, orders_per_customer = np.unique(triples // order_upper, return_counts=True)
+    repeat_customers = np.bincount(customer_keys[orders_per_customer >= 2] // cust_upper, minlength=n_groups)
+
+    on_time_rate = np.zeros(n_groups)
+    if 'order_delivered_customer_date' in df.columns and 'order_estimated_delivery_date' in df.columns:
+        delivered = column('order_delivered_customer_date').to_numpy(dtype='datetime64[ns]')
+        on_time = delivered <= column('order_estimated_delivery_date').to_numpy(dtype='datetime64[ns]')
+        on_time_rate = np.bincount(group, weights=on_time, minlength=n_groups) / n_rows * 100
+
+    avg_shipping_days, shipping_count = np.zeros(n_groups), np.zeros(n_groups, dtype=np.int64)
+    if 'order_delivered_customer_date' in df.columns and 'order_date' in df.columns:
+        elapsed = (column('order_delivered_customer_date').to_numpy(dtype='datetime64[ns]')
+                   - column('order_date').to_numpy(dtype='datetime64[ns]'))
+        has_elapsed = ~np.isnat(elapsed)
+        days = elapsed[has_elapsed].view(np.int64) // NS_PER_DAY
+        shipping_count = np.bincount(group[has_elapsed], minlength=n_groups)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            avg_shipping_days = np.bincount(group[has_elapsed], weights=days, minlength=n_groups) / shipping_count
+
+    avg_review_score, review_count = np.zeros(n_groups), np.zeros(n_groups, dtype=np.int64)
+    if 'review_score' in df.columns:
+        scores = column('review_score').to_numpy(dtype=np.float64, na_value=np.nan)
+        has_score = ~np.isnan(scores)
+        review_count = np.bincount(group[has_score], minlength=n_groups)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            avg_review_score = np.bincount(group[has_score], weights=scores[has_score], minlength=n_groups) / review_count
+
+    states = np.zeros(n_groups, dtype=np.int64)
+    if 'customer_state' in df.columns:
+        state_codes, state_missing, _ = value_codes(column('customer_state'))
+        states, _ = _group_distinct(group, state_codes.astype(np.int64), state_missing, n_groups)
+
+    # 그룹 키 → 차원별 값
+    levels = []
+    remaining = group_keys
+    for dim_labels in reversed(labels):
+        radix = max(len(dim_labels), 1)
+        levels.append(np.asarray(dim_labels)[remaining % radix] if len(dim_labels) else remaining)
+        remaining = remaining // radix
+    index = pd.MultiIndex.from_arrays(levels[::-1], names=dims) if len(dims) > 1 else \
+        pd.Index(levels[0] if levels else [], name=dims[0] if dims else None)
+
+    return pd.DataFrame({
+        'n_rows': n_rows,
+        'total_sales': total_sales,
+        'orders': orders,
+        'orders_missing': orders_any_missing,
+        'customers': customers,
+        'customers_missing': customers_any_missing,
+        'products': products,
+        'products_missing': products_any_missing,
+        'on_time_rate': on_time_rate,
+        'avg_shipping_days': avg_shipping_days,
+        'repeat_customers': repeat_customers,
+        'customer_groups': customers,
+        'avg_review_score': avg_review_score,
+        'states': states,
+        'shipping_count': shipping_count,
+        'review_count': review_count,
+    }, index=index, columns=KPI_FIELDS)
+
+
+def kpi_results(frame):
+    """compute_kpis_by 결과 → {그룹 값: KpiResult}"""
+    return {key: KpiResult(**dict(zip(KPI_FIELDS, values)))
+            for key, values in zip(frame.index, frame.itertuples(index=False, name=None))}
+
+
+def period_metrics_frame(frame):
+    """compute_kpis_by 결과 → 그룹별 _calculate_single_period_metrics 형식 DataFrame (컬럼 연산)"""
+    total_orders = frame['orders'] + frame['orders_missing'].astype(np.int64)
+    customer_groups = frame['customer_groups']
+    return pd.DataFrame({
+        'total_amount': frame['total_sales'],
+        'total_orders': total_orders,
+        'total_customers': frame['customers'] + frame['customers_missing'].astype(np.int64),
+        'avg_order_value': (frame['total_sales'] / total_orders).where(total_orders > 0, 0),
+        'total_products': frame['products'] + frame['products_missing'].astype(np.int64),
+        'on_time_delivery_rate': frame['on_time_rate'],
+        'avg_shipping_time': frame['avg_shipping_days'],
+        'repeat_purchase_rate': (frame['repeat_customers'] / customer_groups * 100).where(customer_groups > 0, 0),
+        'avg_review_score': frame['avg_review_score'],
+    }, index=frame.index)
@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+
+from utils.kpi import KpiResult, compute_kpis, compute_kpis_by, kpi_results
+from utils.metrics import EMPTY_METRICS
+
+# 비교 기간: (이름, 몇 개월 전, 평균할 개월 수)
+# - prev_month / yoy: 1 / 12개월 전 단일 월
+# - rolling_3 / rolling_6: 선택 월 직전 3 / 6개월의 월 평균 (한 달이라도 없으면 비교하지 않음)
+COMPARISON_PERIODS = [
+    ('prev_month', 1, 1),
+    ('yoy', 12, 1),
+    ('rolling_3', 1, 3),
+    ('rolling_6', 1, 6),
+]
+
+ALL = 'All'
+
+
+def _empty_kpis():
+    return KpiResult(avg_review_score=np.nan)
+
+
+def _shift_month(month, months_back):
+    return (pd.Period(month, freq='M') - months_back).strftime('%Y-%m')
+
+
+class KpiTable:
+    """
+    데이터 버전당 한 번 만드는 월 / 월 × 주 KPI 표 (공유 데이터셋 / duckdb 백엔드와 함께 교체)
+    - cells: {(월 또는 'All', 주 또는 'All'): KpiResult} - 주 하나 / 전체 지역 선택은 O(1) 조회
+    - 여러 주를 고른 경우는 lookup이 None을 돌려주고 호출 쪽이 직접 계산 (고객/주문 고유값은 주끼리 더할 수 없음)
+    - 전월 / 전년 동월 / 최근 3·6개월 평균 비교와 월별 매출 차트가 이 표를 읽음
+    """
+
+    def __init__(self, cells):
+        self.cells = cells
+        self.months = sorted(m for m, s in cells if m != ALL and s == ALL)
+        self.states = sorted(s for m, s in cells if m == ALL and s != ALL)
+
+        # 지역(전체 / 주)별 월 메트릭 표 → 최근 N개월 평균 미리 계산
+        self.monthly = {}
+        self.rolling = {}
+        for state in [ALL] + self.states:
+            frame = pd.DataFrame.from_dict({
+                m: cells[(m, state)].period_metrics() for m in self.months if (m, state) in cells
+            }, orient='index', columns=list(EMPTY_METRICS))
+            self.monthly[state] = frame
+            if frame.empty:
+                continue
+            # 달력 월 기준 (빠진 월은 NaN → 그 월이 포함된 창은 평균하지 않음)
+            calendar = pd.period_range(self.months[0], self.months[-1], freq='M').strftime('%Y-%m')
+            frame = frame.reindex(calendar).astype(np.float64)
+            for _, _, window in COMPARISON_PERIODS:
+                if window > 1:
+                    self.rolling[(state, window)] = frame.rolling(window, min_periods=window).mean().shift(1)
+
+    @staticmethod
+    def _state_key(selected_state):
+        if not selected_state:
+            return ALL
+        if len(selected_state) == 1:
+            return selected_state[0]
+        return None
+
+    def lookup(self, selected_month, selected_state):
+        """(월, 지역) KPI - 주를 둘 이상 고른 경우 None (표에 없는 조합은 빈 결과)"""
+        state = self._state_key(selected_state)
+        if state is None:
+            return None
+        return self.cells.get((selected_month, state)) or _empty_kpis()
+
+    def approximate(self, selected_month, selected_state, sketches):
+        """
+        여러 주 선택 KPI를 주별 셀 병합으로 근사 (행을 다시 훑지 않음)
+        - 매출 / 행 수는 합, 정시 배송률 / 배송 일수 / 평점은 셀 행 수 가중 평균 (정확)
+        - 주문 / 고객 / 상품 고유값은 DistinctSketches 병합 추정 (approximate=True)
+        - 재구매율은 주별 재구매 고객 / 고객 수를 합친 비율 (여러 주에서 산 고객은 주마다 따로 셈)
+        """
+        cells = [self.cells[(selected_month, s)] for s in selected_state if (selected_month, s) in self.cells]
+        if not cells:
+            return _empty_kpis()
+
+        def weighted(attr, weight):
+            total = sum(getattr(c, weight) for c in cells)
+            if total == 0:
+                return np.nan
+            return sum(getattr(c, attr) * getattr(c, weight) for c in cells if getattr(c, weight)) / total
+
+        n_rows = sum(c.n_rows for c in cells)
+        return KpiResult(
+            n_rows=n_rows,
+            total_sales=sum(c.total_sales for c in cells),
+            orders=sketches.distinct('order_id', selected_month, selected_state),
+            orders_missing=any(c.orders_missing for c in cells),
+            customers=sketches.distinct('customer_unique_id', selected_month, selected_state),
+            customers_missing=any(c.customers_missing for c in cells),
+            products=sketches.distinct('product_id', selected_month, selected_state),
+            products_missing=any(c.products_missing for c in cells),
+            on_time_rate=sum(c.on_time_rate * c.n_rows for c in cells) / n_rows,
+            avg_shipping_days=weighted('avg_shipping_days', 'shipping_count'),
+            repeat_customers=sum(c.repeat_customers for c in cells),
+            customer_groups=sum(c.customer_groups for c in cells),
+            avg_review_score=weighted('avg_review_score', 'review_count'),
+            states=len(cells),
+            shipping_count=sum(c.shipping_count for c in cells),
+            review_count=sum(c.review_count for c in cells),
+            approximate=True
+        )
+
+    def monthly_sales(self, state=ALL):
+        """월별 매출 (y_mth, payment_value) - 월별 매출 차트용"""
+        frame = self.monthly.get(state)
+        if frame is None or frame.empty:
+            return pd.DataFrame({'y_mth': [], 'payment_value': []})
+        return pd.DataFrame({'y_mth': frame.index, 'payment_value': frame['total_amount'].to_numpy()})
+
+    def comparisons(self, selected_month, selected_state, kpi_lookup=None):
+        """
+        선택 월의 비교 기간별 메트릭 {이름: 메트릭 dict} (데이터가 없는 기간은 빈 dict)
+        - 주 하나 / 전체 지역은 표 조회, 여러 주는 kpi_lookup(월, 지역)으로 필요한 월만 계산
+        """
+        if selected_month == ALL:
+            return {name: {} for name, _, _ in COMPARISON_PERIODS}
+        state = self._state_key(selected_state)
+        result = {}
+        for name, months_back, window in COMPARISON_PERIODS:
+            if window == 1:
+                kpis = self.lookup(_shift_month(selected_month, months_back), selected_state)
+                if kpis is None and kpi_lookup is not None:
+                    kpis = kpi_lookup(_shift_month(selected_month, months_back), selected_state)
+                result[name] = kpis.period_metrics() if kpis is not None and not kpis.empty else {}
+            elif state is not None:
+                rolling = self.rolling.get((state, window))
+                row = rolling.loc[selected_month] if rolling is not None and selected_month in rolling.index else None
+                result[name] = row.to_dict() if row is not None and not row.isna().all() else {}
+            elif kpi_lookup is not None:
+                frames = [kpi_lookup(_shift_month(selected_month, k), selected_state)
+                          for k in range(months_back, months_back + window)]
+                if any(k.empty for k in frames):
+                    result[name] = {}
+                else:
+                    result[name] = pd.DataFrame([k.period_metrics() for k in frames]).mean().to_dict()
+            else:
+                result[name] = {}
+        return result
+
+
+def build_kpi_table(df):
+    """
+    행 단위 마트 → KpiTable (월 × 주 / 월 / 주 그룹별 KPI를 compute_kpis_by 세 번으로 계산)
+    - 그룹마다 필터 / compute_kpis를 반복하지 않고 그룹 키 배열 연산 한 번씩
+    - 월 / 주 컬럼이 없으면 None
+    """
+    if df is None or df.empty or 'y_mth' not in df.columns or 'customer_state' not in df.columns:
+        return None
+
+    cells = {(ALL, ALL): compute_kpis(df)}
+    cells.update(kpi_results(compute_kpis_by(df, ['y_mth', 'customer_state'])))
+    cells.update({(month, ALL): kpis for month, kpis in kpi_results(compute_kpis_by(df, ['y_mth'])).items()})
+    cells.update({(ALL, state): kpis for state, kpis in kpi_results(compute_kpis_by(df, ['customer_state'])).items()})
+    return KpiTable(cells)
@@ -1,5 +1,15 @@
 import pandas as pd
 
+from utils.kpi import compute_kpis, compute_kpis_by, period_metrics_frame
+
+# 빈 데이터일 때의 단일 기간 메트릭
+EMPTY_METRICS = {
+    'total_amount': 0, 'total_orders': 0, 'total_customers': 0,
+    'avg_order_value': 0, 'total_products': 0,
+    'on_time_delivery_rate': 0, 'avg_shipping_time': 0,
+    'repeat_purchase_rate': 0, 'avg_review_score': 0
+}
+
 def format_number(num):
     """
     숫자를 K, M 단위로 포맷팅하는 함수
@@ -17,24 +27,27 @@ def calculate_delta(current, previous):
         return None
     return ((current - previous) / previous) * 100
 
-def calculate_metrics_with_comparison(filtered_df, selected_month, df, selected_state=[]):
+def previous_month(selected_month):
+    """'YYYY-MM' → 전월 'YYYY-MM'"""
+    prev_date = pd.to_datetime(selected_month, format='%Y-%m') - pd.DateOffset(months=1)
+    return prev_date.strftime('%Y-%m')
+
+def calculate_metrics_with_comparison(filtered_df, selected_month, df, selected_state=[], filter_index=None,
+                                      kpi_lookup=None):
     """
     현재 메트릭과 전월 대비 증감률을 계산하는 함수 (추가 메트릭 포함)
+    - filter_index: df의 필터 인덱스 (있으면 전월 데이터도 인덱스로 조회)
+    - kpi_lookup: (월, 지역) → KpiResult 함수 (있으면 현재/전월 KPI를 여기서 받아 같은 재실행의 다른 지표와 공유)
     """
-    if filtered_df.empty:
+    current = kpi_lookup(selected_month, selected_state) if kpi_lookup else compute_kpis(filtered_df)
+    if current.empty:
         # 빈 데이터프레임 처리
-        empty_metrics = {
-            'total_amount': 0, 'total_orders': 0, 'total_customers': 0,
-            'avg_order_value': 0, 'total_products': 0,
-            'on_time_delivery_rate': 0, 'avg_shipping_time': 0,
-            'repeat_purchase_rate': 0, 'avg_review_score': 0
-        }
-        return empty_metrics, {}, False
+        return dict(EMPTY_METRICS), {}, False
 
     # ========================
     # 현재 메트릭 계산
     # ========================
-    current_metrics = _calculate_single_period_metrics(filtered_df)
+    current_metrics = current.period_metrics()
     
     # ========================
     # 전월 대비 계산
@@ -44,22 +57,29 @@ def calculate_metrics_with_comparison(filtered_df, selected_month, df, selected_
     
     if selected_month != 'All':
         try:
-            # 현재 월을 datetime으로 변환
-            current_date = pd.to_datetime(selected_month, format='%Y-%m')
             # 전월 계산
-            prev_date = current_date - pd.DateOffset(months=1)
-            prev_month = prev_date.strftime('%Y-%m')
+            prev_month = previous_month(selected_month)
             
-            # 전월 데이터가 있는지 확인
-            if prev_month in df['y_mth'].values:
-                # 전월 데이터 필터링 (지역 필터 적용)
-                prev_df = df[df['y_mth'] == prev_month].copy()
+            if kpi_lookup:
+                # 전월 데이터가 없으면 빈 결과
+                prev = kpi_lookup(prev_month, selected_state)
+            elif filter_index is not None:
+                has_prev = prev_month in filter_index.postings['y_mth']
+                prev = compute_kpis(
+                    filter_index.take(df, {'y_mth': prev_month, 'customer_state': selected_state}) if has_prev else None
+                )
+            elif prev_month in df['y_mth'].values:
+                # 전월 데이터 필터링 (지역 필터 적용, 공유 프레임은 복사/수정하지 않음)
+                prev_mask = df['y_mth'] == prev_month
                 if selected_state:  # 지역 필터가 있으면 적용
-                    prev_df = prev_df[prev_df['customer_state'].isin(selected_state)]
-                
-                if not prev_df.empty:
-                    prev_metrics = _calculate_single_period_metrics(prev_df)
-                    can_compare = True
+                    prev_mask &= df['customer_state'].isin(selected_state)
+                prev = compute_kpis(df[prev_mask])
+            else:
+                prev = compute_kpis(None)
+            
+            if not prev.empty:
+                prev_metrics = prev.period_metrics()
+                can_compare = True
         except Exception as e:
             print(f"전월 비교 계산 중 오류: {e}")
             can_compare = False
@@ -67,64 +87,37 @@ def calculate_metrics_with_comparison(filtered_df, selected_month, df, selected_
     return current_metrics, prev_metrics, can_compare
 
 def _calculate_single_period_metrics(df):
-    """단일 기간에 대한 메트릭 계산 (내부 헬퍼 함수)"""
-    total_amount = df.groupby('y_mth')['payment_value'].sum().sum()
-    total_orders = len(df['order_id'].unique())
-    total_customers = len(df['customer_unique_id'].unique())
-    avg_order_value = total_amount / total_orders if total_orders > 0 else 0
-    total_products = len(df['product_id'].unique())
-    
-    # 정시 배송률 (%)
-    df_copy = df.copy() # SettingWithCopyWarning 방지
-    if 'order_delivered_customer_date' in df_copy.columns and 'order_estimated_delivery_date' in df_copy.columns:
-        df_copy['on_time'] = df_copy['order_delivered_customer_date'] <= df_copy['order_estimated_delivery_date']
-        on_time_delivery_rate = df_copy['on_time'].mean() * 100
-    else:
-        on_time_delivery_rate = 0
-        
-    # 평균 배송 소요시간 (일수)
-    if 'order_delivered_customer_date' in df_copy.columns and 'order_date' in df_copy.columns:
-        df_copy['shipping_days'] = (df_copy['order_delivered_customer_date'] - df_copy['order_date']).dt.days
-        avg_shipping_time = df_copy['shipping_days'].mean()
-    else:
-        avg_shipping_time = 0
-    
-    # 재구매율
-    customer_order_counts = df_copy.groupby('customer_unique_id')['order_id'].nunique()
-    repeat_customers = (customer_order_counts >= 2).sum()
-    total_cust_count = len(customer_order_counts)
-    repeat_purchase_rate = (repeat_customers / total_cust_count) * 100 if total_cust_count > 0 else 0
-    
-    # 고객 평균 평점
-    # customer_id가 없는 경우를 대비하여 단순 평균 계산 또는 customer_unique_id 사용
-    if 'review_score' in df_copy.columns:
-        avg_review_score = df_copy['review_score'].mean()
-    else:
-        avg_review_score = 0
-    
-    return {
-        'total_amount': total_amount,
-        'total_orders': total_orders,
-        'total_customers': total_customers,
-        'avg_order_value': avg_order_value,
-        'total_products': total_products,
-        'on_time_delivery_rate': on_time_delivery_rate,
-        'avg_shipping_time': avg_shipping_time,
-        'repeat_purchase_rate': repeat_purchase_rate,
-        'avg_review_score': avg_review_score
-    }
+    """단일 기간에 대한 메트릭 계산 (내부 헬퍼 함수) - utils/kpi.py 단일 패스 계산"""
+    return compute_kpis(df).period_metrics()
+
+def calculate_metrics_by(df, dims):
+    """
+    그룹(차원 목록)별 메트릭을 한 번에 계산 (주 × 월 히트맵 / 리포트 부록 / 정기 내보내기용)
+    - 행: 차원 값 조합 (행이 있는 그룹만), 열: _calculate_single_period_metrics와 같은 키
+    - 각 행은 그 값으로 필터한 결과의 _calculate_single_period_metrics와 같음 (합계는 부동소수 합산 순서 차이만)
+    - 예: calculate_metrics_by(df, ['customer_state', 'y_mth'])
+    """
+    return period_metrics_frame(compute_kpis_by(df, dims))
+
+def get_comparison_metrics(df, filtered_df, all_kpis=None, filtered_kpis=None):
+    """
+    전체 데이터 대비 필터된 데이터 비교
+    - all_kpis / filtered_kpis: 이미 계산한 KpiResult (있으면 프레임을 다시 훑지 않음)
+    """
+    if all_kpis is None:
+        all_kpis = compute_kpis(df)
+    if filtered_kpis is None:
+        filtered_kpis = compute_kpis(filtered_df)
 
-def get_comparison_metrics(df, filtered_df):
-    """전체 데이터 대비 필터된 데이터 비교"""
     # 전체 데이터 지표
-    total_all_sales = df['payment_value'].sum()
-    total_all_orders = df['order_id'].nunique()
-    total_all_customers = df['customer_unique_id'].nunique()
+    total_all_sales = all_kpis.total_sales
+    total_all_orders = all_kpis.orders
+    total_all_customers = all_kpis.customers
     
     # 필터된 데이터 지표
-    total_filtered_sales = filtered_df['payment_value'].sum()
-    total_filtered_orders = filtered_df['order_id'].nunique()
-    total_filtered_customers = filtered_df['customer_unique_id'].nunique()
+    total_filtered_sales = filtered_kpis.total_sales
+    total_filtered_orders = filtered_kpis.orders
+    total_filtered_customers = filtered_kpis.customers
     
     # 비율 계산
     sales_ratio = (total_filtered_sales / total_all_sales) * 100 if total_all_sales > 0 else 0
@@ -139,23 +132,8 @@ def get_comparison_metrics(df, filtered_df):
         'total_filtered_sales': total_filtered_sales
     }
 
-def get_key_metrics_summary(filtered_df):
-    """핵심 지표 계산 - Dict 반환"""
-    total_sales = filtered_df['payment_value'].sum()
-    total_orders = filtered_df['order_id'].nunique()
-    total_customers = filtered_df['customer_unique_id'].nunique()
-    avg_rating = filtered_df['review_score'].mean()
-    total_states = filtered_df['customer_state'].nunique()
-    
-    # 재구매율 계산
-    customer_orders = filtered_df.groupby('customer_unique_id')['order_id'].nunique()
-    repeat_rate = ((customer_orders >= 2).sum() / len(customer_orders)) * 100 if len(customer_orders) > 0 else 0
-    
-    return {
-        'total_sales': total_sales,
-        'total_orders': total_orders,
-        'total_customers': total_customers,
-        'avg_rating': avg_rating,
-        'total_states': total_states,
-        'repeat_rate': repeat_rate
-    }
+def get_key_metrics_summary(filtered_df, kpis=None):
+    """핵심 지표 계산 - Dict 반환 (kpis: 이미 계산한 KpiResult)"""
+    if kpis is None:
+        kpis = compute_kpis(filtered_df)
+    return kpis.key_summary()
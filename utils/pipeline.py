@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import pickle
+import hashlib
+import inspect
+
+import pandas as pd
+
+PIPELINE_CACHE_DIRNAME = ".mart_cache"
+SOURCE_HASH_FILE = "source_hashes.json"
+
+
+class Stage:
+    """
+    파이프라인 단계 정의
+    - inputs: 이 단계가 받는 상위 단계 이름 (func 인자 순서와 동일)
+    - sources: 이 단계가 읽는 원본 이름 (src dict 키, func 인자로 inputs 뒤에 전달)
+    - deps: func가 호출하는 헬퍼 함수 / 클래스 / 모듈, 참조하는 상수 → 소스(상수는 repr)를 코드 해시에 포함
+    - version: deps로 잡을 수 없는 변경(외부 라이브러리 동작 등)이 있을 때 수동으로 올려서 캐시 무효화
+    - cache: False면 디스크 캐시 없이 매번 실행 (자체 아티팩트가 있는 단계 등)
+    """
+
+    def __init__(self, name, func, inputs=(), sources=(), deps=(), version=1, cache=True):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.sources = tuple(sources)
+        self.deps = tuple(deps)
+        self.version = version
+        self.cache = cache
+
+    def code_hash(self):
+        code = "\n".join(_source_text(obj) for obj in (self.func,) + self.deps)
+        return hashlib.sha256(f"{code}|v{self.version}".encode('utf-8')).hexdigest()
+
+
+def _source_text(obj):
+    """함수 / 클래스 / 모듈 → 소스 코드, 그 외(상수 등) → repr"""
+    if not (inspect.isroutine(obj) or inspect.isclass(obj) or inspect.ismodule(obj)):
+        return repr(obj)
+    try:
+        return inspect.getsource(obj)
+    except (OSError, TypeError):
+        return getattr(obj, '__qualname__', obj.__name__)
+
+
+def file_content_hash(path, memo=None):
+    """
+    파일 내용 해시 (sha256)
+    - memo: {path: [size, mtime_ns, hash]} - 크기/수정시각이 같으면 다시 읽지 않음
+    """
+    stat = os.stat(path)
+    cached = (memo or {}).get(path)
+    if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+        return cached[2]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    content_hash = digest.hexdigest()
+    if memo is not None:
+        memo[path] = [stat.st_size, stat.st_mtime_ns, content_hash]
+    return content_hash
+
+
+class StagePipeline:
+    """
+    이름 있는 단계들의 DAG 실행기 (단계별 디스크 캐시)
+    - 단계 키 = sha256(단계 코드 해시 + 원본 파일 내용 해시 + 상위 단계 키)
+    - 키는 출력이 아닌 입력/코드로만 정해지므로 실행 전에 전체 키를 계산하고,
+      캐시가 있는 단계는 (하위 단계가 필요로 할 때만) 디스크에서 읽어옴
+    - source_loader(names) → {name: DataFrame}: 실제로 실행할 단계의 원본만 한 번에 로드
+    - salt: 모든 단계 키에 섞는 문자열 (읽기 스키마 등 단계 함수 밖의 설정)
+    - enabled=False: 캐시를 읽지도 쓰지도 않고 전체 단계 실행
+    """
+
+    def __init__(self, stages, source_paths, source_loader, cache_dir, salt='', enabled=True):
+        self.stages = {stage.name: stage for stage in stages}
+        self.source_paths = source_paths
+        self.source_loader = source_loader
+        self.cache_dir = cache_dir
+        self.salt = salt
+        self.enabled = enabled
+        self.keys = {}
+        self.timings = {}
+        if enabled:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    # ---- 키 계산 --------------------------------------------------------
+    def _source_hashes(self):
+        memo_path = os.path.join(self.cache_dir, SOURCE_HASH_FILE)
+        memo = {}
+        if os.path.exists(memo_path):
+            with open(memo_path, encoding='utf-8') as f:
+                memo = json.load(f)
+        hashes = {name: file_content_hash(path, memo) for name, path in self.source_paths.items()}
+        with open(memo_path, 'w', encoding='utf-8') as f:
+            json.dump(memo, f, indent=2)
+        return hashes
+
+    def compute_keys(self):
+        source_hashes = self._source_hashes()
+        keys = {}
+
+        def key_of(name):
+            if name not in keys:
+                stage = self.stages[name]
+                parts = [self.salt, stage.name, stage.code_hash()]
+                parts += [f"src:{s}:{source_hashes[s]}" for s in stage.sources]
+                parts += [f"in:{i}:{key_of(i)}" for i in stage.inputs]
+                keys[name] = hashlib.sha256("|".join(parts).encode('utf-8')).hexdigest()[:16]
+            return keys[name]
+
+        for name in self.stages:
+            key_of(name)
+        return keys
+
+    # ---- 캐시 입출력 -----------------------------------------------------
+    def _cache_path(self, name, key, ext):
+        return os.path.join(self.cache_dir, f"{name}-{key}.{ext}")
+
+    def _load_cached(self, name, key):
+        parquet_path = self._cache_path(name, key, 'parquet')
+        if os.path.exists(parquet_path):
+            return True, pd.read_parquet(parquet_path, engine='pyarrow')
+        pickle_path = self._cache_path(name, key, 'pkl')
+        if os.path.exists(pickle_path):
+            with open(pickle_path, 'rb') as f:
+                return True, pickle.load(f)
+        return False, None
+
+    def _is_cached(self, name, key):
+        return any(os.path.exists(self._cache_path(name, key, ext)) for ext in ('parquet', 'pkl'))
+
+    def _save(self, name, key, value):
+        # 같은 단계의 이전 키 캐시는 정리
+        for file_name in os.listdir(self.cache_dir):
+            if file_name.startswith(f"{name}-") and not file_name.startswith(f"{name}-{key}."):
+                os.remove(os.path.join(self.cache_dir, file_name))
+
+        if isinstance(value, pd.DataFrame):
+            try:
+                value.to_parquet(self._cache_path(name, key, 'parquet'), engine='pyarrow', index=False)
+                return
+            except Exception:
+                pass  # pyarrow 미설치 / 지원하지 않는 타입 → pickle
+        with open(self._cache_path(name, key, 'pkl'), 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    # ---- 실행 ----------------------------------------------------------
+    def _stages_to_run(self, targets, keys):
+        """캐시가 없어 실제로 실행해야 하는 단계 (대상 단계에서 거꾸로 탐색)"""
+        to_run, visited = set(), set()
+
+        def visit(name):
+            if name in visited:
+                return
+            visited.add(name)
+            stage = self.stages[name]
+            if self.enabled and stage.cache and self._is_cached(name, keys[name]):
+                return
+            to_run.add(name)
+            for upstream in stage.inputs:
+                visit(upstream)
+
+        for target in targets:
+            visit(target)
+        return to_run
+
+    def run(self, targets):
+        """대상 단계들의 출력 반환 ({name: value}). 단계별 소요 시간을 출력"""
+        keys = self.keys = self.compute_keys() if self.enabled else {name: None for name in self.stages}
+        to_run = self._stages_to_run(targets, keys)
+
+        needed_sources = sorted({s for name in to_run for s in self.stages[name].sources})
+        sources = self.source_loader(needed_sources) if needed_sources else {}
+
+        outputs = {}
+
+        def resolve(name):
+            if name in outputs:
+                return outputs[name]
+            stage = self.stages[name]
+            start = time.perf_counter()
+            if name not in to_run:
+                _, value = self._load_cached(name, keys[name])
+                status = "캐시"
+            else:
+                args = [resolve(i) for i in stage.inputs]
+                start = time.perf_counter()
+                value = stage.func(*args, *[sources[s] for s in stage.sources])
+                if self.enabled and stage.cache:
+                    self._save(name, keys[name], value)
+                status = "실행"
+            self.timings[name] = time.perf_counter() - start
+            print(f"   ⏱️ [{status}] {name:<18} {self.timings[name]:6.2f}s")
+            outputs[name] = value
+            return value
+
+        return {target: resolve(target) for target in targets}
@@ -0,0 +1,469 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.kpi import KpiResult, compute_kpis
+from utils.metrics import calculate_metrics_with_comparison, get_comparison_metrics, get_key_metrics_summary
+from utils.cube import CUBE_FILE_NAME, CUBE_KEYS, CUBE_MEASURES, load_cube_file, rollup_cube
+from utils.data_version import cube_mart_version, mart_version
+from utils.kpi_table import ALL, KpiTable
+from utils.customers import CUSTOMER_COLUMNS, CustomerCohorts
+from utils.result_cache import RESULT_CACHE
+from utils.spatial_bins import BIN_COLUMNS, GRID_SIZES, SpatialBins, grid_columns
+from utils.timeseries import DAILY_COLUMNS, SalesSeries
+
+# 대시보드 집계 백엔드 선택 (기본값 pandas)
+QUERY_BACKEND_ENV = "DASHBOARD_QUERY_BACKEND"
+QUERY_BACKENDS = ('pandas', 'duckdb')
+
+# 주별 집계 컬럼 (지도 / 랭킹 / 만족도 산점도 공용)
+STATE_SUMMARY_COLUMNS = ['total_sales', 'avg_order_value', 'total_orders', 'total_customers', 'avg_rating', 'lat', 'lng']
+
+
+def _sql_string(value):
+    """SQL 문자열 리터럴 (경로에 작은따옴표가 있어도 깨지지 않도록 이스케이프)"""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def selected_backend_name():
+    name = os.environ.get(QUERY_BACKEND_ENV, 'pandas').strip().lower()
+    if name not in QUERY_BACKENDS:
+        print(f"⚠️ 알 수 없는 집계 백엔드 '{name}', pandas를 사용합니다.")
+        return 'pandas'
+    return name
+
+
+def cache_key(version, name, selected_month, selected_state, *extra):
+    """
+    필터 결과 / 지표 / 차트 / 리포트 캐시 공용 키 (데이터 버전 포함)
+    - 데이터가 교체되면 버전이 바뀌므로 이전 버전의 캐시 항목은 다시 쓰이지 않음
+    """
+    return (version, name, selected_month, tuple(sorted(selected_state or [])), *extra)
+
+
+def summarize_states(df):
+    """행 데이터 → 주별 집계 (index: customer_state)"""
+    grouped = df.groupby('customer_state', observed=True)
+    return pd.DataFrame({
+        'total_sales': grouped['payment_value'].sum(),
+        'avg_order_value': grouped['payment_value'].mean(),
+        'total_orders': grouped['order_id'].nunique(),
+        'total_customers': grouped['customer_unique_id'].nunique(),
+        'avg_rating': grouped['review_score'].mean(),
+        'lat': grouped['customer_lat'].mean(),
+        'lng': grouped['customer_lng'].mean(),
+    }, columns=STATE_SUMMARY_COLUMNS)
+
+
+class QueryBackend:
+    """
+    집계 백엔드 공통 - 필터별 KPI(KpiResult)를 한 번만 계산하고 세 지표 함수가 같은 결과를 읽음
+    - 하위 클래스는 _compute_kpis(월, 지역) / _state_summary(월, 지역)를 구현
+    - KPI / 지표 dict / 주별 집계는 프로세스 전역 결과 캐시(utils/result_cache.py)에 보관
+      → 같은 필터를 고른 다른 세션은 다시 계산하지 않음 (데이터 버전이 없는 백엔드는 캐시하지 않음)
+    - sketches가 있으면 KPI 표에 없는 여러 주 선택을 셀 병합 근사로 처리 (DASHBOARD_DISTINCT_MODE=approx)
+    """
+
+    version = None
+    kpi_table = None
+    sketches = None
+    customers = None
+    spatial_bins = None
+    sales_series = None
+
+    def cache_key(self, name, selected_month, selected_state, *extra):
+        return cache_key(self.version, name, selected_month, selected_state, *extra)
+
+    def cached(self, name, selected_month, selected_state, compute, *extra):
+        """필터 결과를 결과 캐시에서 조회하고, 없으면 compute()로 계산해 저장 (반환값은 수정 금지)"""
+        if self.version is None:
+            return compute()
+        key = (self.name,) + self.cache_key(name, selected_month, selected_state, *extra)
+        return RESULT_CACHE.get_or_compute(key, compute)
+
+    def kpis(self, selected_month, selected_state):
+        if self.kpi_table is not None:
+            result = self.kpi_table.lookup(selected_month, selected_state)
+            if result is None and self.sketches is not None:
+                result = self.kpi_table.approximate(selected_month, selected_state, self.sketches)
+            if result is not None:
+                return result
+        return self.cached('kpis', selected_month, selected_state,
+                           lambda: self._compute_kpis(selected_month, selected_state))
+
+    def _compute_kpis(self, selected_month, selected_state):
+        raise NotImplementedError
+
+    def metrics_with_comparison(self, selected_month, selected_state):
+        return self.cached('metrics_with_comparison', selected_month, selected_state, lambda: (
+            calculate_metrics_with_comparison(None, selected_month, None, selected_state, kpi_lookup=self.kpis)
+        ))
+
+    def comparison_metrics(self, selected_month, selected_state):
+        return self.cached('comparison_metrics', selected_month, selected_state, lambda: get_comparison_metrics(
+            None, None, all_kpis=self.kpis('All', []), filtered_kpis=self.kpis(selected_month, selected_state)
+        ))
+
+    def key_metrics_summary(self, selected_month, selected_state):
+        return self.cached('key_metrics_summary', selected_month, selected_state, lambda: (
+            get_key_metrics_summary(None, kpis=self.kpis(selected_month, selected_state))
+        ))
+
+    def period_comparisons(self, selected_month, selected_state):
+        """전월 / 전년 동월 / 최근 3·6개월 평균 메트릭 {이름: 메트릭 dict} (KPI 표가 없으면 빈 dict)"""
+        if self.kpi_table is None:
+            return {}
+        return self.cached('period_comparisons', selected_month, selected_state, lambda: (
+            self.kpi_table.comparisons(selected_month, selected_state, kpi_lookup=self.kpis)
+        ))
+
+    def state_summary(self, selected_month, selected_state):
+        """주별 집계 (index: customer_state, STATE_SUMMARY_COLUMNS)"""
+        return self.cached('state_summary', selected_month, selected_state,
+                           lambda: self._state_summary(selected_month, selected_state))
+
+    def _state_summary(self, selected_month, selected_state):
+        raise NotImplementedError
+
+    def customer_cohorts(self):
+        """고객 차원 / 코호트 엔진 (CustomerCohorts, 데이터 버전당 한 번 생성)"""
+        return self.customers if self.customers is not None else CustomerCohorts(None)
+
+    def density_cells(self, selected_month, selected_state, zoom):
+        """고객 밀도 지도용 점유 격자 셀 (확대 수준에 맞는 해상도, 결과 캐시에 보관)"""
+        bins = self.spatial_bins if self.spatial_bins is not None else SpatialBins({})
+        return self.cached('density_cells', selected_month, selected_state,
+                           lambda: bins.frame(selected_month, selected_state, zoom), zoom)
+
+    def sales_timeseries(self):
+        """일 / 주 / 월 매출 시계열 (SalesSeries, 데이터 버전당 한 번 생성)"""
+        return self.sales_series if self.sales_series is not None else SalesSeries(None)
+
+    def monthly_sales(self):
+        """월별 매출 (y_mth, payment_value) - KPI 표가 없으면 큐브 롤업"""
+        if self.kpi_table is not None:
+            return self.kpi_table.monthly_sales()
+        return rollup_cube(self.cube, 'y_mth')['sales_sum'].rename('payment_value').reset_index()
+
+
+class PandasQueryBackend(QueryBackend):
+    """
+    기본 백엔드 - 메모리에 올린 마트(공유 view)와 필터 인덱스로 기존 pandas 함수를 그대로 호출
+    - 같은 필터의 결과 프레임은 마지막 한 건을 재사용 (한 번의 재실행 안에서 여러 지표가 같은 필터를 씀)
+    """
+
+    name = 'pandas'
+
+    def __init__(self, df, df_geolocation, cube, filter_index=None, version=None, kpi_table=None, sketches=None,
+                 customers=None, spatial_bins=None, sales_series=None):
+        self.df = df
+        self.df_geolocation = df_geolocation
+        self.cube = cube
+        self.filter_index = filter_index
+        self.kpi_table = kpi_table
+        self.sketches = sketches
+        self.customers = customers
+        self.spatial_bins = spatial_bins
+        self.sales_series = sales_series
+        self.version = version
+        self._last_filtered = (None, None)
+
+    def row_count(self):
+        return len(self.df)
+
+    def months(self):
+        if self.filter_index is not None and 'y_mth' in self.filter_index.postings:
+            return self.filter_index.dimension_values('y_mth')
+        return sorted(self.df['y_mth'].unique()) if 'y_mth' in self.df.columns else []
+
+    def states(self):
+        return sorted(self.df_geolocation['geolocation_state'].unique().tolist())
+
+    def filtered(self, selected_month, selected_state):
+        from utils.db_manager import apply_filters
+        key = self.cache_key('filtered', selected_month, selected_state)
+        last_key, last_frame = self._last_filtered
+        if last_key != key:
+            last_frame = apply_filters(self.df, selected_month, selected_state, self.filter_index)
+            self._last_filtered = (key, last_frame)
+        return last_frame
+
+    def _compute_kpis(self, selected_month, selected_state):
+        return compute_kpis(self.filtered(selected_month, selected_state))
+
+    def _state_summary(self, selected_month, selected_state):
+        return summarize_states(self.filtered(selected_month, selected_state))
+
+
+def _value(x):
+    """DuckDB 결과 값 → pandas와 같은 표현 (NULL → NaN)"""
+    return np.nan if x is None else x
+
+
+# compute_kpis와 같은 정의의 KPI 집계식 (len(unique())의 결측 처리를 위해 결측 여부도 함께 집계)
+_KPI_AGGREGATES = """
+    COUNT(*) AS n_rows,
+    COALESCE(SUM(payment_value), 0) AS total_sales,
+    COUNT(DISTINCT order_id) AS orders,
+    COALESCE(BOOL_OR(order_id IS NULL), FALSE) AS orders_missing,
+    COUNT(DISTINCT customer_unique_id) AS customers,
+    COALESCE(BOOL_OR(customer_unique_id IS NULL), FALSE) AS customers_missing,
+    COUNT(DISTINCT product_id) AS products,
+    COALESCE(BOOL_OR(product_id IS NULL), FALSE) AS products_missing,
+    AVG(CASE WHEN order_delivered_customer_date <= order_estimated_delivery_date THEN 1.0 ELSE 0.0 END) * 100
+        AS on_time_rate,
+    AVG(FLOOR((epoch_us(order_delivered_customer_date) - epoch_us(order_date)) / 86400000000.0))
+        AS avg_shipping_days,
+    AVG(review_score) AS avg_review_score,
+    COUNT(DISTINCT customer_state) AS states,
+    COUNT(*) FILTER (WHERE order_delivered_customer_date IS NOT NULL AND order_date IS NOT NULL) AS shipping_count,
+    COUNT(review_score) AS review_count"""
+
+
+def _kpi_result(totals, repeat):
+    """_KPI_AGGREGATES 결과 행 + (재구매 고객 수, 고객 수) → KpiResult"""
+    (n_rows, total_sales, orders, orders_missing, customers, customers_missing, products, products_missing,
+     on_time_rate, avg_shipping_days, avg_review_score, states, shipping_count, review_count) = totals
+    if not n_rows:
+        return KpiResult(avg_review_score=np.nan)
+    repeat_customers, customer_groups = repeat
+    return KpiResult(
+        n_rows=n_rows, total_sales=total_sales,
+        orders=orders, orders_missing=orders_missing,
+        customers=customers, customers_missing=customers_missing,
+        products=products, products_missing=products_missing,
+        on_time_rate=_value(on_time_rate), avg_shipping_days=_value(avg_shipping_days),
+        repeat_customers=repeat_customers, customer_groups=customer_groups,
+        avg_review_score=_value(avg_review_score), states=states,
+        shipping_count=shipping_count, review_count=review_count
+    )
+
+
+class DuckDBQueryBackend(QueryBackend):
+    """
+    DuckDB 백엔드 - 마트 파일(Parquet 파티션 또는 CSV)을 직접 조회
+    - 사이드바 필터는 WHERE 절(월 파티션 프루닝 포함), 집계/고유값 계산은 SQL로 내려 보내고
+      작은 결과만 pandas로 가져옴 → 마트 전체가 워커 메모리에 올라오지 않음
+    - pandas 백엔드와 같은 dict / DataFrame 을 반환 (benchmarks/query_backend_parity.py 로 검증)
+    """
+
+    name = 'duckdb'
+
+    def __init__(self, base_dir, version=None):
+        import duckdb
+
+        parquet_dir = os.path.join(base_dir, "dashboard_mart_parquet")
+        csv_path = os.path.join(base_dir, "dashboard_mart.csv")
+        self._conn = duckdb.connect(database=':memory:')
+        self._lock = threading.Lock()
+        # 파일 읽는 순서 (큐브를 다시 만들 때 주문의 첫 행을 pandas 로드 순서와 같게 고르기 위함)
+        if os.path.isdir(parquet_dir):
+            source = (f"read_parquet({_sql_string(os.path.join(parquet_dir, '**', '*.parquet'))}, "
+                      f"hive_partitioning = true, hive_types = {{'y_mth': VARCHAR}}, "
+                      f"filename = true, file_row_number = true)")
+            row_order = "filename, file_row_number"
+        elif os.path.exists(csv_path):
+            source = f"read_csv_auto({_sql_string(csv_path)}, header = true, types = {{'y_mth': 'VARCHAR'}})"
+            row_order = None
+        else:
+            raise FileNotFoundError(f"마트 파일을 찾을 수 없습니다: {base_dir}")
+        self._conn.execute(f"CREATE VIEW mart_rows AS SELECT * FROM {source}")
+        self._conn.execute("CREATE VIEW mart AS SELECT * EXCLUDE (filename, file_row_number) FROM mart_rows"
+                           if row_order else "CREATE VIEW mart AS SELECT * FROM mart_rows")
+
+        # 큐브는 같은 빌드의 마트로 만든 것만 사용 (마트만 교체된 경우 SQL 집계로 다시 만듦)
+        self.cube = None
+        built_with = cube_mart_version(base_dir)
+        if built_with is not None and built_with == mart_version(base_dir):
+            self.cube = load_cube_file(os.path.join(base_dir, CUBE_FILE_NAME))
+        if self.cube is None:
+            print("ℹ️ 집계 큐브가 마트와 같은 빌드인지 확인할 수 없어 마트로부터 다시 만듭니다.")
+            self.cube = self._build_cube(row_order)
+        self.df = None  # 행 데이터는 메모리에 올리지 않음
+        self.version = version
+        self.kpi_table = self._build_kpi_table()
+        self.customers = self._build_customers()
+        self.spatial_bins = self._build_spatial_bins()
+        self.sales_series = self._build_sales_series()
+
+    def _build_cube(self, row_order=None):
+        """
+        build_cube와 같은 정의의 큐브를 GROUP BY 한 번으로 계산
+        - 주문 수는 주문의 첫 행(파일 / 행 순서)이 속한 셀에만 셈
+        """
+        order = row_order or "rn"
+        keys = ", ".join(CUBE_KEYS)
+        cube = self._query_df(f"""
+            WITH numbered AS (SELECT *, ROW_NUMBER() OVER () AS rn FROM mart_rows),
+            flagged AS (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY order_id ORDER BY {order}) = 1 AS is_first
+                FROM numbered
+            )
+            SELECT {keys},
+                   SUM(payment_value) AS sales_sum,
+                   COUNT(*) AS item_count,
+                   SUM(COALESCE(review_score, 0)) AS review_sum,
+                   COUNT(review_score) AS review_count,
+                   SUM(is_first::BIGINT) AS order_count
+            FROM flagged
+            GROUP BY {keys}
+            ORDER BY {keys}
+        """)
+        cube['y_mth'] = cube['y_mth'].astype(str)
+        for col in ['item_count', 'review_count', 'order_count']:
+            cube[col] = cube[col].astype(np.int64)
+        return cube[CUBE_KEYS + CUBE_MEASURES]
+
+    def _query(self, sql, params=()):
+        # DuckDB 연결은 스레드 간 공유하지 않고, 세션마다 cursor를 만들어 실행
+        with self._lock:
+            cursor = self._conn.cursor()
+        try:
+            return cursor.execute(sql, list(params)).fetchall()
+        finally:
+            cursor.close()
+
+    def _query_df(self, sql, params=()):
+        with self._lock:
+            cursor = self._conn.cursor()
+        try:
+            return cursor.execute(sql, list(params)).df()
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _where(selected_month, selected_state):
+        clauses, params = [], []
+        if selected_month != 'All':
+            clauses.append("y_mth = ?")
+            params.append(selected_month)
+        if selected_state:
+            clauses.append(f"customer_state IN ({', '.join('?' * len(selected_state))})")
+            params.extend(selected_state)
+        return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def row_count(self):
+        return self._query("SELECT COUNT(*) FROM mart")[0][0]
+
+    def months(self):
+        return [r[0] for r in self._query("SELECT DISTINCT y_mth FROM mart WHERE y_mth IS NOT NULL ORDER BY 1")]
+
+    def states(self):
+        return [r[0] for r in self._query(
+            "SELECT DISTINCT customer_state FROM mart WHERE customer_state IS NOT NULL ORDER BY 1")]
+
+    def _compute_kpis(self, selected_month, selected_state):
+        """
+        compute_kpis와 같은 정의의 KPI를 쿼리 한 번으로 계산
+        - 재구매 고객 수는 같은 필터 결과(CTE)에서 고객별 주문 수로 집계 (결측 고객 제외)
+        """
+        where, params = self._where(selected_month, selected_state)
+        row = self._query(f"""
+            WITH filtered AS (SELECT * FROM mart {where}),
+            totals AS (SELECT {_KPI_AGGREGATES} FROM filtered),
+            repeat AS (
+                SELECT COUNT(*) FILTER (WHERE n_orders >= 2) AS repeat_customers, COUNT(*) AS customer_groups
+                FROM (
+                    SELECT customer_unique_id, COUNT(DISTINCT order_id) AS n_orders
+                    FROM filtered WHERE customer_unique_id IS NOT NULL
+                    GROUP BY customer_unique_id
+                )
+            )
+            SELECT * FROM totals, repeat
+        """, params)[0]
+        return _kpi_result(row[:-2], row[-2:])
+
+    def _build_kpi_table(self):
+        """
+        월 × 주 / 월 / 주 / 전체 KPI를 GROUPING SETS 쿼리 두 번으로 계산해 KpiTable 생성
+        - 재구매는 (월, 주, 고객) 단위 주문 수를 같은 그룹 집합으로 한 번 더 묶음
+        - 월 / 주 값이 결측인 그룹은 필터로 고를 수 없으므로 버림
+        """
+        keys = f"""
+            CASE WHEN GROUPING(y_mth) = 1 THEN '{ALL}' ELSE y_mth END AS month_key,
+            CASE WHEN GROUPING(customer_state) = 1 THEN '{ALL}' ELSE customer_state END AS state_key"""
+        totals = self._query(f"""
+            SELECT {keys}, {_KPI_AGGREGATES}
+            FROM mart
+            GROUP BY GROUPING SETS ((y_mth, customer_state), (y_mth), (customer_state), ())
+        """)
+        repeats = self._query(f"""
+            SELECT month_key, state_key,
+                   COUNT(*) FILTER (WHERE n_orders >= 2) AS repeat_customers, COUNT(*) AS customer_groups
+            FROM (
+                SELECT {keys}, customer_unique_id, COUNT(DISTINCT order_id) AS n_orders
+                FROM mart WHERE customer_unique_id IS NOT NULL
+                GROUP BY GROUPING SETS ((y_mth, customer_state, customer_unique_id), (y_mth, customer_unique_id),
+                                        (customer_state, customer_unique_id), (customer_unique_id))
+            )
+            GROUP BY month_key, state_key
+        """)
+        repeat_by_key = {(m, st): (r, c) for m, st, r, c in repeats}
+        cells = {}
+        for row in totals:
+            key = row[:2]
+            if None in key:
+                continue
+            cells[key] = _kpi_result(row[2:], repeat_by_key.get(key, (0, 0)))
+        return KpiTable(cells)
+
+    def _build_customers(self):
+        """주문 단위 집계(고객, 주문, 월, 주, 결제액)만 가져와 pandas와 같은 CustomerCohorts 생성"""
+        frame = self._query_df(f"""
+            SELECT {', '.join(CUSTOMER_COLUMNS[:-1])}, SUM(payment_value) AS payment_value
+            FROM mart
+            WHERE customer_unique_id IS NOT NULL AND y_mth IS NOT NULL
+            GROUP BY ALL
+        """)
+        return CustomerCohorts(frame)
+
+    def _build_spatial_bins(self):
+        """해상도별 (월, 주, 격자 셀) 집계를 SQL로 계산 (utils/spatial_bins.py와 같은 격자 번호)"""
+        levels = {}
+        for size in GRID_SIZES:
+            levels[size] = self._query_df(f"""
+                SELECT y_mth, customer_state,
+                       CAST(FLOOR((customer_lat + 90) / {size}) AS BIGINT) * {grid_columns(size)}
+                           + CAST(FLOOR((customer_lng + 180) / {size}) AS BIGINT) AS cell,
+                       COALESCE(SUM(payment_value), 0) AS sales_sum,
+                       COUNT(DISTINCT order_id) AS order_count,
+                       COALESCE(SUM(review_score), 0) AS rating_sum,
+                       COUNT(review_score) AS rating_count
+                FROM mart
+                WHERE customer_lat IS NOT NULL AND customer_lng IS NOT NULL
+                GROUP BY ALL
+            """)[BIN_COLUMNS]
+        return SpatialBins(levels)
+
+    def _build_sales_series(self):
+        """일 × 주 매출만 SQL로 가져와 pandas와 같은 SalesSeries 생성 (주 / 월 묶음은 SalesSeries에서)"""
+        frame = self._query_df("""
+            SELECT CAST(date_trunc('day', order_date) AS TIMESTAMP) AS day, customer_state,
+                   COALESCE(SUM(payment_value), 0) AS payment_value
+            FROM mart
+            WHERE order_date IS NOT NULL
+            GROUP BY ALL
+        """)
+        return SalesSeries(frame[DAILY_COLUMNS])
+
+    def _state_summary(self, selected_month, selected_state):
+        where, params = self._where(selected_month, selected_state)
+        summary = self._query_df(f"""
+            SELECT customer_state,
+                   SUM(payment_value) AS total_sales,
+                   AVG(payment_value) AS avg_order_value,
+                   COUNT(DISTINCT order_id) AS total_orders,
+                   COUNT(DISTINCT customer_unique_id) AS total_customers,
+                   AVG(review_score) AS avg_rating,
+                   AVG(customer_lat) AS lat,
+                   AVG(customer_lng) AS lng
+            FROM mart {where} {'AND' if where else 'WHERE'} customer_state IS NOT NULL
+            GROUP BY customer_state
+            ORDER BY customer_state
+        """, params)
+        return summary.set_index('customer_state')[STATE_SUMMARY_COLUMNS]
+
+    def filtered(self, selected_month, selected_state):
+        return None
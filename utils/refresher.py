@@ -0,0 +1,163 @@
+import time
+import threading
+from datetime import datetime
+
+# 기본 갱신 주기 (기존 cache ttl과 동일) / 소스 변경 확인 주기
+DEFAULT_REFRESH_SECONDS = 3600
+DEFAULT_POLL_SECONDS = 60
+# 데이터가 아직 없을 때 실패한 로드의 첫 재시도 간격 (실패할 때마다 두 배, 최대 refresh_seconds)
+DEFAULT_RETRY_SECONDS = 5
+
+
+class DatasetRefresher:
+    """
+    백그라운드 데이터 갱신 (요청 경로에서 로드하지 않음)
+    - build(version): 새 데이터 객체(공유 데이터셋 + 파생 구조)를 만드는 함수, 스레드에서 실행
+      (데이터 버전을 받아 객체에 기록 → 하위 캐시 키에 사용)
+    - signature(): 소스 데이터 버전 (시트 리비전 / 마트 파일 내용 해시). 바뀌면 즉시 갱신하고,
+      그대로면 다시 로드하지 않음. 버전을 알 수 없는 소스(None)만 refresh_seconds 주기로 다시 로드
+    - 새 객체가 완성된 뒤에만 current 참조를 한 번에 교체 → 그 전까지 세션은 이전 버전을 계속 사용
+    - 갱신 실패 시 이전 버전을 유지하고 last_error에 사유를 남김
+    - 교체된 데이터가 아직 없으면 실패한 로드를 retry_seconds부터 두 배씩 늘려 재시도 (최대 refresh_seconds)
+    - 첫 로드도 스레드에서 실행 → start()는 바로 반환, 첫 교체 전까지 current는 None (wait()로 기다림)
+    """
+
+    def __init__(self, build, signature=None, refresh_seconds=DEFAULT_REFRESH_SECONDS,
+                 poll_seconds=DEFAULT_POLL_SECONDS, name="dataset", retry_seconds=DEFAULT_RETRY_SECONDS):
+        self._build = build
+        self._signature = signature or (lambda: None)
+        self.refresh_seconds = refresh_seconds
+        self.poll_seconds = poll_seconds
+        self.retry_seconds = retry_seconds
+        self.name = name
+
+        self.current = None
+        self.version = None
+        self.source_signature = None
+        self.refreshed_at = None
+        self.last_refresh_seconds = None
+        self.refresh_count = 0
+        self.last_error = None
+        self.failures = 0  # 연속 실패 횟수
+        # 마지막 시도 기준 (실패한 버전을 확인 주기마다 다시 로드하지 않도록)
+        self._attempted_signature = None
+        self._attempted_at = None
+
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._first_attempt = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """갱신 스레드 시작 (첫 로드를 기다리지 않음)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"{self.name}-refresher", daemon=True)
+            self._thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        """첫 로드 시도가 끝날 때까지(최대 timeout초) 기다린 뒤 current 반환 (아직이거나 실패면 None)"""
+        self._first_attempt.wait(timeout)
+        return self.current
+
+    @property
+    def loading(self):
+        """첫 로드 시도가 아직 끝나지 않음"""
+        return not self._first_attempt.is_set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def request_refresh(self):
+        """다음 확인 주기를 기다리지 않고 갱신 (호출한 쪽은 기다리지 않음)"""
+        self._wake.set()
+
+    def _read_signature(self):
+        try:
+            return self._signature()
+        except Exception as e:
+            print(f"⚠️ [{self.name}] 소스 버전 확인 실패: {type(e).__name__}: {e}")
+            return None
+
+    def is_stale(self):
+        """
+        다시 로드해야 하는지
+        - 마지막 시도 이후 소스 버전이 바뀜 → 즉시
+        - 버전을 알 수 없음 → refresh_seconds 주기
+        - 마지막 시도가 실패 → retry_delay() 뒤 재시도
+        """
+        if self._attempted_at is None:
+            return True
+        signature = self._read_signature()
+        if signature is not None and signature != self._attempted_signature:
+            return True
+        if signature is not None and self.last_error is None:
+            return False
+        return time.time() - self._attempted_at >= self.retry_delay()
+
+    def retry_delay(self):
+        """다음 시도까지의 간격 (데이터가 없는 동안의 실패는 짧은 간격부터 두 배씩)"""
+        if self.last_error is None or self.current is not None:
+            return self.refresh_seconds
+        return min(self.retry_seconds * 2 ** (self.failures - 1), self.refresh_seconds)
+
+    def _wait_seconds(self):
+        """다음 확인까지 기다릴 시간 (재시도 예정이면 확인 주기보다 먼저 깨어남)"""
+        if self.last_error is None or self.current is not None or self._attempted_at is None:
+            return self.poll_seconds
+        remaining = self._attempted_at + self.retry_delay() - time.time()
+        return max(min(self.poll_seconds, remaining), 0)
+
+    def refresh(self):
+        """새 데이터를 만들어 교체 (동시에 한 번만 실행). 성공 여부 반환"""
+        with self._refresh_lock:
+            signature = self._read_signature()
+            self._attempted_signature, self._attempted_at = signature, time.time()
+            # 버전을 알 수 없는 소스는 로드 순번 + 시각
+            version = signature or f"r{self.refresh_count + 1}-{datetime.now():%Y%m%d%H%M%S}"
+            start = time.perf_counter()
+            try:
+                data = self._build(version)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                self.failures += 1
+                print(f"⚠️ [{self.name}] 데이터 갱신 실패, 이전 버전을 유지합니다: {self.last_error}")
+                self._first_attempt.set()
+                return False
+            elapsed = time.perf_counter() - start
+
+            self.refresh_count += 1
+            # 참조 교체는 한 번의 대입 → 읽는 쪽은 이전 또는 새 객체 중 하나만 봄
+            self.current = data
+            self.version = version
+            self.source_signature = signature
+            self.refreshed_at = time.time()
+            self.last_refresh_seconds = elapsed
+            self.last_error = None
+            self.failures = 0
+            self._first_attempt.set()
+            print(f"🔄 [{self.name}] 데이터 갱신 완료: {version} ({elapsed:.2f}s)")
+            return True
+
+    def _run(self):
+        if self.current is None:
+            self.refresh()
+        while not self._stop.is_set():
+            forced = self._wake.wait(self._wait_seconds())
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            if forced or self.is_stale():
+                self.refresh()
+
+    def status(self):
+        return {
+            'version': self.version,
+            'refreshed_at': self.refreshed_at,
+            'last_refresh_seconds': self.last_refresh_seconds,
+            'refresh_count': self.refresh_count,
+            'last_error': self.last_error,
+            'loading': self.loading,
+        }
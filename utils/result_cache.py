@@ -0,0 +1,108 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# 결과 캐시 최대 크기 (MB, 환경변수로 조정)
+RESULT_CACHE_MB_ENV = "DASHBOARD_RESULT_CACHE_MB"
+DEFAULT_RESULT_CACHE_MB = 64
+
+
+def estimate_bytes(value):
+    """
+    캐시 항목 크기 추정 (바이트)
+    - DataFrame / Series: memory_usage(deep=True), numpy 배열: nbytes
+    - dict / list / tuple: 컨테이너 + 항목 재귀, 그 외 객체는 __dict__ 포함 getsizeof
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_bytes(k) + estimate_bytes(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_bytes(v) for v in value)
+    if hasattr(value, '__dict__'):
+        return sys.getsizeof(value) + estimate_bytes(vars(value))
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """
+    프로세스 전역 필터 결과 캐시 (지표 dict / KPI / 집계 프레임, 세션 간 공유)
+    - 키: (백엔드, 데이터 버전, 이름, 월, 정렬된 주 tuple, ...) → 데이터가 교체되면 이전 항목은 다시 쓰이지 않고 밀려남
+    - 항목 크기 합이 max_bytes를 넘으면 가장 오래 쓰지 않은 항목부터 제거 (LRU)
+    - 캐시된 값은 세션끼리 공유하므로 호출 쪽은 수정하지 않음 (공유 데이터셋 view와 같은 규칙)
+    - 같은 키를 여러 세션이 동시에 놓치면 각자 계산하고 마지막 결과가 남음 (계산 중에는 잠그지 않음)
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # {키: (값, 크기)}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = estimate_bytes(value)
+        if size > self.max_bytes:
+            return value
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+        return value
+
+    def get_or_compute(self, key, compute):
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = self.put(key, compute())
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups * 100 if lookups else 0,
+        }
+
+
+# 프로세스당 하나 (모든 세션 / 백엔드가 공유)
+RESULT_CACHE = ResultCache(int(float(os.environ.get(RESULT_CACHE_MB_ENV, DEFAULT_RESULT_CACHE_MB)) * 1024 ** 2))
@@ -0,0 +1,267 @@
+import os
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+SNAPSHOT_DIRNAME = ".sheet_snapshot"
+DEFAULT_CHUNK_ROWS = 10_000
+# 갱신 스레드의 시트 리비전 확인 최소 간격 (초, API 호출 수 제한)
+DEFAULT_REVISION_SECONDS = 300
+
+# 시트 셀은 모두 문자열로 오므로 스냅샷 저장 전에 타입을 맞춤
+SHEET_DATETIME_COLUMNS = ['order_date', 'order_delivered_customer_date', 'order_estimated_delivery_date']
+SHEET_NUMERIC_COLUMNS = ['customer_lat', 'customer_lng', 'payment_value', 'review_score']
+
+
+class SheetBackend:
+    """
+    시트 읽기 백엔드 인터페이스
+    - key: 시트 식별자 (스냅샷 파일명에 사용)
+    - revision(): 시트 버전 (수정 시각/리비전). 알 수 없으면 None → 스냅샷을 재사용하지 않음
+    - header() / row_count(): 헤더 행, 데이터 행 수 (헤더 제외, 빈 행이 뒤에 붙어 있어도 됨)
+    - fetch_rows(start, stop): 데이터 행 [start, stop) 을 문자열 리스트의 리스트로 반환
+    """
+
+    key = "sheet"
+
+    def revision(self):
+        raise NotImplementedError
+
+    def header(self):
+        raise NotImplementedError
+
+    def row_count(self):
+        raise NotImplementedError
+
+    def fetch_rows(self, start, stop):
+        raise NotImplementedError
+
+
+class GSpreadBackend(SheetBackend):
+    """서비스 계정 연결 (gspread 워크시트) - 행 범위(A{n}:{col}{m}) 단위로 나눠 읽음"""
+
+    def __init__(self, worksheet):
+        self.worksheet = worksheet
+        self.key = f"{worksheet.spreadsheet.id}-{worksheet.id}"
+        self._header = None
+
+    def revision(self):
+        spreadsheet = self.worksheet.spreadsheet
+        getter = getattr(spreadsheet, 'get_lastUpdateTime', None)
+        return getter() if getter else getattr(spreadsheet, 'lastUpdateTime', None)
+
+    def header(self):
+        if self._header is None:
+            self._header = self.worksheet.row_values(1)
+        return self._header
+
+    def row_count(self):
+        return max(self.worksheet.row_count - 1, 0)
+
+    def fetch_rows(self, start, stop):
+        from gspread.utils import rowcol_to_a1
+        last_cell = rowcol_to_a1(stop + 1, len(self.header()))
+        return self.worksheet.get(f"A{start + 2}:{last_cell}")
+
+
+class ConnectionReadBackend(SheetBackend):
+    """
+    GSheetsConnection.read() 를 그대로 쓰는 백엔드 (공개 시트 URL 등 범위 읽기가 안 되는 경우)
+    - 한 번에 전체를 읽고, 리비전을 알 수 없으므로 스냅샷은 매번 새로 씀
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.key = "connection"
+        self._frame = None
+
+    def _read(self):
+        if self._frame is None:
+            self._frame = self.conn.read(dtype=str, keep_default_na=False)
+        return self._frame
+
+    def revision(self):
+        return None
+
+    def header(self):
+        return list(self._read().columns)
+
+    def row_count(self):
+        return len(self._read())
+
+    def fetch_rows(self, start, stop):
+        return self._read().iloc[start:stop].values.tolist()
+
+
+class LocalSheetBackend(SheetBackend):
+    """
+    로컬 CSV를 시트처럼 제공하는 가짜 백엔드 (테스트/벤치마크용)
+    - 리비전은 파일 크기 + 수정 시각, latency_ms로 요청당 네트워크 지연을 흉내냄
+    """
+
+    def __init__(self, csv_path, latency_ms=0):
+        self.csv_path = csv_path
+        self.latency_ms = latency_ms
+        self.key = "local-" + hashlib.sha256(os.path.abspath(csv_path).encode('utf-8')).hexdigest()[:8]
+        self.requests = 0
+        self._frame = None
+
+    def _read(self):
+        if self._frame is None:
+            self._frame = pd.read_csv(self.csv_path, dtype=str, keep_default_na=False)
+        return self._frame
+
+    def _request(self):
+        self.requests += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+    def revision(self):
+        stat = os.stat(self.csv_path)
+        return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+    def header(self):
+        self._request()
+        return list(self._read().columns)
+
+    def row_count(self):
+        self._request()
+        return len(self._read())
+
+    def fetch_rows(self, start, stop):
+        self._request()
+        return self._read().iloc[start:stop].values.tolist()
+
+
+class RevisionPoller:
+    """
+    갱신 스레드용 시트 리비전 확인 (호출 수 제한)
+    - min_interval초 안에 다시 부르면 API를 호출하지 않고 마지막 리비전을 반환
+    - make_backend는 스크립트 스레드에서 만든 연결로 백엔드를 만드는 함수 → 스레드에서 st.connection을 부르지 않음
+      (revision()은 시트 API HTTP 요청만 하므로 스크립트 스레드 밖에서 호출해도 됨)
+    - 실패해도 다음 확인은 min_interval 뒤 (오류가 나는 동안 요청을 반복하지 않음)
+    """
+
+    def __init__(self, make_backend, min_interval=DEFAULT_REVISION_SECONDS):
+        self._make_backend = make_backend
+        self.min_interval = min_interval
+        self._backend = None
+        self._revision = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._checked_at is not None and now - self._checked_at < self.min_interval:
+                return self._revision
+            self._checked_at = now
+            if self._backend is None:
+                self._backend = self._make_backend()
+            self._revision = self._backend.revision()
+            return self._revision
+
+
+def type_sheet_frame(df):
+    """시트 문자열 값 → 날짜/숫자 타입 (빈 셀은 결측값)"""
+    df = df.replace('', np.nan)
+    for col in SHEET_DATETIME_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+    for col in SHEET_NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col].astype(str).str.replace(',', '', regex=False), errors='coerce')
+    return df
+
+
+def _snapshot_path(snapshot_dir, backend, revision):
+    digest = hashlib.sha256(str(revision).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(snapshot_dir, f"{backend.key}-{digest}.parquet")
+
+
+def fetch_sheet(backend, chunk_rows=DEFAULT_CHUNK_ROWS, max_workers=4):
+    """시트를 행 범위 청크로 나눠 동시에 읽어 하나의 (타입 변환된) DataFrame으로 합침"""
+    header = backend.header()
+    total_rows = backend.row_count()
+    ranges = [(start, min(start + chunk_rows, total_rows)) for start in range(0, total_rows, chunk_rows)]
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(ranges)))) as executor:
+        chunks = list(executor.map(lambda r: backend.fetch_rows(*r), ranges))
+
+    rows = [row + [''] * (len(header) - len(row)) for chunk in chunks for row in chunk]
+    df = pd.DataFrame(rows, columns=header)
+    # 시트 끝의 빈 행 제거 (row_count가 격자 크기를 반환하는 경우)
+    df = df[(df != '').any(axis=1)].reset_index(drop=True)
+    return type_sheet_frame(df)
+
+
+def load_sheet_snapshot(backend, snapshot_dir, chunk_rows=DEFAULT_CHUNK_ROWS, max_workers=4):
+    """
+    리비전 기준 스냅샷 로드
+    - 시트 리비전이 같은 스냅샷(Parquet)이 있으면 시트를 읽지 않고 그대로 사용
+    - 없으면 청크 단위로 읽어 타입 변환 후 스냅샷 저장 (같은 시트의 이전 스냅샷은 삭제)
+    - 반환값: (DataFrame, 'snapshot' | 'fetched')
+    """
+    revision = backend.revision()
+    path = _snapshot_path(snapshot_dir, backend, revision) if revision is not None else None
+    if path and os.path.exists(path):
+        return pd.read_parquet(path, engine='pyarrow'), 'snapshot'
+
+    start = time.perf_counter()
+    df = fetch_sheet(backend, chunk_rows=chunk_rows, max_workers=max_workers)
+    print(f"📥 Google Sheets 로드: {len(df):,} rows, {time.perf_counter() - start:.2f}s (청크 {chunk_rows:,} rows)")
+
+    if path:
+        os.makedirs(snapshot_dir, exist_ok=True)
+        for file_name in os.listdir(snapshot_dir):
+            if file_name.startswith(f"{backend.key}-"):
+                os.remove(os.path.join(snapshot_dir, file_name))
+        try:
+            df.to_parquet(path, engine='pyarrow', index=False)
+        except Exception as e:
+            print(f"⚠️ 시트 스냅샷 저장 실패: {e}")
+    return df, 'fetched'
+
+
+# secrets의 connections.gsheets 중 서비스 계정 인증 정보 키 (google-auth 서비스 계정 JSON 형식)
+SERVICE_ACCOUNT_KEYS = ('type', 'project_id', 'private_key_id', 'private_key', 'client_email', 'client_id',
+                        'auth_uri', 'token_uri', 'auth_provider_x509_cert_url', 'client_x509_cert_url')
+
+
+def open_service_account_worksheet(settings):
+    """
+    서비스 계정 설정으로 워크시트 열기 (공개 gspread API만 사용)
+    - spreadsheet: 시트 URL 또는 키, worksheet: 워크시트 이름 또는 gid (없으면 첫 번째 시트)
+    """
+    import gspread
+
+    credentials = {key: settings[key] for key in SERVICE_ACCOUNT_KEYS if key in settings}
+    client = gspread.service_account_from_dict(credentials)
+    spreadsheet = str(settings['spreadsheet'])
+    book = client.open_by_url(spreadsheet) if spreadsheet.startswith('http') else client.open_by_key(spreadsheet)
+
+    worksheet = settings.get('worksheet')
+    if worksheet is None or worksheet == '':
+        return book.sheet1
+    if isinstance(worksheet, int) or str(worksheet).isdigit():
+        return book.get_worksheet_by_id(int(worksheet))
+    return book.worksheet(str(worksheet))
+
+
+def backend_from_connection(conn, settings):
+    """
+    secrets 설정으로 백엔드 선택
+    - backend = "local": path의 CSV를 가짜 시트로 사용 (latency_ms 선택)
+    - 서비스 계정(type = "service_account"): gspread로 워크시트를 직접 열어 행 범위 읽기
+    - 그 외(공개 URL): conn.read() 전체 읽기 (청크 / 리비전 스냅샷 없음, 사유를 로그로 남김)
+    """
+    if settings.get('backend') == 'local':
+        return LocalSheetBackend(settings['path'], latency_ms=settings.get('latency_ms', 0))
+    if settings.get('type') == 'service_account':
+        return GSpreadBackend(open_service_account_worksheet(settings))
+    print("ℹ️ 서비스 계정 설정이 없어 시트 전체를 한 번에 읽습니다. (청크 읽기 / 리비전 스냅샷 미사용)")
+    return ConnectionReadBackend(conn)
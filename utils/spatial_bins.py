@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+
+# 격자 해상도 (셀 한 변, 도 단위) - 거친 것부터
+GRID_SIZES = [4.0, 2.0, 1.0, 0.5, 0.25, 0.1]
+
+# 화면에서 셀 한 변이 차지할 목표 크기 (px) / 한 번에 보낼 최대 셀 수
+TARGET_CELL_PX = 20
+MAX_CELLS = 4000
+
+BIN_COLUMNS = ['y_mth', 'customer_state', 'cell', 'sales_sum', 'order_count', 'rating_sum', 'rating_count']
+
+
+def grid_columns(size):
+    return int(np.ceil(360 / size))
+
+
+def bin_coordinates(lat, lng, size):
+    """위도 / 경도 배열 → 정사각 격자 셀 번호 (전 지구 기준이라 데이터와 무관하게 고정, 좌표 결측은 -1)"""
+    lat = np.asarray(lat, dtype=np.float64)
+    lng = np.asarray(lng, dtype=np.float64)
+    valid = ~(np.isnan(lat) | np.isnan(lng))
+    row = np.floor((np.where(valid, lat, 0) + 90) / size).astype(np.int64)
+    col = np.floor((np.where(valid, lng, 0) + 180) / size).astype(np.int64)
+    return np.where(valid, row * grid_columns(size) + col, -1)
+
+
+def cell_centers(cells, size):
+    """셀 번호 → (위도, 경도) 중심"""
+    row, col = np.divmod(np.asarray(cells, dtype=np.int64), grid_columns(size))
+    return (row + 0.5) * size - 90, (col + 0.5) * size - 180
+
+
+def size_for_zoom(zoom, sizes=GRID_SIZES):
+    """
+    지도 확대 수준 → 격자 해상도
+    - 웹 메르카토르 확대 수준 z에서 경도 1도 ≈ 256 × 2^z / 360 px → 셀이 TARGET_CELL_PX 이상인 가장 고운 격자
+    """
+    target = TARGET_CELL_PX * 360 / (256 * 2 ** zoom)
+    fitting = [s for s in sizes if s >= target]
+    return min(fitting) if fitting else max(sizes)
+
+
+class SpatialBins:
+    """
+    데이터 버전당 한 번 만드는 고객 좌표 격자 집계 (해상도별)
+    - levels: {셀 크기: DataFrame(BIN_COLUMNS)} - (월, 주, 셀)별 매출 / 주문 수 / 평점 합·개수
+      (주문은 한 월 / 한 주 / 한 위치에만 속하므로 주문 수도 (월, 주) 사이에 더할 수 있음)
+    - 필터 / 확대 수준에 맞는 해상도의 점유 셀만 다시 묶어 돌려줌 → 지도 전송량은 행 수가 아니라 셀 수에 비례
+    """
+
+    def __init__(self, levels):
+        self.levels = {size: frame for size, frame in levels.items() if frame is not None}
+
+    @property
+    def empty(self):
+        return not self.levels
+
+    def cells(self, selected_month, selected_state, zoom, max_cells=MAX_CELLS):
+        """
+        필터 결과의 점유 셀 (lat, lng, sales_sum, order_count, avg_rating) + 사용한 셀 크기
+        - 확대 수준으로 고른 해상도에서 셀이 max_cells를 넘으면 더 거친 해상도로 내림
+        """
+        sizes = sorted(self.levels)
+        size = size_for_zoom(zoom, sizes)
+        for candidate in sorted((s for s in sizes if s >= size)):
+            cells = self._aggregate(self.levels[candidate], selected_month, selected_state)
+            if len(cells) <= max_cells:
+                return cells, candidate
+        return cells, candidate
+
+    @staticmethod
+    def _aggregate(frame, selected_month, selected_state):
+        mask = np.ones(len(frame), dtype=bool)
+        if selected_month != 'All':
+            mask &= (frame['y_mth'] == selected_month).to_numpy()
+        if selected_state:
+            mask &= frame['customer_state'].isin(list(selected_state)).to_numpy()
+        grouped = frame[mask].groupby('cell', sort=True)[['sales_sum', 'order_count', 'rating_sum', 'rating_count']].sum()
+        return grouped
+
+    def frame(self, selected_month, selected_state, zoom, max_cells=MAX_CELLS):
+        """지도용 점유 셀 DataFrame(lat, lng, sales_sum, order_count, avg_rating, cell_size)"""
+        if self.empty:
+            return pd.DataFrame(columns=['lat', 'lng', 'sales_sum', 'order_count', 'avg_rating', 'cell_size'])
+        grouped, size = self.cells(selected_month, selected_state, zoom, max_cells)
+        lat, lng = cell_centers(grouped.index.to_numpy(), size)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            avg_rating = grouped['rating_sum'].to_numpy() / grouped['rating_count'].to_numpy()
+        return pd.DataFrame({
+            'lat': lat,
+            'lng': lng,
+            'sales_sum': grouped['sales_sum'].to_numpy(),
+            'order_count': grouped['order_count'].to_numpy().astype(np.int64),
+            'avg_rating': avg_rating,
+            'cell_size': size,
+        })
+
+
+def build_spatial_bins(df, sizes=GRID_SIZES):
+    """행 단위 마트 → SpatialBins (해상도마다 NumPy 격자 번호 계산 후 (월, 주, 셀) groupby 한 번)"""
+    needed = ['customer_lat', 'customer_lng', 'y_mth', 'customer_state', 'payment_value', 'order_id', 'review_score']
+    if df is None or df.empty or not all(c in df.columns for c in needed):
+        return SpatialBins({})
+
+    lat = df['customer_lat'].to_numpy(dtype=np.float64, na_value=np.nan)
+    lng = df['customer_lng'].to_numpy(dtype=np.float64, na_value=np.nan)
+    base = pd.DataFrame({
+        'y_mth': df['y_mth'].astype(str).where(df['y_mth'].notna()),
+        'customer_state': df['customer_state'].astype(str).where(df['customer_state'].notna()),
+        'payment_value': df['payment_value'].to_numpy(dtype=np.float64, na_value=0),
+        'order_id': df['order_id'].to_numpy(),
+        'review_score': df['review_score'].to_numpy(dtype=np.float64, na_value=np.nan),
+    })
+    levels = {}
+    for size in sizes:
+        cells = bin_coordinates(lat, lng, size)
+        located = cells >= 0
+        frame = base[located].assign(cell=cells[located])
+        grouped = frame.groupby(['y_mth', 'customer_state', 'cell'], dropna=False, sort=False).agg(
+            sales_sum=('payment_value', 'sum'),
+            order_count=('order_id', 'nunique'),
+            rating_sum=('review_score', 'sum'),
+            rating_count=('review_score', 'count'),
+        )
+        levels[size] = grouped.reset_index()[BIN_COLUMNS]
+    return SpatialBins(levels)
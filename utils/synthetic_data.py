@@ -0,0 +1,235 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+
+# 1× 기준 규모 (실제 Olist 데이터셋과 비슷한 크기)
+BASE_ORDERS = 99_441
+BASE_PRODUCTS = 32_951
+BASE_ZIP_PREFIXES = 19_015
+GEO_ROWS_PER_PREFIX = 52  # geolocation.csv ~1M rows
+
+# 주별 고객 비중 (SP 쏠림) / 대표 좌표 / zip prefix 범위
+STATE_PROFILE = [
+    # state, weight, lat, lng, zip_start, zip_end
+    ('SP', 0.420, -23.55, -46.63, 1000, 19999),
+    ('RJ', 0.129, -22.91, -43.17, 20000, 28999),
+    ('MG', 0.117, -19.92, -43.94, 30000, 39999),
+    ('RS', 0.055, -30.03, -51.23, 90000, 99999),
+    ('PR', 0.051, -25.43, -49.27, 80000, 87999),
+    ('SC', 0.037, -27.60, -48.55, 88000, 89999),
+    ('BA', 0.034, -12.97, -38.50, 40000, 48999),
+    ('DF', 0.021, -15.79, -47.88, 70000, 72799),
+    ('ES', 0.020, -20.32, -40.34, 29000, 29999),
+    ('GO', 0.020, -16.69, -49.26, 72800, 76799),
+    ('PE', 0.017, -8.05, -34.88, 50000, 56999),
+    ('CE', 0.013, -3.73, -38.52, 60000, 63999),
+    ('PA', 0.010, -1.46, -48.50, 66000, 68899),
+    ('MT', 0.009, -15.60, -56.10, 78000, 78899),
+    ('MA', 0.008, -2.53, -44.30, 65000, 65999),
+    ('MS', 0.007, -20.44, -54.65, 79000, 79999),
+    ('PB', 0.005, -7.12, -34.86, 58000, 58999),
+    ('PI', 0.005, -5.09, -42.80, 64000, 64999),
+    ('RN', 0.005, -5.79, -35.21, 59000, 59999),
+    ('AL', 0.004, -9.67, -35.74, 57000, 57999),
+    ('SE', 0.004, -10.91, -37.07, 49000, 49999),
+    ('TO', 0.003, -10.18, -48.33, 77000, 77999),
+    ('RO', 0.003, -8.76, -63.90, 76800, 76999),
+    ('AM', 0.002, -3.12, -60.02, 69000, 69299),
+    ('AC', 0.001, -9.97, -67.81, 69900, 69999),
+    ('AP', 0.001, 0.03, -51.07, 68900, 68999),
+    ('RR', 0.001, 2.82, -60.67, 69300, 69399),
+]
+
+# 상위 카테고리 (실제 이름) + 롱테일 카테고리
+TOP_CATEGORIES = [
+    ('cama_mesa_banho', 'bed_bath_table'), ('beleza_saude', 'health_beauty'),
+    ('esporte_lazer', 'sports_leisure'), ('moveis_decoracao', 'furniture_decor'),
+    ('informatica_acessorios', 'computers_accessories'), ('utilidades_domesticas', 'housewares'),
+    ('relogios_presentes', 'watches_gifts'), ('telefonia', 'telephony'),
+    ('ferramentas_jardim', 'garden_tools'), ('automotivo', 'auto'),
+    ('brinquedos', 'toys'), ('cool_stuff', 'cool_stuff'),
+    ('perfumaria', 'perfumery'), ('bebes', 'baby'), ('eletronicos', 'electronics'),
+]
+N_CATEGORIES = 71
+
+REVIEW_SCORE_WEIGHTS = [0.115, 0.032, 0.082, 0.193, 0.578]  # 1점 ~ 5점
+
+PERIOD_START = pd.Timestamp('2016-09-01')
+PERIOD_END = pd.Timestamp('2018-10-15')
+
+
+def _hex_ids(rng, n):
+    """32자리 16진수 ID 배열 (Olist ID 형식) - 벡터화 생성"""
+    raw = np.frombuffer(rng.bytes(16 * n), dtype=np.uint8).reshape(n, 16)
+    digits = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+    chars = np.empty((n, 32), dtype=np.uint8)
+    chars[:, 0::2] = digits[raw >> 4]
+    chars[:, 1::2] = digits[raw & 0x0F]
+    return chars.view('S32').ravel().astype(str)
+
+
+def _zipf_weights(n, a=1.1):
+    weights = 1.0 / np.arange(1, n + 1) ** a
+    return weights / weights.sum()
+
+
+def _categories():
+    names = list(TOP_CATEGORIES)
+    for i in range(len(names) + 1, N_CATEGORIES + 1):
+        names.append((f"categoria_{i:02d}", f"category_{i:02d}"))
+    return pd.DataFrame(names, columns=['product_category_name', 'product_category_name_english'])
+
+
+def _purchase_timestamps(rng, n):
+    """주문 시각 - 기간 후반으로 갈수록 주문이 늘어나는 성장 추세"""
+    span = (PERIOD_END - PERIOD_START).total_seconds()
+    offsets = np.sqrt(rng.random(n)) * span
+    return PERIOD_START + pd.to_timedelta(np.sort(offsets), unit='s').floor('s')
+
+
+def generate_olist_tables(scale=1.0, seed=42):
+    """
+    Olist 형태의 원본 7개 테이블 생성 (결정적: 같은 scale/seed → 같은 결과)
+    - 키 관계: orders.customer_id → customers, order_items.order_id/product_id → orders/products,
+      order_reviews.order_id → orders, customers.zip prefix → geolocation
+    - 분포: SP 중심 주 분포, 카테고리 롱테일(Zipf), 일부 재구매 고객, 배송 지연/미배송 주문
+    """
+    rng = np.random.default_rng(seed)
+    n_orders = max(int(BASE_ORDERS * scale), 100)
+    n_products = max(int(BASE_PRODUCTS * scale), 50)
+    n_prefixes = max(int(BASE_ZIP_PREFIXES * min(scale, 5)), 100)  # zip prefix 수는 국가 규모로 제한
+
+    states = np.array([p[0] for p in STATE_PROFILE])
+    state_weights = np.array([p[1] for p in STATE_PROFILE])
+    state_weights = state_weights / state_weights.sum()
+
+    # --- geolocation: 주별 zip prefix 범위 내에서 prefix 생성, prefix당 여러 좌표 행
+    prefix_state_idx = rng.choice(len(states), size=n_prefixes, p=state_weights)
+    zip_start = np.array([p[4] for p in STATE_PROFILE])[prefix_state_idx]
+    zip_end = np.array([p[5] for p in STATE_PROFILE])[prefix_state_idx]
+    zip_prefix = zip_start + (rng.random(n_prefixes) * (zip_end - zip_start)).astype(np.int64)
+    zip_prefix, first = np.unique(zip_prefix, return_index=True)
+    prefix_state_idx = prefix_state_idx[first]
+
+    geo_rows = np.repeat(np.arange(len(zip_prefix)), rng.poisson(GEO_ROWS_PER_PREFIX * min(scale, 1.0), len(zip_prefix)) + 1)
+    center_lat = np.array([p[2] for p in STATE_PROFILE])[prefix_state_idx]
+    center_lng = np.array([p[3] for p in STATE_PROFILE])[prefix_state_idx]
+    prefix_lat = center_lat + rng.normal(0, 1.5, len(zip_prefix))
+    prefix_lng = center_lng + rng.normal(0, 1.5, len(zip_prefix))
+    geolocation = pd.DataFrame({
+        'geolocation_zip_code_prefix': zip_prefix[geo_rows],
+        'geolocation_lat': prefix_lat[geo_rows] + rng.normal(0, 0.02, len(geo_rows)),
+        'geolocation_lng': prefix_lng[geo_rows] + rng.normal(0, 0.02, len(geo_rows)),
+        'geolocation_city': np.char.add('cidade_', zip_prefix[geo_rows].astype(str)),
+        'geolocation_state': states[prefix_state_idx][geo_rows],
+    })
+
+    # --- customers: 주문마다 customer_id 1개, customer_unique_id는 일부 재구매 고객이 공유
+    n_unique_customers = int(n_orders * 0.97)
+    unique_ids = _hex_ids(rng, n_unique_customers)
+    repeat_pick = rng.random(n_orders) < 0.03
+    unique_idx = np.where(repeat_pick, rng.integers(0, n_unique_customers, n_orders), np.arange(n_orders) % n_unique_customers)
+    customer_prefix_idx = rng.integers(0, len(zip_prefix), n_unique_customers)[unique_idx]
+    customers = pd.DataFrame({
+        'customer_id': _hex_ids(rng, n_orders),
+        'customer_unique_id': unique_ids[unique_idx],
+        'customer_zip_code_prefix': zip_prefix[customer_prefix_idx],
+        'customer_city': np.char.add('cidade_', zip_prefix[customer_prefix_idx].astype(str)),
+        'customer_state': states[prefix_state_idx][customer_prefix_idx],
+    })
+
+    # --- orders
+    purchase = _purchase_timestamps(rng, n_orders)
+    delivery_days = rng.gamma(shape=2.2, scale=5.5, size=n_orders)
+    estimated_days = rng.integers(15, 35, n_orders)
+    delivered = purchase + pd.to_timedelta(delivery_days * 86400, unit='s').floor('s')
+    undelivered = rng.random(n_orders) < 0.03
+    orders = pd.DataFrame({
+        'order_id': _hex_ids(rng, n_orders),
+        'customer_id': customers['customer_id'].to_numpy()[rng.permutation(n_orders)],
+        'order_status': np.where(undelivered, 'shipped', 'delivered'),
+        'order_purchase_timestamp': purchase,
+        'order_approved_at': purchase + pd.to_timedelta(rng.integers(60, 86400, n_orders), unit='s'),
+        'order_delivered_carrier_date': purchase + pd.to_timedelta(delivery_days * 0.4 * 86400, unit='s').floor('s'),
+        'order_delivered_customer_date': delivered.where(~undelivered),
+        'order_estimated_delivery_date': (purchase + pd.to_timedelta(estimated_days, unit='D')).normalize(),
+    })
+
+    # --- products (카테고리 롱테일, 일부 카테고리 누락)
+    categories = _categories()
+    category_idx = rng.choice(len(categories), size=n_products, p=_zipf_weights(len(categories)))
+    product_category = categories['product_category_name'].to_numpy()[category_idx].astype(object)
+    product_category[rng.random(n_products) < 0.019] = None
+    products = pd.DataFrame({
+        'product_id': _hex_ids(rng, n_products),
+        'product_category_name': product_category,
+        'product_name_lenght': rng.integers(5, 76, n_products),
+        'product_description_lenght': rng.integers(4, 3993, n_products),
+        'product_photos_qty': rng.integers(1, 10, n_products),
+        'product_weight_g': rng.integers(50, 30000, n_products),
+        'product_length_cm': rng.integers(7, 105, n_products),
+        'product_height_cm': rng.integers(2, 105, n_products),
+        'product_width_cm': rng.integers(6, 118, n_products),
+    })
+
+    # --- order_items: 주문당 1~N개 (대부분 1개), 인기 상품 쏠림
+    items_per_order = rng.geometric(0.9, n_orders)
+    item_order_idx = np.repeat(np.arange(n_orders), items_per_order)
+    order_item_id = np.arange(len(item_order_idx)) - np.repeat(np.cumsum(items_per_order) - items_per_order, items_per_order) + 1
+    product_idx = rng.choice(n_products, size=len(item_order_idx), p=_zipf_weights(n_products, a=0.8))
+    order_items = pd.DataFrame({
+        'order_id': orders['order_id'].to_numpy()[item_order_idx],
+        'order_item_id': order_item_id,
+        'product_id': products['product_id'].to_numpy()[product_idx],
+        'seller_id': _hex_ids(rng, 3095)[rng.integers(0, 3095, len(item_order_idx))],
+        'shipping_limit_date': (orders['order_purchase_timestamp'].to_numpy()[item_order_idx] + np.timedelta64(6, 'D')),
+        'price': np.round(rng.lognormal(mean=4.4, sigma=0.9, size=len(item_order_idx)), 2),
+        'freight_value': np.round(rng.gamma(shape=3.0, scale=6.7, size=len(item_order_idx)), 2),
+    })
+
+    # --- order_reviews: 주문당 1개 (+ 소수 중복 리뷰)
+    review_order_idx = np.concatenate([np.arange(n_orders), rng.integers(0, n_orders, int(n_orders * 0.005))])
+    late = (delivery_days > estimated_days)[review_order_idx]
+    scores = rng.choice(np.arange(1, 6), size=len(review_order_idx), p=REVIEW_SCORE_WEIGHTS)
+    scores = np.where(late & (rng.random(len(review_order_idx)) < 0.5), rng.integers(1, 3, len(review_order_idx)), scores)
+    review_created = orders['order_purchase_timestamp'].to_numpy()[review_order_idx] + np.timedelta64(10, 'D')
+    order_reviews = pd.DataFrame({
+        'review_id': _hex_ids(rng, len(review_order_idx)),
+        'order_id': orders['order_id'].to_numpy()[review_order_idx],
+        'review_score': scores,
+        'review_comment_title': None,
+        'review_comment_message': None,
+        'review_creation_date': review_created,
+        'review_answer_timestamp': review_created + np.timedelta64(2, 'D'),
+    })
+
+    return {
+        'orders': orders,
+        'order_items': order_items,
+        'products': products,
+        'order_reviews': order_reviews,
+        'customers': customers,
+        'geolocation': geolocation,
+        'product_category_name_translation': categories,
+    }
+
+
+def write_olist_dataset(output_dir, scale=1.0, seed=42):
+    """생성한 테이블을 00_cleand_data와 같은 파일명의 CSV로 저장"""
+    os.makedirs(output_dir, exist_ok=True)
+    tables = generate_olist_tables(scale=scale, seed=seed)
+    for name, table in tables.items():
+        table.to_csv(os.path.join(output_dir, f"{name}.csv"), index=False, date_format='%Y-%m-%d %H:%M:%S')
+    return {name: len(table) for name, table in tables.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Olist 형태의 합성 원본 데이터 생성")
+    parser.add_argument('output_dir')
+    parser.add_argument('--scale', type=float, default=1.0, help="1× = 실제 Olist 규모 (~10만 주문)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    counts = write_olist_dataset(args.output_dir, scale=args.scale, seed=args.seed)
+    for name, rows in counts.items():
+        print(f"{name:<40} {rows:>12,} rows")
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+
+# 시계열 집계 단위 → pandas 기간 빈도 (주는 월요일 시작, duckdb date_trunc('week')와 같음)
+GRANULARITIES = {'day': 'D', 'week': 'W-MON', 'month': 'MS'}
+GRANULARITY_LABELS = {'day': '일', 'week': '주', 'month': '월'}
+
+# 차트 trace 하나에 보낼 최대 점 수 (넘으면 LTTB로 줄임)
+MAX_TRACE_POINTS = 400
+
+# 일별 매출 집계 컬럼 (시계열 엔진 입력)
+DAILY_COLUMNS = ['day', 'customer_state', 'payment_value']
+
+
+def daily_sales(df):
+    """행 단위 마트 → 일 × 주 매출 (day, customer_state, payment_value), 주 결측 행도 합계에 포함"""
+    if df is None or df.empty or not all(c in df.columns for c in ['order_date', 'customer_state', 'payment_value']):
+        return pd.DataFrame(columns=DAILY_COLUMNS)
+    frame = pd.DataFrame({
+        'day': pd.to_datetime(df['order_date']).dt.floor('D'),
+        'customer_state': df['customer_state'].astype(str).where(df['customer_state'].notna()),
+        'payment_value': df['payment_value'].to_numpy(dtype=np.float64, na_value=0),
+    })
+    frame = frame[frame['day'].notna()]
+    return frame.groupby(['day', 'customer_state'], dropna=False, sort=False)['payment_value'].sum().reset_index()
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets 다운샘플링 → 남길 점의 위치 배열
+    - 첫 / 마지막 점은 유지하고, 나머지를 threshold - 2개 구간으로 나눠 구간마다
+      (직전에 고른 점, 현재 구간 점, 다음 구간 평균)이 이루는 삼각형이 가장 큰 점 하나를 고름
+    - 구간 수만큼만 반복하고 구간 안은 NumPy로 계산 (봉우리 / 골짜기 모양이 유지됨)
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (threshold - 2)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample(series, max_points=MAX_TRACE_POINTS):
+    """날짜 index Series → LTTB로 max_points개 이하로 줄인 Series (점 수가 적으면 그대로)"""
+    if len(series) <= max_points:
+        return series
+    x = (series.index - series.index[0]) / pd.Timedelta(days=1)
+    return series.iloc[lttb(np.asarray(x), series.to_numpy(), max_points)]
+
+
+class SalesSeries:
+    """
+    데이터 버전당 한 번 만드는 일 / 주 / 월 매출 시계열 (공유 데이터셋 / duckdb 백엔드와 함께 교체)
+    - totals[단위]: 기간별 전체 매출 Series, by_state[단위]: 기간 × 주 매출 (빈 기간은 0)
+    - 입력은 일 × 주 매출(DAILY_COLUMNS) → 주 / 월은 일별 합계를 다시 묶음 (매출은 더할 수 있음)
+    - 차트에는 trace마다 LTTB로 줄인 점만 넘김 → 일별 다중 주 차트도 월별 차트와 비슷한 크기
+    """
+
+    def __init__(self, daily):
+        self.totals = {}
+        self.by_state = {}
+        if daily is None or daily.empty:
+            return
+        daily = daily.assign(day=pd.to_datetime(daily['day']),
+                             payment_value=daily['payment_value'].astype(np.float64).fillna(0))
+        total = daily.groupby('day')['payment_value'].sum()
+        wide = (daily[daily['customer_state'].notna()]
+                .pivot_table(index='day', columns='customer_state', values='payment_value', aggfunc='sum',
+                             fill_value=0)
+                .sort_index(axis=1))
+        wide.columns = wide.columns.astype(str)
+        for granularity, freq in GRANULARITIES.items():
+            self.totals[granularity] = total.resample(freq, label='left', closed='left').sum()
+            self.by_state[granularity] = wide.resample(freq, label='left', closed='left').sum()
+
+    @property
+    def empty(self):
+        return not self.totals
+
+    def top_states(self, n=5):
+        """전체 기간 매출 상위 n개 주"""
+        if self.empty:
+            return []
+        return self.by_state['day'].sum().nlargest(n).index.tolist()
+
+    def trend(self, granularity, states=None, max_points=MAX_TRACE_POINTS):
+        """
+        차트용 긴 형식 프레임 (period, customer_state, payment_value)
+        - states가 없으면 전체 합계 trace 하나 (customer_state 컬럼 없음), 있으면 주마다 trace
+        """
+        if self.empty:
+            return pd.DataFrame(columns=['period', 'payment_value'] + (['customer_state'] if states else []))
+        if not states:
+            points = downsample(self.totals[granularity], max_points)
+            return pd.DataFrame({'period': points.index, 'payment_value': points.to_numpy()})
+        wide = self.by_state[granularity]
+        frames = []
+        for state in states:
+            if state not in wide.columns:
+                continue
+            points = downsample(wide[state], max_points)
+            frames.append(pd.DataFrame({'period': points.index, 'customer_state': state,
+                                        'payment_value': points.to_numpy()}))
+        if not frames:
+            return pd.DataFrame(columns=['period', 'customer_state', 'payment_value'])
+        return pd.concat(frames, ignore_index=True)
+
+
+def build_sales_series(df):
+    """행 단위 마트 → SalesSeries"""
+    return SalesSeries(daily_sales(df))